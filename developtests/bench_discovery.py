@@ -0,0 +1,344 @@
+# pylint: disable=C0301, C0103, E0401, C0413
+
+import sys
+import getopt
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from netmiko.ssh_exception import NetMikoTimeoutException
+
+scriptPath = os.path.realpath(os.path.dirname(sys.argv[0]))
+os.chdir(scriptPath)
+
+#append the relative location you want to import from
+sys.path.append("../nettools/")
+import cscofunc
+import discoverfunc
+
+DOMAIN = 'example.com'
+
+IOS_VERSION = '''Cisco IOS Software, C3750E Software (C3750E-UNIVERSALK9-M), Version 15.0(2)SE11, RELEASE SOFTWARE (fc3)
+{name} uptime is 1 year, 2 weeks, 3 days, 4 hours, 5 minutes
+cisco WS-C3750X-48P (PowerPC405) processor with 262144K bytes of memory.
+'''
+
+NXOS_VERSION = '''Cisco Nexus Operating System (NX-OS) Software
+Software
+  system:    version 6.2(12)
+  system image file is:    bootflash:///n7000-s2-dk9.6.2.12.bin
+Hardware
+  cisco N7K-C7010 ("Supervisor Module-2")
+  Device name: {name}
+'''
+
+IOS_CDP_ENTRY = '''-------------------------
+Device ID: {device_id}
+Entry address(es): 
+  IP address: {ip}
+Platform: cisco {platform},  Capabilities: {capability}
+Interface: {intf},  Port ID (outgoing port): {port}
+Holdtime : 150 sec
+
+Version :
+{version}
+
+'''
+
+NXOS_CDP_ENTRY = '''----------------------------------------
+Device ID:{device_id}(FOX1234ABCD)
+System Name: {name}
+
+Interface address(es):
+    IPv4 Address: {ip}
+Platform: cisco {platform}, Capabilities: {capability}
+Interface: {intf}, Port ID (outgoing port): {port}
+Holdtime: 150 sec
+
+Version:
+{version}
+
+'''
+
+PHONE_CDP_ENTRY = '''-------------------------
+Device ID: {device_id}
+Entry address(es): 
+  IP address: {ip}
+Platform: Cisco IP Phone 7945,  Capabilities: Host Phone Two-port Mac Relay
+Interface: {intf},  Port ID (outgoing port): Port 1
+Holdtime : 150 sec
+
+Version :
+SCCP45.9-3-1SR1S
+
+'''
+
+
+class SyntheticFabric(object):
+    """
+    Synthetic three tier topology: cores (full mesh), distribution switches (connected to all cores),
+    access switches (each connected to two distribution switches) with phones
+    """
+
+    def __init__(self, cores=2, dists=4, access=20, phones=2, nxos_core=False):
+        self.devices = {}       # ip : {'name', 'os', 'links': [(local intf, neighbor ip or phone name, remote port)]}
+        self.calls = 0          # number of SSH sessions
+        self.lock = threading.Lock()
+        self.phone_count = 0
+        self.free_port = {}
+
+        core_ips = [self.add_device('core%d' % i, 'NX-OS' if nxos_core else 'IOS') for i in range(cores)]
+        dist_ips = [self.add_device('dist%d' % i, 'IOS') for i in range(dists)]
+        for i, core_ip in enumerate(core_ips):
+            for other_ip in core_ips[i+1:]:
+                self.add_link(core_ip, other_ip)
+            for dist_ip in dist_ips:
+                self.add_link(core_ip, dist_ip)
+        for i in range(access):
+            acc_ip = self.add_device('acc%d' % i, 'IOS')
+            self.add_link(dist_ips[i % dists], acc_ip)
+            self.add_link(dist_ips[(i + 1) % dists], acc_ip)
+            for _ in range(phones):
+                name = 'SEP%012X' % self.phone_count
+                self.phone_count += 1
+                self.devices[acc_ip]['links'].append((self.get_port(acc_ip), name, 'Port 1'))
+
+    def add_device(self, name, os_type):
+        """
+        Adds switch, returns its IP address
+        """
+        num = len(self.devices) + 1
+        ip_addr = '10.%d.%d.%d' % (num // 65536, num // 256 % 256, num % 256)
+        self.devices[ip_addr] = {'name': name, 'os': os_type, 'links': []}
+        return ip_addr
+
+    def get_port(self, ip_addr):
+        """
+        Returns next free port of switch
+        """
+        self.free_port[ip_addr] = self.free_port.get(ip_addr, 0) + 1
+        if self.devices[ip_addr]['os'] == 'NX-OS':
+            return 'Ethernet1/%d' % self.free_port[ip_addr]
+        return 'GigabitEthernet%d/0/%d' % (self.free_port[ip_addr] // 48 + 1, self.free_port[ip_addr] % 48 + 1)
+
+    def add_link(self, ip_a, ip_b):
+        """
+        Connects two switches
+        """
+        port_a = self.get_port(ip_a)
+        port_b = self.get_port(ip_b)
+        self.devices[ip_a]['links'].append((port_a, ip_b, port_b))
+        self.devices[ip_b]['links'].append((port_b, ip_a, port_a))
+
+    def fqdn(self, ip_addr):
+        """
+        Returns device_id of switch
+        """
+        return self.devices[ip_addr]['name'] + '.' + DOMAIN
+
+    def sh_version(self, ip_addr):
+        """
+        Returns output of sh version
+        """
+        device = self.devices[ip_addr]
+        if device['os'] == 'NX-OS':
+            return NXOS_VERSION.format(name=device['name'])
+        return IOS_VERSION.format(name=device['name'])
+
+    def sh_cdp_entry(self, ip_addr):
+        """
+        Returns output of sh cdp entry * (IOS) or sh cdp entry all (NX-OS)
+        """
+        entry_template = NXOS_CDP_ENTRY if self.devices[ip_addr]['os'] == 'NX-OS' else IOS_CDP_ENTRY
+        output = []
+        for (intf, neighbor, port) in self.devices[ip_addr]['links']:
+            if neighbor not in self.devices:
+                output.append(PHONE_CDP_ENTRY.format(device_id=neighbor, ip='10.250.0.1', intf=intf))
+                continue
+            if self.devices[neighbor]['os'] == 'NX-OS':
+                (platform, capability, version) = ('N7K-C7010', 'Router Switch IGMP Filtering', 'Cisco Nexus Operating System (NX-OS) Software, Version 6.2(12)')
+            else:
+                (platform, capability, version) = ('WS-C3750X-48P', 'Switch IGMP', 'Cisco IOS Software, C3750E Software (C3750E-UNIVERSALK9-M), Version 15.0(2)SE11, RELEASE SOFTWARE (fc3)')
+            output.append(entry_template.format(device_id=self.fqdn(neighbor), name=self.devices[neighbor]['name'], ip=neighbor,
+                                                platform=platform, capability=capability, intf=intf, port=port, version=version))
+        return ''.join(output)
+
+    def get_handler(self, latency):
+        """
+        Returns netmiko-style ConnectHandler class answering from the fabric, each command takes 'latency' seconds
+        """
+        fabric = self
+
+        class FakeHandler(object):
+            ''' Fake SSH session '''
+
+            def __init__(self, ip=None, **kwargs):
+                if ip not in fabric.devices:
+                    raise NetMikoTimeoutException("Connection to device timed-out")
+                with fabric.lock:
+                    fabric.calls += 1
+                self.ip_addr = ip
+                time.sleep(latency)
+
+            def send_command(self, command):
+                ''' Returns canned output '''
+                time.sleep(latency)
+                os_type = fabric.devices[self.ip_addr]['os']
+                if command == 'sh version':
+                    return fabric.sh_version(self.ip_addr)
+                if command == 'show hosts':
+                    return "Default domain is " + DOMAIN + "\nName/address lookup uses domain service\n"
+                if command == 'sh cdp entry *' and os_type == 'IOS':
+                    return fabric.sh_cdp_entry(self.ip_addr)
+                if command == 'sh cdp entry all' and os_type == 'NX-OS':
+                    return fabric.sh_cdp_entry(self.ip_addr)
+                if os_type == 'NX-OS':
+                    return "                      ^\n% Invalid command at '^' marker.\n"
+                return "                      ^\n% Invalid input detected at '^' marker.\n"
+
+            def disconnect(self):
+                ''' Closes session '''
+                pass
+
+        return FakeHandler
+
+    def expected(self, seed_ip, level):
+        """
+        Returns expected result of discovery from seed with level: nodes are switches up to level+1 hops from seed,
+        hosts are phones of switches up to level hops
+
+        :return (node_ids, host_count):
+        """
+        distance = {seed_ip: 0}
+        queue = deque([seed_ip])
+        while queue:
+            ip_addr = queue.popleft()
+            for (_, neighbor, _) in self.devices[ip_addr]['links']:
+                if neighbor in self.devices and neighbor not in distance:
+                    distance[neighbor] = distance[ip_addr] + 1
+                    queue.append(neighbor)
+        node_ids = set(self.fqdn(ip_addr) for ip_addr, dist in distance.items() if dist <= level + 1)
+        host_count = 0
+        for ip_addr, dist in distance.items():
+            if dist <= level:
+                host_count += sum(1 for (_, neighbor, _) in self.devices[ip_addr]['links'] if neighbor not in self.devices)
+        return (node_ids, host_count)
+
+
+def run_engine(engine, fabric, seed_ip, level, workers):
+    """
+    Runs discovery engine on fabric, returns (nodes, hosts) lists
+    """
+    seeds = [{'ip': seed_ip, 'level': level, 'username': 'bench', 'password': 'bench'}]
+    if engine == 'legacy':
+        big_cdp_dict = cscofunc.get_device_list_cdp_seed(seeds, {'hosts': [], 'nodes': []})
+        return (big_cdp_dict['nodes'], big_cdp_dict['hosts'])
+    registry = discoverfunc.get_device_list_cdp_bfs(seeds, discoverfunc.DeviceRegistry(), workers)
+    return (registry.node_list(), registry.host_list())
+
+
+def main():
+    ''' Main
+
+    Benchmark of CDP discovery on synthetic topology, no device is contacted.
+
+    '''
+    usage_str = '''
+    Usage: bench_discovery.py [OPTIONS]
+    -h,     --help                      display help
+    -a,     --access                    number of access switches, default 20
+    -d,     --dists                     number of distribution switches, default 4
+    -c,     --cores                     number of core switches, default 2
+    -p,     --phones                    number of phones per access switch, default 2
+    -x,     --nxos                      core switches run NX-OS
+    -l,     --latency                   latency of each SSH operation in ms, default 10
+    -L,     --level                     level of discovery, default 5
+    -w,     --workers                   number of workers of bfs engine, default 10
+    -e,     --engine                    legacy, bfs or all (default)
+    '''
+    access = 20
+    dists = 4
+    cores = 2
+    phones = 2
+    nxos_core = False
+    latency = 10
+    level = 5
+    workers = discoverfunc.DEFAULT_WORKERS
+    engines = ['legacy', 'bfs']
+
+    argv = sys.argv[1:]
+
+    try:
+        opts, args = getopt.getopt(argv, "ha:d:c:p:xl:L:w:e:", ["help", "access=", "dists=", "cores=", "phones=", "nxos", "latency=", "level=", "workers=", "engine="])
+    except getopt.GetoptError:
+        print(usage_str)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            print(usage_str)
+            sys.exit()
+
+        elif opt in ("-a", "--access"):
+            access = int(arg)
+        elif opt in ("-d", "--dists"):
+            dists = int(arg)
+        elif opt in ("-c", "--cores"):
+            cores = int(arg)
+        elif opt in ("-p", "--phones"):
+            phones = int(arg)
+        elif opt in ("-x", "--nxos"):
+            nxos_core = True
+        elif opt in ("-l", "--latency"):
+            latency = float(arg)
+        elif opt in ("-L", "--level"):
+            level = int(arg)
+        elif opt in ("-w", "--workers"):
+            workers = int(arg)
+        elif opt in ("-e", "--engine"):
+            if arg != 'all':
+                engines = [arg]
+
+    # sanity checks
+    for engine in engines:
+        if engine not in ('legacy', 'bfs'):
+            print("Invalid engine:", engine)
+            sys.exit(2)
+    if cores < 1 or dists < 1:
+        print("At least one core and one distribution switch is needed")
+        sys.exit(2)
+
+    fabric = SyntheticFabric(cores, dists, access, phones, nxos_core)
+    handler = fabric.get_handler(latency / 1000.0)
+    cscofunc.ConnectHandler = handler
+    discoverfunc.ConnectHandler = handler
+    seed_ip = list(fabric.devices)[0]
+    (expected_nodes, expected_hosts) = fabric.expected(seed_ip, level)
+    print("Topology:", len(fabric.devices), "switches,", fabric.phone_count, "phones, latency", latency, "ms, level", level)
+
+    results = []
+    for engine in engines:
+        fabric.calls = 0
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')      # engines print progress
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            (nodes, hosts) = run_engine(engine, fabric, seed_ip, level, workers)
+        finally:
+            wall_time = time.perf_counter() - start
+            (_, peak) = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            sys.stdout.close()
+            sys.stdout = stdout
+        node_ids = [node['device_id'] for node in nodes]
+        correct = len(node_ids) == len(set(node_ids)) and set(node_ids) == expected_nodes and len(hosts) == expected_hosts
+        results.append((engine, wall_time, fabric.calls, peak, len(nodes), len(hosts), correct))
+
+    print("sep=;")
+    print("Engine;Wall time [s];SSH calls;Peak memory [MB];Nodes;Hosts;Correct")
+    for (engine, wall_time, calls, peak, node_count, host_count, correct) in results:
+        print("%s;%.2f;%d;%.1f;%d;%d;%s" % (engine, wall_time, calls, peak / 1048576.0, node_count, host_count, correct))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# pylint: disable=C0301, C0103, E0401, C0413
+
+import sys
+import getopt
+import os
+import re
+
+scriptPath = os.path.realpath(os.path.dirname(sys.argv[0]))
+os.chdir(scriptPath)
+
+#append the relative location you want to import from
+sys.path.append("../nettools/")
+import cscofunc
+
+AUTO_CREATED_PC = 258           # Po created for service module, sh etherchannel N detail fails for it
+
+
+class FakeHandler(object):
+    """
+    Netmiko handler replacement, returns prepared outputs of commands and counts sent commands
+    """
+
+    def __init__(self, outputs):
+        self.outputs = outputs
+        self.commands = 0
+
+    def send_command(self, cmd):
+        ''' Returns prepared output of the command '''
+        self.commands += 1
+        return self.outputs.get(cmd, "% Invalid input detected at '^' marker.\n")
+
+
+def make_outputs(nr_pcs, members):
+    """
+    Returns (outputs, expected): dict command : output of synthetic 6500 with nr_pcs port-channels with 'members' ports each
+    and one auto-created port-channel, expected is dict Po number : list of members
+    """
+    expected = {}
+    summary = ["Flags:  D - down        P - bundled in port-channel",
+               "        I - stand-alone s - suspended",
+               "        U - in use      f - failed to allocate aggregator",
+               "",
+               "Number of channel-groups in use: %d" % (nr_pcs + 1),
+               "Number of aggregators:           %d" % (nr_pcs + 1),
+               "",
+               "Group  Port-channel  Protocol    Ports",
+               "------+-------------+-----------+-----------------------------------------------"]
+    etherchannel = ["                Channel-group listing:", "                ----------------------", ""]
+    outputs = {}
+    for pc in list(range(1, nr_pcs + 1)) + [AUTO_CREATED_PC]:
+        ports = ['Gi%d/%d' % (1 + (pc * members + i) // 48, 1 + (pc * members + i) % 48) for i in range(members)]
+        expected[str(pc)] = ports
+        flagged = ['%-12s' % (port + ('(P)' if i % 5 else '(D)')) for (i, port) in enumerate(ports)]
+        lines = [flagged[i:i+4] for i in range(0, len(flagged), 4)]
+        summary.append('%-6d %-13s %-11s %s' % (pc, 'Po%d(SU)' % pc, 'LACP' if pc != AUTO_CREATED_PC else '-', ''.join(lines[0]).rstrip()))
+        summary.extend(' ' * 33 + ''.join(line).rstrip() for line in lines[1:])
+        if pc == AUTO_CREATED_PC:
+            continue            # not listed by sh etherchannel, detail fails
+        etherchannel.extend(["Group: %d " % pc, "----------", "Group state = L2", "Ports: %d   Maxports = 16" % members, "Protocol:   LACP", ""])
+        detail = ["Group state = L2", "Ports: %d   Maxports = 16" % members, "", "                Ports in the group:", "                -------------------"]
+        for port in ports:
+            detail.extend(["Port: " + port, "------------", "", "Port state    = Up Mstr Assoc In-Bndl", ""])
+        outputs['sh etherchannel %d detail' % pc] = '\n'.join(detail) + '\n'
+    outputs['sh etherchannel'] = '\n'.join(etherchannel) + '\n'
+    outputs['sh etherchannel summary'] = '\n'.join(summary) + '\n'
+    return (outputs, expected)
+
+
+def legacy_get_cli_sh_etherchannel_summary(handler):
+    '''
+    get_cli_sh_etherchannel_summary before single command parser, sh etherchannel N detail is sent for every port-channel
+    '''
+    pc_list = []
+    cli_output = handler.send_command("sh etherchannel")
+    for block in cli_output.split('----------'):
+        int_dict = {}
+        int_dict['pc_number'] = cscofunc.find_regex_value_in_string(block, re.compile(r"Group:\s+([0-9]+)\s+\n"))
+        if int_dict['pc_number']:
+            int_dict['int_list'] = []
+            cli_output = handler.send_command("sh etherchannel " + int_dict['pc_number'] + " detail")
+            for block2 in cli_output.split('------------'):
+                iface = cscofunc.find_regex_value_in_string(block2, re.compile(r"Port:\s+([A-Za-z0-9/\.]+)\n"))
+                if iface:
+                    int_dict['int_list'].append(iface)
+            pc_list.append(int_dict)
+    return pc_list
+
+
+def report(name, handler, pc_list, expected):
+    """
+    Prints number of commands and port-channels which differ from expected membership
+    """
+    found = {item['pc_number']: item['int_list'] for item in pc_list}
+    wrong = [pc for pc in expected if found.get(pc) != expected[pc]]
+    print("  %-8s %4d commands, %4d port-channels, wrong or missing: %s" % (name, handler.commands, len(pc_list), ', '.join('Po' + pc for pc in wrong) or 'none'))
+    return not wrong
+
+
+def main():
+    ''' Main
+
+    Compares legacy etherchannel parser (sh etherchannel N detail per port-channel) with cscofunc.get_cli_sh_etherchannel_summary
+    on synthetic outputs, no device is contacted.
+
+    '''
+    usage_str = '''
+    Usage: bench_etherchannel.py [OPTIONS]
+    -h,     --help                      display help
+    -n,     --pcs                       number of port-channels, default 150
+    -m,     --members                   number of members of port-channel, default 6
+    '''
+    nr_pcs = 150
+    members = 6
+
+    argv = sys.argv[1:]
+
+    try:
+        opts, args = getopt.getopt(argv, "hn:m:", ["help", "pcs=", "members="])
+    except getopt.GetoptError:
+        print(usage_str)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            print(usage_str)
+            sys.exit()
+        elif opt in ("-n", "--pcs"):
+            nr_pcs = int(arg)
+        elif opt in ("-m", "--members"):
+            members = int(arg)
+
+    (outputs, expected) = make_outputs(nr_pcs, members)
+    print(nr_pcs, "port-channels +", "auto-created Po%d" % AUTO_CREATED_PC)
+    handler = FakeHandler(outputs)
+    report("legacy:", handler, legacy_get_cli_sh_etherchannel_summary(handler), expected)
+    handler = FakeHandler(outputs)
+    result = report("current:", handler, cscofunc.get_cli_sh_etherchannel_summary(handler), expected)
+    sys.exit(0 if result else 1)
+
+if __name__ == "__main__":
+    main()
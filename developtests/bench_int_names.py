@@ -0,0 +1,124 @@
+# pylint: disable=C0301, C0103, E0401, C0413
+
+import sys
+import getopt
+import os
+import re
+import time
+
+scriptPath = os.path.realpath(os.path.dirname(sys.argv[0]))
+os.chdir(scriptPath)
+
+#append the relative location you want to import from
+sys.path.append("../nettools/")
+import cscofunc
+
+LEGACY_SHORT = ('Gi', 'Te', 'Fa', 'Po', 'Eth', 'Vl', 'Lo')          # types known to legacy functions
+MODERN_NAMES = ('Twe1/0/1', 'Fo1/1/1', 'Hu1/0/49', 'Tu10', 'mgmt0', 'nve1')
+
+
+def legacy_conv_int_to_interface_name(intname):
+    '''
+    conv_int_to_interface_name before INTERFACE_TYPES table
+    '''
+    for (short_type, full_type) in (('Gi', 'GigabitEthernet'), ('Te', 'TenGigabitEthernet'), ('Fa', 'FastEthernet'), ('Po', 'Port-channel'),
+                                    ('Eth', 'Ethernet'), ('Vl', 'Vlan'), ('Lo', 'Loopback')):
+        res = re.match(short_type + r"[0-9].*", intname)
+        if res:
+            return intname.replace(short_type, full_type)
+    return "Error"
+
+
+def legacy_conv_interface_to_int_name(intname):
+    '''
+    conv_interface_to_int_name before INTERFACE_TYPES table
+    '''
+    for (full_type, short_type) in (('GigabitEthernet', 'Gi'), ('TenGigabitEthernet', 'Te'), ('FastEthernet', 'Fa'), ('Port-channel', 'Po'),
+                                    ('Ethernet', 'Eth'), ('Vlan', 'Vl'), ('Loopback', 'Lo')):
+        res = re.match(full_type + r"[0-9].*", intname)
+        if res:
+            return intname.replace(full_type, short_type)
+    return "Error"
+
+
+def make_names(nr_ports, short_types):
+    """
+    Returns list of short interface names of switch stack with nr_ports ports of types short_types
+    """
+    return ['%s%d/0/%d' % (short_types[i % len(short_types)], 1 + i // 48, 1 + i % 48) for i in range(nr_ports)]
+
+
+def per_call(func, names, repeat):
+    """
+    Returns best time of one call in nanoseconds
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for name in names:
+            func(name)
+        elapsed = (time.perf_counter() - start) / len(names)
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e9
+
+
+def main():
+    ''' Main
+
+    Microbenchmark of interface name conversions, legacy regex functions against cscofunc.canonical_interface_name table
+    with LRU cache (cold: cache is cleared before each run, warm: names were converted before).
+
+    '''
+    usage_str = '''
+    Usage: bench_int_names.py [OPTIONS]
+    -h,     --help                      display help
+    -n,     --ports                     number of interface names, default 1200 (6500 VSS)
+    -r,     --repeat                    number of runs (best is reported), default 20
+    '''
+    nr_ports = 1200
+    repeat = 20
+
+    argv = sys.argv[1:]
+
+    try:
+        opts, args = getopt.getopt(argv, "hn:r:", ["help", "ports=", "repeat="])
+    except getopt.GetoptError:
+        print(usage_str)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            print(usage_str)
+            sys.exit()
+        elif opt in ("-n", "--ports"):
+            nr_ports = int(arg)
+        elif opt in ("-r", "--repeat"):
+            repeat = int(arg)
+
+    short_names = make_names(nr_ports, LEGACY_SHORT)
+    full_names = [legacy_conv_int_to_interface_name(name) for name in short_names]
+    def cold(func):
+        ''' Returns func which clears cache before run '''
+        def run(name):
+            ''' One conversion without cache '''
+            cscofunc.canonical_interface_name.cache_clear()
+            return func(name)
+        return run
+
+    for (title, names, legacy, current) in (('short -> full', short_names, legacy_conv_int_to_interface_name, cscofunc.conv_int_to_interface_name),
+                                            ('full -> short', full_names, legacy_conv_interface_to_int_name, cscofunc.conv_interface_to_int_name)):
+        same = [legacy(name) for name in names] == [current(name) for name in names]
+        t_legacy = per_call(legacy, names, repeat)
+        t_cold = per_call(cold(current), names, repeat)
+        for name in names:          # fill the cache
+            current(name)
+        t_warm = per_call(current, names, repeat)
+        print(title, len(names), "names, identical output:", same)
+        print("  legacy:        %7.0f ns per call" % t_legacy)
+        print("  current cold:  %7.0f ns per call (includes cache_clear)" % t_cold)
+        print("  current warm:  %7.0f ns per call, speedup %.1fx" % (t_warm, t_legacy / t_warm))
+
+    print("modern types:", ', '.join(name + ' -> ' + cscofunc.conv_int_to_interface_name(name) for name in MODERN_NAMES))
+    print("legacy:      ", ', '.join(name + ' -> ' + legacy_conv_int_to_interface_name(name) for name in MODERN_NAMES))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# pylint: disable=C0301, C0103, E0401, C0413
+
+import sys
+import getopt
+import os
+import re
+import time
+
+scriptPath = os.path.realpath(os.path.dirname(sys.argv[0]))
+os.chdir(scriptPath)
+
+#append the relative location you want to import from
+sys.path.append("../nettools/")
+import cscofunc
+import portmigr
+
+DESCRIPTIONS = ('', 'AP room 12, 1.fl', 'c6506_hra_vss_2/3/', 'printer #4 (HP)', 'uplink-to-core', 'cam;door')
+STATUSES = ('connected', 'notconnect', 'disabled', 'err-disabled')
+
+
+def make_output(nr_ports, nxos):
+    """
+    Returns (output, expected): output of sh interface status of synthetic switch with nr_ports ports and one
+    port-channel, expected is dict port : status
+    """
+    expected = {}
+    if nxos:
+        lines = ["", "-" * 80, "Port          Name               Status    Vlan      Duplex  Speed   Type", "-" * 80]
+        row = '%-13s %-18s %-9s %-9s %-6s  %-6s  %s'
+    else:
+        lines = ["", "Port      Name               Status       Vlan       Duplex  Speed Type"]
+        row = '%-9s %-18s %-12s %-10s %6s %6s %s'
+    for i in range(nr_ports):
+        port = ('Eth%d/%d' if nxos else 'Gi%d/0/%d') % (1 + i // 48, 1 + i % 48)
+        status = STATUSES[i % len(STATUSES)]
+        if nxos and status == 'notconnect':
+            status = 'notconnec'            # NX-OS truncates it to column width
+        connected = status == 'connected'
+        sfp = 'Not Present' if i % 48 >= 44 and not connected else ('10Gbase-SR' if nxos else '10/100/1000BaseTX')
+        lines.append(row % (port, DESCRIPTIONS[i % len(DESCRIPTIONS)], status, 'trunk' if i % 7 == 0 else str(10 + i % 20),
+                            'a-full' if connected else 'auto', 'a-1000' if connected else 'auto', sfp))
+        expected[port] = status
+    port = 'Po1'
+    lines.append((row % (port, 'uplink-to-core', 'connected', 'trunk', 'a-full', 'a-10G', '')).rstrip())
+    expected[port] = 'connected'
+    return ('\n'.join(lines) + '\n', expected)
+
+
+def legacy_parse_sh_int_status(cli_output):
+    '''
+    get_cli_sh_int_status before header offsets, one regex with 18 characters of Name
+    '''
+    int_stat = []
+    for line in cli_output.split('\n'):
+        int_dict = {}
+        intstr = re.match(r"([A-Za-z0-9/]+)\s+(..................)\s+([A-Za-z]+)\s+([A-Za-z0-9]+)\s+([A-Za-z]+)\s+([A-Za-z0-9]+)\s+(.*)$", line)
+        if intstr:
+            if intstr.group(1) == 'Port':  # line with column names
+                continue
+            int_dict['port'] = intstr.group(1)
+            int_dict['name'] = intstr.group(2).rstrip()
+            int_dict['status'] = intstr.group(3)
+            int_dict['vlan'] = intstr.group(4)
+            int_dict['duplex'] = intstr.group(5)
+            int_dict['speed'] = intstr.group(6)
+            int_dict['type'] = intstr.group(7)
+            int_stat.append(int_dict)
+    return int_stat
+
+
+def legacy_find_port(port_stat, port):
+    '''
+    Port search of func_check_port_status before dict, substring of port name
+    '''
+    for item in port_stat:
+        if port in item['port']:
+            return item
+    return None
+
+
+def current_find_port(port_stat, port):
+    '''
+    Port search of portmigr.func_check_port_status
+    '''
+    for int_type in portmigr.PORT_TYPES:
+        if int_type + port in port_stat:
+            return port_stat[int_type + port]
+    return None
+
+
+def check(os_name, nr_ports, nxos, repeat):
+    """
+    Compares both parsers and port searches, returns True if current parser finds every port with the right status
+    """
+    (output, expected) = make_output(nr_ports, nxos)
+    numbers = {port: port[re.search(r"\d", port).start():] for port in expected}      # portmigr gets numbers only
+    legacy = legacy_parse_sh_int_status(output)
+    current = cscofunc.parse_sh_int_status(output)
+    found = {item['port']: item['status'] for item in current.values()}
+    wrong = [port for port in expected if found.get(port) != expected[port]]
+    legacy_found = {item['port']: item['status'] for item in legacy}
+    legacy_wrong = [port for port in expected if legacy_found.get(port) != expected[port]]
+    legacy_mismatch = [port for (port, number) in numbers.items() if (legacy_find_port(legacy, number) or {}).get('port') != port]
+    current_mismatch = [port for (port, number) in numbers.items() if (current_find_port(current, number) or {}).get('port') != port]
+    times = []
+    for (parse, find) in ((legacy_parse_sh_int_status, legacy_find_port), (cscofunc.parse_sh_int_status, current_find_port)):
+        best_parse = best_find = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            port_stat = parse(output)
+            middle = time.perf_counter()
+            for number in numbers.values():
+                find(port_stat, number)
+            end = time.perf_counter()
+            best_parse = middle - start if best_parse is None else min(best_parse, middle - start)
+            best_find = (end - middle) / len(numbers) if best_find is None else min(best_find, (end - middle) / len(numbers))
+        times.append((best_parse, best_find))
+    print(os_name, len(expected), "ports")
+    print("  legacy:  rows %4d, wrong or missing %4d, port number matched other port %4d, parse %6.2f ms, lookup %8.2f us"
+          % (len(legacy), len(legacy_wrong), len(legacy_mismatch), times[0][0] * 1e3, times[0][1] * 1e6))
+    print("  current: rows %4d, wrong or missing %4d, port number matched other port %4d, parse %6.2f ms, lookup %8.2f us"
+          % (len(current), len(wrong), len(current_mismatch), times[1][0] * 1e3, times[1][1] * 1e6))
+    for port in wrong:
+        print("  - current parser:", port, "expected", expected[port], "found", found.get(port))
+    return not wrong and not current_mismatch
+
+
+def main():
+    ''' Main
+
+    Compares legacy sh interface status parser (regex, list searched by substring) with cscofunc.parse_sh_int_status
+    (header offsets, dict keyed by canonical port name) on synthetic IOS and NX-OS outputs, no device is contacted.
+
+    '''
+    usage_str = '''
+    Usage: bench_int_status.py [OPTIONS]
+    -h,     --help                      display help
+    -n,     --ports                     number of ports, default 480
+    -r,     --repeat                    number of runs (best is reported), default 10
+    '''
+    nr_ports = 480
+    repeat = 10
+
+    argv = sys.argv[1:]
+
+    try:
+        opts, args = getopt.getopt(argv, "hn:r:", ["help", "ports=", "repeat="])
+    except getopt.GetoptError:
+        print(usage_str)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            print(usage_str)
+            sys.exit()
+        elif opt in ("-n", "--ports"):
+            nr_ports = int(arg)
+        elif opt in ("-r", "--repeat"):
+            repeat = int(arg)
+
+    result = True
+    for (os_name, nxos) in (('IOS', False), ('NX-OS', True)):
+        result = check(os_name, nr_ports, nxos, repeat) and result
+    sys.exit(0 if result else 1)
+
+if __name__ == "__main__":
+    main()
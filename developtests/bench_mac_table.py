@@ -0,0 +1,180 @@
+# pylint: disable=C0301, C0103, E0401, C0413
+
+import sys
+import getopt
+import os
+import re
+import time
+import tracemalloc
+
+scriptPath = os.path.realpath(os.path.dirname(sys.argv[0]))
+os.chdir(scriptPath)
+
+#append the relative location you want to import from
+sys.path.append("../nettools/")
+import cscofunc
+
+
+class FakeHandler(object):
+    """
+    Netmiko handler replacement, returns prepared output of sh mac address-table
+    """
+
+    def __init__(self, output):
+        self.output = output
+
+    def send_command(self, cmd):
+        ''' Returns prepared output regardless of command '''
+        return self.output
+
+
+def make_sh_mac(nr_macs, nr_vlans, nr_trunks):
+    """
+    Returns synthetic output of sh mac address-table (6500 format), MACs are spread over VLANs, access ports and trunks Po1..Po<nr_trunks>
+    """
+    lines = ["Legend: * - primary entry",
+             "        age - seconds since last seen",
+             "        n/a - not available",
+             "",
+             "  vlan   mac address     type    learn     age              ports",
+             "------+----------------+--------+-----+----------+--------------------------",
+             "     All  0180.c200.0000   static  No          -   Router"]
+    for i in range(nr_macs):
+        vlan = 1 + i % nr_vlans
+        mac = '%012x' % (0x001e00000000 + i)
+        if i % 4 == 0:
+            port = 'Po%d' % (1 + (i // 4) % nr_trunks)
+        else:
+            port = 'Gi%d/%d' % (1 + (i // 48) % 9, 1 + i % 48)
+        lines.append('*%6d  %s.%s.%s   dynamic  Yes        %3d   %s' % (vlan, mac[0:4], mac[4:8], mac[8:12], i % 300, port))
+    return '\n'.join(lines) + '\n'
+
+
+def legacy_get_cli_sh_mac_address_table(handler):
+    '''
+    get_cli_sh_mac_address_table before MacTable (up to three patterns per line, one dict per entry)
+    '''
+    mac_tab = []
+    cli_output = handler.send_command("sh mac address-table")
+    for line in cli_output.split('\n'):
+        intstr = re.match(r"[*]?\s+([0-9]+)\s+([0-9a-f.]+)\s+(dynamic|static)\s+[A-Za-z]+\s+[0-9\-]+\s+([A-Za-z0-9/\-\.]+)", line)
+        if not intstr:
+            intstr = re.match(r"\s?([0-9A-Za-z]+)\s+([0-9a-f.]+)\s+(DYNAMIC|STATIC)\s+([A-Za-z0-9/\-\.]+)", line)
+        if not intstr:
+            intstr = re.match(r"\s?([0-9]+)\s+([0-9a-f.]+)\s+(dynamic|static)\s+[A-Za-z,]+\s+([A-Za-z0-9/\-\.]+)", line)
+        if intstr:
+            mac_tab.append({'vlan':intstr.group(1), 'mac':intstr.group(2), 'type':intstr.group(3), 'int':intstr.group(4)})
+    return mac_tab
+
+
+def legacy_get_vlan_list_trunk(macadrtab, trunk):
+    '''
+    get_vlan_list_trunk before MacTable, macadrtab is dict VLAN : list of entries, every VLAN is scanned
+    '''
+    vlanlist = []
+    for vlan in macadrtab.keys():
+        for item in macadrtab[vlan]:
+            if item['int'] == trunk:
+                vlanlist.append(vlan)
+                break
+    return vlanlist
+
+
+def indexed_mac_address_table(handler):
+    '''
+    cscofunc.get_cli_sh_mac_address_table with indexes built (as after the first lookup)
+    '''
+    table = cscofunc.get_cli_sh_mac_address_table(handler)
+    table.build_indexes()
+    return table
+
+
+def measure(repeat, func, *args):
+    """
+    Returns (best time of one run in seconds, memory allocated by result in bytes, result), memory is measured
+    in extra run (tracing slows the run down)
+    """
+    elapsed = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        run = time.perf_counter() - start
+        elapsed = run if elapsed is None else min(elapsed, run)
+    tracemalloc.start()
+    kept = func(*args)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return (elapsed, size, result)
+
+
+def main():
+    ''' Main
+
+    Compares legacy MAC table parser and trunk VLAN lookup with cscofunc.MacTable on synthetic output, no device is contacted.
+
+    '''
+    usage_str = '''
+    Usage: bench_mac_table.py [OPTIONS]
+    -h,     --help                      display help
+    -m,     --macs                      number of MAC entries, default 100000
+    -v,     --vlans                     number of VLANs, default 500
+    -t,     --trunks                    number of trunks, default 8
+    -r,     --repeat                    number of runs (best is reported), default 5
+    '''
+    nr_macs = 100000
+    nr_vlans = 500
+    nr_trunks = 8
+    repeat = 5
+
+    argv = sys.argv[1:]
+
+    try:
+        opts, args = getopt.getopt(argv, "hm:v:t:r:", ["help", "macs=", "vlans=", "trunks=", "repeat="])
+    except getopt.GetoptError:
+        print(usage_str)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            print(usage_str)
+            sys.exit()
+        elif opt in ("-m", "--macs"):
+            nr_macs = int(arg)
+        elif opt in ("-v", "--vlans"):
+            nr_vlans = int(arg)
+        elif opt in ("-t", "--trunks"):
+            nr_trunks = int(arg)
+        elif opt in ("-r", "--repeat"):
+            repeat = int(arg)
+
+    handler = FakeHandler(make_sh_mac(nr_macs, nr_vlans, nr_trunks))
+    trunks = ['Po%d' % (i + 1) for i in range(nr_trunks)]
+    (t_legacy, m_legacy, r_legacy) = measure(repeat, legacy_get_cli_sh_mac_address_table, handler)
+    (t_current, m_current, r_current) = measure(repeat, cscofunc.get_cli_sh_mac_address_table, handler)
+    (t_indexed, m_indexed, _) = measure(repeat, indexed_mac_address_table, handler)
+    print("sh mac address-table,", nr_macs, "entries")
+    print("  legacy:  %8.2f ms, %8.1f MB" % (t_legacy * 1000, m_legacy / 1e6))
+    print("  current: %8.2f ms, %8.1f MB (without indexes)" % (t_current * 1000, m_current / 1e6))
+    print("  indexed: %8.2f ms, %8.1f MB (parse + build_indexes)" % (t_indexed * 1000, m_indexed / 1e6))
+    print("  identical entries:", r_legacy == list(r_current))
+
+    by_vlan = {}
+    for item in r_legacy:
+        by_vlan.setdefault(item['vlan'], []).append(item)
+    (t_legacy, _, v_legacy) = measure(repeat, lambda: [legacy_get_vlan_list_trunk(by_vlan, trunk) for trunk in trunks])
+    (t_current, _, v_current) = measure(repeat, lambda: [cscofunc.get_vlan_list_trunk(r_current, trunk) for trunk in trunks])
+    print("get_vlan_list_trunk,", nr_trunks, "trunks")
+    print("  legacy:  %8.2f ms" % (t_legacy * 1000))
+    print("  current: %8.2f ms" % (t_current * 1000))
+    print("  identical VLAN lists:", [sorted(v) for v in v_legacy] == [sorted(v) for v in v_current])
+
+    mac = r_legacy[-1]['mac']
+    (t_legacy, _, l_legacy) = measure(repeat, lambda: [item for item in r_legacy if item['mac'] == mac])
+    (t_current, _, l_current) = measure(repeat, r_current.lookup, mac)
+    print("MAC lookup")
+    print("  legacy:  %8.3f ms" % (t_legacy * 1000))
+    print("  current: %8.3f ms" % (t_current * 1000))
+    print("  identical entries:", l_legacy == l_current)
+
+if __name__ == "__main__":
+    main()
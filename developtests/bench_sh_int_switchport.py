@@ -0,0 +1,282 @@
+# pylint: disable=C0301, C0103, E0401, C0413
+
+import sys
+import getopt
+import os
+import re
+import time
+
+scriptPath = os.path.realpath(os.path.dirname(sys.argv[0]))
+os.chdir(scriptPath)
+
+#append the relative location you want to import from
+sys.path.append("../nettools/")
+import cscofunc
+
+IOS_ACCESS = '''Name: {name}
+Switchport: Enabled
+Administrative Mode: static access
+Operational Mode: {oper}
+Administrative Trunking Encapsulation: negotiate
+Operational Trunking Encapsulation: native
+Negotiation of Trunking: Off
+Access Mode VLAN: {vlan} (VLAN{vlan:04d})
+Trunking Native Mode VLAN: 1 (default)
+Administrative Native VLAN tagging: enabled
+Voice VLAN: {voice}
+Administrative private-vlan host-association: none
+Administrative private-vlan mapping: none
+Administrative private-vlan trunk native VLAN: none
+Administrative private-vlan trunk Native VLAN tagging: enabled
+Administrative private-vlan trunk encapsulation: dot1q
+Administrative private-vlan trunk normal VLANs: none
+Administrative private-vlan trunk associations: none
+Administrative private-vlan trunk mappings: none
+Operational private-vlan: none
+Trunking VLANs Enabled: {trunk}
+Pruning VLANs Enabled: 2-1001
+Capture Mode Disabled
+Capture VLANs Allowed: ALL
+
+Protected: false
+Unknown unicast blocked: disabled
+Unknown multicast blocked: disabled
+Appliance trust: none
+
+'''
+
+IOS_TRUNK = '''Name: {name}
+Switchport: Enabled
+Administrative Mode: trunk
+Operational Mode: trunk (member of bundle Po{po})
+Administrative Trunking Encapsulation: dot1q
+Operational Trunking Encapsulation: dot1q
+Negotiation of Trunking: On
+Access Mode VLAN: 1 (default)
+Trunking Native Mode VLAN: 999 (native)
+Administrative Native VLAN tagging: enabled
+Voice VLAN: none
+Administrative private-vlan host-association: none
+Administrative private-vlan mapping: none
+Administrative private-vlan trunk native VLAN: none
+Administrative private-vlan trunk Native VLAN tagging: enabled
+Administrative private-vlan trunk encapsulation: dot1q
+Administrative private-vlan trunk normal VLANs: none
+Administrative private-vlan trunk associations: none
+Administrative private-vlan trunk mappings: none
+Operational private-vlan: none
+Trunking VLANs Enabled: {trunk}
+Pruning VLANs Enabled: 2-1001
+Capture Mode Disabled
+Capture VLANs Allowed: ALL
+
+Protected: false
+Unknown unicast blocked: disabled
+Unknown multicast blocked: disabled
+Appliance trust: none
+
+'''
+
+NXOS_PORT = '''Name: {name}
+  Switchport: Enabled
+  Switchport Monitor: Not enabled
+  Operational Mode: {oper}
+  Access Mode VLAN: {vlan} (VLAN{vlan:04d})
+  Trunking Native Mode VLAN: 1 (default)
+  Trunking VLANs Allowed: {trunk}
+  Voice VLAN: {voice}
+  Extended Trust State : not trusted [COS = 0]
+  Administrative private-vlan primary host-association: none
+  Administrative private-vlan secondary host-association: none
+  Administrative private-vlan primary mapping: none
+  Administrative private-vlan secondary mapping: none
+  Administrative private-vlan trunk native VLAN: none
+  Administrative private-vlan trunk encapsulation: dot1q
+  Administrative private-vlan trunk normal VLANs: none
+  Administrative private-vlan trunk private VLANs: none
+  Operational private-vlan: none
+'''
+
+TRUNK_VLANS = '1,10,20-30,100-110,150,160,170,180,190,200-220,300,310,320,330,340,350,\n     400-420,500,510,520,530,540,550,600-650,700,710,720,730,740,750,800'
+NXOS_TRUNK_VLANS = '1,10,20-30,100-110,150,160,170,180,190,200-220,300,310,320,330,340,350,400\n-420,500,510,520,530,540,550,600-650,700,710,720,730,740,750,800'
+
+
+class FakeHandler(object):
+    """
+    Netmiko handler replacement, returns prepared output of sh interface switchport
+    """
+
+    def __init__(self, output):
+        self.output = output
+
+    def send_command(self, cmd):
+        ''' Returns prepared output regardless of command '''
+        return self.output
+
+
+def make_switchport(nr_ports, trunk_every, access_all, nxos=False):
+    """
+    Returns synthetic output of sh interface switchport (6500 VSS or Nexus), every trunk_every-th port is trunk
+    Access ports have trunking VLANs ALL if access_all is True (real output), otherwise 1-10.
+    """
+    blocks = []
+    for i in range(nr_ports):
+        (chassis, module, port) = (1 + i // (48 * 8), 1 + (i // 48) % 8, 1 + i % 48)
+        trunk = trunk_every and i % trunk_every == 0
+        if nxos:
+            name = 'Ethernet%d/%d' % (module + 8 * (chassis - 1), port)
+            blocks.append(NXOS_PORT.format(name=name, oper='trunk' if trunk else 'access', vlan=1 if trunk else 10 + i % 200,
+                                           trunk=NXOS_TRUNK_VLANS if trunk else ('1-3967' if access_all else '1-10'), voice='none' if trunk else '1%03d' % (i % 200)))
+        else:
+            name = 'Gi%d/%d/%d' % (chassis, module, port)
+            if trunk:
+                blocks.append(IOS_TRUNK.format(name=name, po=1 + i % 64, trunk=TRUNK_VLANS))
+            else:
+                blocks.append(IOS_ACCESS.format(name=name, oper='static access' if i % 3 else 'down', vlan=10 + i % 200,
+                                                trunk='ALL' if access_all else '1-10', voice='none' if i % 2 else '1%03d' % (i % 200)))
+    return ''.join(blocks)
+
+
+def legacy_get_cli_sh_int_switchport(handler):
+    '''
+    get_cli_sh_int_switchport before single-pass parser
+    '''
+    sp_list = []
+    cli_output = handler.send_command("sh interface switchport")
+    for block in cli_output.split('Name: '):
+        intstr = re.search(r"([A-Za-z0-9/.]+)\n", block)
+        if intstr:
+            int_dict = {}
+            int_dict['int'] = cscofunc.conv_int_to_interface_name(intstr.group(1))
+            int_dict['switchport'] = cscofunc.find_regex_value_in_string(block, re.compile(r"Switchport:\s([A-Za-z]+)\n"))
+            int_dict['admin_mode'] = cscofunc.find_regex_value_in_string(block, re.compile(r"Administrative Mode:\s([A-Za-z\s]+)[\n\(]")).rstrip()
+            int_dict['oper_mode'] = cscofunc.find_regex_value_in_string(block, re.compile(r"Operational Mode:\s([A-Za-z\s]+)[\n\(]")).rstrip()
+            int_dict['admin_trunc_enc'] = cscofunc.find_regex_value_in_string(block, re.compile(r"Administrative Trunking Encapsulation:\s([A-Za-z0-9\.]+)\n"))
+            int_dict['trunk_negot'] = cscofunc.find_regex_value_in_string(block, re.compile(r"Negotiation of Trunking:\s([A-Za-z0-9\.]+)\n"))
+            int_dict['access_mode_vlan'] = cscofunc.find_regex_value_in_string(block, re.compile(r"Access Mode VLAN:\s([0-9]+).+\n"))
+            int_dict['trunk_native_mode_vlan'] = cscofunc.find_regex_value_in_string(block, re.compile(r"Trunking Native Mode VLAN:\s([0-9]+).+\n"))
+            int_dict['admin_native_vlan_tagging'] = cscofunc.find_regex_value_in_string(block, re.compile(r"Administrative Native VLAN tagging:\s([A-Za-z0-9\.]+)\n"))
+            int_dict['voice_vlan'] = cscofunc.find_regex_value_in_string(block, re.compile(r"Voice VLAN:\s([A-Za-z0-9]+)\n"))
+            int_dict['bundle_member'] = cscofunc.find_regex_value_in_string(block, re.compile(r"member of bundle\s(Po[0-9]+)\)"))
+            tmps = cscofunc.find_regex_value_in_string(block, re.compile(r"Trunking VLANs Enabled:\s([A-Za-z0-9,\-\s]+)\n"))
+            int_dict['trunk_vlans'] = cscofunc.normalize_vlan_list(cscofunc.process_raw_vlan_list(tmps))
+            sp_list.append(int_dict)
+    return sp_list
+
+
+def legacy_get_cli_sh_int_switchport_nxos(handler):
+    '''
+    get_cli_sh_int_switchport_nxos before single-pass parser
+    '''
+    sp_list = []
+    cli_output = handler.send_command("sh interface switchport")
+    for block in cli_output.split('Name: '):
+        intstr = re.search(r"([A-Za-z0-9/.]+)\n", block)
+        if intstr:
+            int_dict = {}
+            int_dict['int'] = cscofunc.conv_int_to_interface_name(intstr.group(1))
+            int_dict['switchport'] = cscofunc.find_regex_value_in_string(block, re.compile(r"Switchport:\s([A-Za-z]+)\n"))
+            int_dict['oper_mode'] = cscofunc.find_regex_value_in_string(block, re.compile(r"Operational Mode:\s([A-Za-z\s]+)[\n\(]")).rstrip()
+            int_dict['access_mode_vlan'] = cscofunc.find_regex_value_in_string(block, re.compile(r"Access Mode VLAN:\s([0-9]+).+\n"))
+            int_dict['trunk_native_mode_vlan'] = cscofunc.find_regex_value_in_string(block, re.compile(r"Trunking Native Mode VLAN:\s([0-9]+).+\n"))
+            int_dict['voice_vlan'] = cscofunc.find_regex_value_in_string(block, re.compile(r"Voice VLAN:\s([A-Za-z0-9]+)\n"))
+            tmps = cscofunc.find_regex_value_in_string(block, re.compile(r"Trunking VLANs Allowed:\s([A-Za-z0-9,\-\s]+)\n"))
+            int_dict['trunk_vlans'] = cscofunc.normalize_vlan_list(cscofunc.process_raw_vlan_list(tmps))
+            sp_list.append(int_dict)
+    return sp_list
+
+
+def same_output(r_legacy, r_current):
+    """
+    Returns True if parsed interfaces are the same, trunk_vlans list of legacy parser is compared with VlanSet
+    (legacy list of 'ALL' contains also reserved VLANs 4095 and 4096)
+    """
+    if len(r_legacy) != len(r_current):
+        return False
+    for (old, new) in zip(r_legacy, r_current):
+        old = dict(old, trunk_vlans=[vlan for vlan in old['trunk_vlans'] if cscofunc.is_valid_vlan_number(vlan)])
+        new = dict(new, trunk_vlans=[str(vlan) for vlan in new['trunk_vlans']])
+        if old != new:
+            return False
+    return True
+
+
+def trunk_vlans_size(sp_list):
+    """
+    Returns average size of trunk_vlans in bytes (container and its items)
+    """
+    total = 0
+    for int_dict in sp_list:
+        vlans = int_dict['trunk_vlans']
+        if isinstance(vlans, cscofunc.VlanSet):
+            total += sys.getsizeof(vlans) + sys.getsizeof(vlans.bits)
+        else:
+            total += sys.getsizeof(vlans) + sum(sys.getsizeof(vlan) for vlan in vlans)
+    return total // max(len(sp_list), 1)
+
+
+def bench(func, handler, repeat):
+    """
+    Returns (best time of one run in seconds, result)
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(handler)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return (best, result)
+
+
+def main():
+    ''' Main
+
+    Compares legacy sh interface switchport parsers with cscofunc.parse_sh_int_switchport on synthetic outputs, no device is contacted.
+
+    '''
+    usage_str = '''
+    Usage: bench_sh_int_switchport.py [OPTIONS]
+    -h,     --help                      display help
+    -n,     --ports                     number of ports, default 1200 (6500 VSS)
+    -t,     --trunk                     every n-th port is trunk, default 8
+    -a,     --all                       access ports have trunking VLANs ALL (as real output), default 1-10
+    -r,     --repeat                    number of runs (best is reported), default 5
+    '''
+    nr_ports = 1200
+    trunk_every = 8
+    access_all = False
+    repeat = 5
+
+    argv = sys.argv[1:]
+
+    try:
+        opts, args = getopt.getopt(argv, "hn:t:ar:", ["help", "ports=", "trunk=", "all", "repeat="])
+    except getopt.GetoptError:
+        print(usage_str)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            print(usage_str)
+            sys.exit()
+        elif opt in ("-n", "--ports"):
+            nr_ports = int(arg)
+        elif opt in ("-t", "--trunk"):
+            trunk_every = int(arg)
+        elif opt in ("-a", "--all"):
+            access_all = True
+        elif opt in ("-r", "--repeat"):
+            repeat = int(arg)
+
+    for (os_name, nxos, legacy, current) in (('IOS', False, legacy_get_cli_sh_int_switchport, cscofunc.get_cli_sh_int_switchport),
+                                             ('NX-OS', True, legacy_get_cli_sh_int_switchport_nxos, cscofunc.get_cli_sh_int_switchport_nxos)):
+        output = make_switchport(nr_ports, trunk_every, access_all, nxos)
+        handler = FakeHandler(output)
+        (t_legacy, r_legacy) = bench(legacy, handler, repeat)
+        (t_current, r_current) = bench(current, handler, repeat)
+        print(os_name, nr_ports, "ports,", len(output.splitlines()), "lines")
+        print("  legacy:  %8.2f ms, trunk_vlans %6d bytes per port" % (t_legacy * 1000, trunk_vlans_size(r_legacy)))
+        print("  current: %8.2f ms, trunk_vlans %6d bytes per port" % (t_current * 1000, trunk_vlans_size(r_current)))
+        print("  speedup: %.1fx, identical output: %s" % (t_legacy / t_current, same_output(r_legacy, r_current)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# pylint: disable=C0301, C0103, E0401, C0413
+
+import sys
+import getopt
+import os
+import re
+import time
+
+scriptPath = os.path.realpath(os.path.dirname(sys.argv[0]))
+os.chdir(scriptPath)
+
+#append the relative location you want to import from
+sys.path.append("../nettools/")
+import cscofunc
+
+PORTS_PER_LINE = 4          # IOS and NX-OS wrap port list after column 80
+
+
+class FakeHandler(object):
+    """
+    Netmiko handler replacement, returns prepared output of sh vlan
+    """
+
+    def __init__(self, output):
+        self.output = output
+
+    def send_command(self, cmd):
+        ''' Returns prepared output regardless of command '''
+        return self.output
+
+
+def make_sh_vlan(nr_vlans, ports_per_vlan, nxos=False):
+    """
+    Returns synthetic output of sh vlan with nr_vlans VLANs, each VLAN has ports_per_vlan access ports (wrapped into more lines)
+
+    :return (output, expected): output and dict VLAN number : list of ports
+    """
+    lines = ["", "VLAN Name                             Status    Ports",
+             "---- -------------------------------- --------- -------------------------------"]
+    expected = {}
+    intf = 'Eth' if nxos else 'Gi'
+    for vlan in range(1, nr_vlans + 1):
+        ports = [intf + '%d/%d' % (1 + (vlan * ports_per_vlan + i) // 48, 1 + (vlan * ports_per_vlan + i) % 48) for i in range(ports_per_vlan)]
+        expected[str(vlan)] = ports
+        name = 'default' if vlan == 1 else 'vlan%d' % vlan
+        chunks = [ports[i:i+PORTS_PER_LINE] for i in range(0, len(ports), PORTS_PER_LINE)] or [[]]
+        sep = ', '
+        tail = ',' if nxos else ''          # NX-OS ends wrapped line by comma
+        lines.append('%-4d %-32s %-9s %s' % (vlan, name, 'active', sep.join(chunks[0]) + (tail if len(chunks) > 1 else '')))
+        for k, chunk in enumerate(chunks[1:]):
+            lines.append(' ' * 48 + sep.join(chunk) + (tail if k < len(chunks) - 2 else ''))
+    lines.append('')
+    if nxos:
+        lines.extend(["VLAN Type         Vlan-mode", "---- -----        ----------"])
+        lines.extend(['%-4d enet         CE' % vlan for vlan in range(1, nr_vlans + 1)])
+    else:
+        lines.extend(["VLAN Type  SAID       MTU   Parent RingNo BridgeNo Stp  BrdgMode Trans1 Trans2",
+                      "---- ----- ---------- ----- ------ ------ -------- ---- -------- ------ ------"])
+        lines.extend(['%-4d enet  %-10d 1500  -      -      -        -    -        0      0' % (vlan, 100000 + vlan) for vlan in range(1, nr_vlans + 1)])
+    return ('\n'.join(lines) + '\n', expected)
+
+
+def legacy_get_cli_sh_vlan(handler):
+    '''
+    get_cli_sh_vlan before single-pass parser (regex compiled on each line, wrapped ports are lost)
+    '''
+    vlan_list = []
+    cli_output = handler.send_command("sh vlan")
+    for line in cli_output.split('\n'):
+        intstr = re.match(r"([0-9]+)\s+([A-Za-z0-9_\-/\.]+)\s+([a-z]+)(\s+(.*))?$", line)
+        if intstr:
+            acc_vlan = intstr.group(5)
+            if acc_vlan:
+                intlist = acc_vlan.replace(' ', '').split(",")
+            else:
+                intlist = []
+            vlan_list.append({'number':intstr.group(1), 'name':intstr.group(2), 'status':intstr.group(3), 'acc_int':intlist})
+    return vlan_list
+
+
+def legacy_get_cli_sh_vlan_nxos(handler):
+    '''
+    get_cli_sh_vlan_nxos before single-pass parser
+    '''
+    vlan_list = []
+    cli_output = handler.send_command("sh vlan")
+    for line in cli_output.split('\n'):
+        intstr = re.match(r"([0-9]+)\s+([A-Za-z0-9_\-]+)\s+([a-z]+)(\s+(.*))?$", line)
+        if intstr:
+            acc_vlan = intstr.group(5)
+            if acc_vlan:
+                intlist = acc_vlan.replace(' ', '').split(",")
+            else:
+                intlist = []
+            vlan_list.append({'number':intstr.group(1), 'name':intstr.group(2), 'status':intstr.group(3), 'acc_int':intlist})
+    return vlan_list
+
+
+def count_missing(vlan_list, expected):
+    """
+    Returns number of ports which are in expected but not in parsed VLAN table
+    """
+    parsed = {entry['number']: set(entry['acc_int']) for entry in vlan_list}
+    return sum(len(set(ports) - parsed.get(vlan, set())) for vlan, ports in expected.items())
+
+
+def bench(func, handler, repeat):
+    """
+    Returns (best time of one run in seconds, result)
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(handler)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return (best, result)
+
+
+def main():
+    ''' Main
+
+    Compares legacy sh vlan parsers with cscofunc.parse_sh_vlan on synthetic outputs, no device is contacted.
+
+    '''
+    usage_str = '''
+    Usage: bench_sh_vlan.py [OPTIONS]
+    -h,     --help                      display help
+    -v,     --vlans                     number of VLANs, default 4000
+    -p,     --ports                     number of access ports per VLAN, default 6
+    -r,     --repeat                    number of runs (best is reported), default 10
+    '''
+    nr_vlans = 4000
+    ports_per_vlan = 6
+    repeat = 10
+
+    argv = sys.argv[1:]
+
+    try:
+        opts, args = getopt.getopt(argv, "hv:p:r:", ["help", "vlans=", "ports=", "repeat="])
+    except getopt.GetoptError:
+        print(usage_str)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            print(usage_str)
+            sys.exit()
+        elif opt in ("-v", "--vlans"):
+            nr_vlans = int(arg)
+        elif opt in ("-p", "--ports"):
+            ports_per_vlan = int(arg)
+        elif opt in ("-r", "--repeat"):
+            repeat = int(arg)
+
+    for (os_name, nxos, legacy, current) in (('IOS', False, legacy_get_cli_sh_vlan, cscofunc.get_cli_sh_vlan),
+                                             ('NX-OS', True, legacy_get_cli_sh_vlan_nxos, cscofunc.get_cli_sh_vlan_nxos)):
+        (output, expected) = make_sh_vlan(nr_vlans, ports_per_vlan, nxos)
+        handler = FakeHandler(output)
+        (t_legacy, r_legacy) = bench(legacy, handler, repeat)
+        (t_current, r_current) = bench(current, handler, repeat)
+        print(os_name, nr_vlans, "VLANs,", len(output.splitlines()), "lines")
+        print("  legacy:  %8.2f ms, VLANs %d, missing ports %d" % (t_legacy * 1000, len(r_legacy), count_missing(r_legacy, expected)))
+        print("  current: %8.2f ms, VLANs %d, missing ports %d" % (t_current * 1000, len(r_current), count_missing(r_current, expected)))
+        print("  speedup: %.1fx" % (t_legacy / t_current))
+
+if __name__ == "__main__":
+    main()
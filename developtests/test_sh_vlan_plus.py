@@ -0,0 +1,238 @@
+# pylint: disable=C0301, C0103, E0401, C0413
+
+import sys
+import getpass
+import getopt
+import os
+import re
+import time
+from netmiko import ConnectHandler
+
+scriptPath = os.path.realpath(os.path.dirname(sys.argv[0]))
+os.chdir(scriptPath)
+
+#append the relative location you want to import from
+sys.path.append("../nettools/")
+import cscofunc
+
+PORTS_PER_LINE = 4          # IOS and NX-OS wrap port list after column 80
+NO_WRAP = 10000             # ports per line of outputs which per VLAN method parses completely
+
+
+class FakeHandler(object):
+    """
+    Netmiko handler replacement, returns prepared outputs of commands and counts sent commands
+    """
+
+    def __init__(self, outputs):
+        self.outputs = outputs
+        self.commands = 0
+
+    def send_command(self, cmd):
+        ''' Returns prepared output of the command '''
+        self.commands += 1
+        return self.outputs.get(cmd, '')
+
+
+def format_vlan_line(vlan, name, ports, nxos, ports_per_line=PORTS_PER_LINE):
+    """
+    Returns lines of one VLAN in sh vlan table, port list is wrapped after ports_per_line ports
+    """
+    chunks = [ports[i:i+ports_per_line] for i in range(0, len(ports), ports_per_line)] or [[]]
+    tail = ',' if nxos else ''
+    lines = ['%-4d %-32s %-9s %s' % (vlan, name, 'active', ', '.join(chunks[0]) + (tail if len(chunks) > 1 else ''))]
+    for k, chunk in enumerate(chunks[1:]):
+        lines.append(' ' * 48 + ', '.join(chunk) + (tail if k < len(chunks) - 2 else ''))
+    return lines
+
+
+def make_outputs(nr_vlans, nxos, ports_per_line=PORTS_PER_LINE):
+    """
+    Returns dict command : output of synthetic switch with nr_vlans VLANs, access ports and two trunks
+    (uplink trunk forwards all VLANs, second trunk only even VLANs, VLAN 5 is pruned on both),
+    port lists in sh vlan and sh vlan id are wrapped after ports_per_line ports
+    """
+    intf = 'Eth' if nxos else 'Gi'
+    trunks = [intf + '1/49', 'Po1']
+    forwarding = {trunks[0]: [vlan for vlan in range(1, nr_vlans + 1) if vlan != 5],
+                  trunks[1]: [vlan for vlan in range(2, nr_vlans + 1, 2) if vlan != 5]}
+    header = ["", "VLAN Name                             Status    Ports",
+              "---- -------------------------------- --------- -------------------------------"]
+    outputs = {}
+    sh_vlan = list(header)
+    for vlan in range(1, nr_vlans + 1):
+        name = 'default' if vlan == 1 else 'vlan%d' % vlan
+        acc_int = [intf + '%d/%d' % (1 + (vlan * 6 + i) // 48, 1 + (vlan * 6 + i) % 48) for i in range(vlan % 6)]
+        trunk_ports = [port for port in trunks if vlan in forwarding[port]]
+        if nxos:            # NX-OS lists trunks in sh vlan too
+            acc_int = acc_int + trunk_ports
+        sh_vlan.extend(format_vlan_line(vlan, name, acc_int, nxos, ports_per_line))
+        ports = acc_int + [port for port in trunk_ports if port not in acc_int]
+        outputs['sh vlan id %d' % vlan] = '\n'.join(header + format_vlan_line(vlan, name, ports, nxos, ports_per_line)) + '\n'
+    outputs['sh vlan'] = '\n'.join(sh_vlan) + '\n'
+    trunk = ["", "Port        Mode             Encapsulation  Status        Native vlan"]
+    trunk.extend('%-11s on               802.1q         trunking      1' % port for port in trunks)
+    forwarding_title = "STP Forwarding" if nxos else "Vlans in spanning tree forwarding state and not pruned"
+    for title in ("Vlans allowed on trunk", "Vlans allowed and active in management domain", forwarding_title):
+        trunk.extend(["", "Port        " + title])
+        for port in trunks:
+            if title == forwarding_title:
+                vlans = str(cscofunc.VlanSet(forwarding[port]))
+            else:
+                vlans = '1-%d' % nr_vlans
+            items = vlans.split(',')
+            chunks = [','.join(items[i:i+10]) for i in range(0, len(items), 10)]      # wrapped VLAN list, line ends by comma
+            trunk.append('%-11s %s' % (port, ',\n            '.join(chunks)))
+    outputs['sh interface trunk'] = '\n'.join(trunk) + '\n'
+    return outputs
+
+
+def per_vlan_sh_vlan_id_int_list(handler, vlannr):
+    '''
+    get_cli_sh_vlan_id_int_list before parse_sh_vlan (only the first line of the VLAN is read)
+    '''
+    cli_param = "sh vlan id " + vlannr
+    cli_output = handler.send_command(cli_param)
+    cli_out_split = cli_output.split('\n')      # split output into lines
+    for line in cli_out_split:
+        # 10   vlan10                           active    Eth2/3, Eth2/4, Eth2/5
+        intstr = re.match(r"([0-9]+)\s+([A-Za-z0-9_\-]+)\s+([a-z]+)(\s+(.*))?$", line)
+        if intstr:
+            intf = intstr.group(5)
+            if intf:
+                intf = intf.replace(' ', '')         # delete spaces
+                intlist = intf.split(",")       # interfaces list
+            else:
+                intlist = []
+            return intlist          # return after first match
+
+
+def per_vlan_sh_vlan_plus(handler):
+    '''
+    get_cli_sh_vlan_plus before sh interface trunk, sh vlan id is sent for every VLAN
+    '''
+    vlan_list = []
+    cli_param = "sh vlan"
+    cli_output = handler.send_command(cli_param)
+    cli_out_split = cli_output.split('\n')      # split output into lines
+    for line in cli_out_split:
+        # 10   vlan10                           active    Eth2/3, Eth2/4, Eth2/5
+        intstr = re.match(r"([0-9]+)\s+([A-Za-z0-9_\-]+)\s+([a-z]+)(\s+(.*))?$", line)
+        if intstr:
+            acc_vlan = intstr.group(5)
+            if acc_vlan:
+                acc_vlan = acc_vlan.replace(' ', '')         # delete spaces
+                intlist = acc_vlan.split(",")       # list VLANs
+            else:
+                intlist = []
+            intlist2 = per_vlan_sh_vlan_id_int_list(handler, intstr.group(1))    # obtain list of interfaces where VLAN is active
+            vlan_entry = {'number':intstr.group(1), 'name':intstr.group(2), 'status':intstr.group(3), 'acc_int':intlist, 'ports':intlist2}
+            vlan_list.append(vlan_entry)
+    return vlan_list
+
+
+def compare(handler_ref, handler_cur, exact=True):
+    """
+    Runs both methods, prints differences and returns True if results are the same (order of ports is not compared).
+    Per VLAN method loses ports on wrapped lines, with exact False its ports and access ports (without empty item
+    after trailing comma) have to be subset of the current ones.
+    """
+    start = time.perf_counter()
+    reference = per_vlan_sh_vlan_plus(handler_ref)
+    t_reference = time.perf_counter() - start
+    start = time.perf_counter()
+    current = cscofunc.get_cli_sh_vlan_plus(handler_cur)
+    t_current = time.perf_counter() - start
+    same = len(reference) == len(current)
+    lost = 0
+    for (ref, cur) in zip(reference, current):
+        ref_ports = set(ref['ports'] or []) - {''}
+        ref_acc_int = [port for port in ref['acc_int'] if port]
+        if exact:
+            differs = ref['acc_int'] != cur['acc_int'] or ref_ports != set(cur['ports'])
+        else:
+            differs = ref_acc_int != cur['acc_int'][:len(ref_acc_int)] or not ref_ports <= set(cur['ports'])
+            lost += len(cur['ports']) - len(ref_ports)
+        if ref['number'] != cur['number'] or differs:
+            same = False
+            print("  VLAN", ref['number'], "differs")
+            print("    per VLAN:", ref['ports'])
+            print("    current: ", cur['ports'])
+    print("  per VLAN: %8.2f s, %d commands" % (t_reference, getattr(handler_ref, 'commands', len(reference) + 1)))
+    print("  current:  %8.2f s, %d commands" % (t_current, getattr(handler_cur, 'commands', 2)))
+    if not exact:
+        print("  ports on wrapped lines missed by per VLAN method:", lost)
+    print("  same result:" if exact else "  per VLAN result included:", same)
+    return same
+
+
+def main():
+    ''' Main
+
+    Regression test of cscofunc.get_cli_sh_vlan_plus, result is compared with per VLAN method (sh vlan id) of the
+    original get_cli_sh_vlan_plus. Synthetic outputs (IOS and NX-OS) are used if IP address is not specified:
+    without wrapped port lists the results have to be the same, with wrapped lists the original result has to be included.
+
+    '''
+    usage_str = '''
+    Usage: test_sh_vlan_plus.py [OPTIONS]
+    -h,     --help                      display help
+    -v,     --vlans                     number of VLANs of synthetic switch, default 1500
+    -i,     --ipaddr                    IP address of the switch, optional
+    -u,     --username                  username
+    -p,     --password                  password, optional
+    -n,     --nxos                      the switch is NX-OS
+    '''
+    nr_vlans = 1500
+    ip_of_switch = ''
+    username = ''
+    pswd = ''
+    nxos = False
+
+    argv = sys.argv[1:]
+
+    try:
+        opts, args = getopt.getopt(argv, "hv:i:u:p:n", ["help", "vlans=", "ipaddr=", "username=", "password=", "nxos"])
+    except getopt.GetoptError:
+        print(usage_str)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            print(usage_str)
+            sys.exit()
+        elif opt in ("-v", "--vlans"):
+            nr_vlans = int(arg)
+        elif opt in ("-i", "--ipaddr"):
+            ip_of_switch = arg
+        elif opt in ("-u", "--username"):
+            username = arg
+        elif opt in ("-p", "--password"):
+            pswd = arg
+        elif opt in ("-n", "--nxos"):
+            nxos = True
+
+    if not ip_of_switch:
+        result = True
+        for (os_name, is_nxos) in (('IOS', False), ('NX-OS', True)):
+            for (ports_per_line, exact) in ((NO_WRAP, True), (PORTS_PER_LINE, False)):
+                outputs = make_outputs(nr_vlans, is_nxos, ports_per_line)
+                print(os_name, nr_vlans, "VLANs,", "port lists not wrapped" if exact else "port lists wrapped")
+                result = compare(FakeHandler(outputs), FakeHandler(outputs), exact) and result
+        sys.exit(0 if result else 1)
+
+    if not cscofunc.is_ip_valid(ip_of_switch):
+        print("Invalid IP address")
+        sys.exit(2)
+    if not username:
+        print("Username is not specified")
+        sys.exit(2)
+    if pswd == '':
+        pswd = getpass.getpass('Password:')
+    print("\nProcessing device:", ip_of_switch)
+    net_connect = ConnectHandler(device_type=cscofunc.get_netmiko_device_type('NX-OS' if nxos else 'IOS'), ip=ip_of_switch, username=username, password=pswd)
+    result = compare(net_connect, net_connect, False)     # device may wrap port lists
+    net_connect.disconnect()
+    sys.exit(0 if result else 1)
+
+if __name__ == "__main__":
+    main()
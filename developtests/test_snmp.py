@@ -0,0 +1,70 @@
+# pylint: disable=C0301, C0103, E0401, C0413
+
+import sys
+import getopt
+import os
+
+scriptPath = os.path.realpath(os.path.dirname(sys.argv[0]))
+os.chdir(scriptPath)
+
+#append the relative location you want to import from
+sys.path.append("../nettools/")
+import snmpfunc
+
+
+def main():
+    ''' Main
+
+    Reads device info, CDP and MAC address table by SNMP. Data of simulated switch are in snmpsim directory,
+    the simulator can be started by: snmpsimd.py --data-dir=snmpsim --agent-udpv4-endpoint=127.0.0.1:1161
+    and the script by: test_snmp.py -i 127.0.0.1 -p 1161 -c switch1
+
+    '''
+    usage_str = '''
+    Usage: test_snmp.py [OPTIONS]
+    -h,     --help                      display help
+    -i,     --ipaddr                    IP address of the switch
+    -c,     --community                 SNMP community
+    -p,     --port                      UDP port, default 161
+    '''
+    ip_of_switch = ''
+    community = ''
+    port = snmpfunc.DEFAULT_SNMP_PORT
+
+    argv = sys.argv[1:]
+
+    try:
+        opts, args = getopt.getopt(argv, "hi:c:p:", ["help", "ipaddr=", "community=", "port="])
+    except getopt.GetoptError:
+        print(usage_str)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            print(usage_str)
+            sys.exit()
+        elif opt in ("-i", "--ipaddr"):
+            ip_of_switch = arg
+        elif opt in ("-c", "--community"):
+            community = arg
+        elif opt in ("-p", "--port"):
+            port = int(arg)
+
+    if not ip_of_switch or not community:
+        print(usage_str)
+        sys.exit(2)
+    if not snmpfunc.is_snmp_available():
+        print("pysnmp is not installed")
+        sys.exit(1)
+
+    print(snmpfunc.get_snmp_device_info(ip_of_switch, community, port))
+    cdp_list = snmpfunc.get_snmp_cdp_neighbor(ip_of_switch, community, port)
+    if cdp_list is None:
+        print("Device doesn't respond")
+        sys.exit(1)
+    for item in cdp_list:
+        print(item)
+    for item in snmpfunc.get_snmp_mac_address_table(ip_of_switch, community, port):
+        print(item)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# pylint: disable=C0301, C0103, E0401, C0413
+
+import sys
+import os
+
+scriptPath = os.path.realpath(os.path.dirname(sys.argv[0]))
+os.chdir(scriptPath)
+
+#append the relative location you want to import from
+sys.path.append("../nettools/")
+import cscofunc
+import portmigr
+
+MAPPING = [{'old_vlan': 20, 'new_vlan': 30}]
+
+
+def make_element(vlans, native_vlan, sw_mode='trunk'):
+    """
+    Returns port entry of portmigr list_from_file after func_add_items_to_port_list
+    """
+    return {'noerror': True, 'warning': None, 'sw_mode': sw_mode, 'vlan_list': cscofunc.VlanSet(vlans), 'native_vlan': native_vlan}
+
+
+def check(name, element, mapping_list, vlans, native_vlan, warnings):
+    """
+    Runs func_change_mapped_vlans on one entry, returns True if VLANs, native VLAN and number of warnings are expected
+    """
+    portmigr.func_change_mapped_vlans([element], mapping_list)
+    result = (str(element['vlan_list']) == vlans and str(element['native_vlan']) == native_vlan
+              and len(element['warning'] or []) == warnings)
+    print("%-40s %s  vlan_list %s, native %s, warning %s" % (name, "OK  " if result else "FAIL", element['vlan_list'], element['native_vlan'], element['warning']))
+    return result
+
+
+def main():
+    ''' Main
+
+    Checks portmigr.func_change_mapped_vlans, VLANs outside of the mapping (and all VLANs without mapping) are not changed.
+    No device is contacted.
+
+    '''
+    result = True
+    result = check("no mapping, 400/405 kept", make_element('10,400,405', '400'), None, '10,400,405', '400', 0) and result
+    result = check("empty mapping", make_element('10,400,405', '400'), [], '10,400,405', '400', 0) and result
+    result = check("mapping, vlans outside kept", make_element('10,400', '400'), MAPPING, '10,400', '400', 0) and result
+    result = check("mapping, access vlan outside kept", make_element('400', '1', 'static access'), MAPPING, '400', '1', 0) and result
+    result = check("mapping, allowed and native changed", make_element('10,20,400', '20'), MAPPING, '10,30,400', '30', 2) and result
+    result = check("mapping, native of access not changed", make_element('20', '20', 'static access'), MAPPING, '30', '20', 1) and result
+    sys.exit(0 if result else 1)
+
+if __name__ == "__main__":
+    main()
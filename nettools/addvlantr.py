@@ -5,9 +5,6 @@ import getpass
 import getopt
 import os
 from time import sleep
-from netmiko import ConnectHandler
-from netmiko.ssh_exception import NetMikoTimeoutException
-from paramiko.ssh_exception import SSHException
 
 
 import cscofunc
@@ -154,20 +151,16 @@ def main():
         print("Script is running in process mode. Devices Configuration WILL BE CHANGED !!!")
         sleep(5)
 
+    platform_cache = cscofunc.open_platform_cache()     # platform of devices contacted by any tool (if the file exists), switch check is done only once per device
     for switch in device_ip_list:           # go through all switches
         config_was_changed = False
         int_trunk_list = []
         nr_iface_configured = 0             # counter for number of interfaces affected on this switch
         print("\nProcessing device:", switch)
-        try:
-            net_connect = ConnectHandler(device_type='cisco_ios', ip=switch, username=username, password=pswd)
-        except NetMikoTimeoutException:
-            print("- unable to connect to the device, timeout")
-            continue
-        except (EOFError, SSHException):
-            print("- unable to connect to the device, error")
+        (net_connect, platform) = cscofunc.open_platform_session(switch, username, pswd, platform_cache)
+        if not net_connect:
             continue
-        if not cscofunc.is_it_switch(net_connect):
+        if not cscofunc.is_it_switch(net_connect, platform, platform_cache):
             print("- device is probably not a switch")
             continue
         if not cscofunc.is_vlan_configured(net_connect, vlan_new):      # check if new vlan is configured on the switch
@@ -224,6 +217,8 @@ def main():
             print("- configuration was written to startup config")
 
         net_connect.disconnect()        # disconnect from the switch
+    if platform_cache:
+        platform_cache.close()
 
 if __name__ == "__main__":
     main()
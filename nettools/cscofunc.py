@@ -5,10 +5,15 @@
 # pylint: disable=C0301, C0103
 
 import sys
+import os
 import re
 import requests
 import json
 import ipaddress
+import array
+import functools
+import sqlite3
+import threading
 from netmiko import ConnectHandler
 from netmiko.ssh_exception import NetMikoTimeoutException
 from paramiko.ssh_exception import SSHException
@@ -17,6 +22,127 @@ requests.packages.urllib3.disable_warnings()
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
+DEFAULT_PLATFORM_CACHE = os.path.join(os.path.expanduser('~'), '.nettools-platform.db')
+NETMIKO_DEVICE_TYPES = {'IOS': 'cisco_ios', 'IOS-XE': 'cisco_ios', 'NX-OS': 'cisco_nxos'}
+
+
+class PlatformCache(object):
+    """
+    Persistent per-device platform information (os_type, platform, version, switch capability) saved in SQLite file,
+    key is IP address of the device. It is filled once from get_device_info, so the tools send the proper command
+    variant first and they don't probe the device by commands which may fail.
+    Entries can be used by several threads.
+    """
+
+    def __init__(self, filename=DEFAULT_PLATFORM_CACHE):
+        """
+        :param filename: SQLite file, it is created if it doesn't exist
+        """
+        self.lock = threading.Lock()
+        self.filename = filename
+        self.read_only = False      # set after failed write, entries are only read then
+        self.conn = sqlite3.connect(filename, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS platforms (ip_addr TEXT PRIMARY KEY, device_id TEXT, os_type TEXT, platform_id TEXT, version TEXT, is_switch INTEGER)")
+        self.conn.commit()
+
+    def get(self, ip_addr):
+        """
+        Returns platform of the device
+
+        :param ip_addr: IP address of the device
+        :return platform: dict with ip_addr, device_id, os_type, platform_id, version, is_switch (None if not known), None if device is not known
+            or the file can't be read
+        """
+        with self.lock:
+            try:
+                row = self.conn.execute("SELECT device_id, os_type, platform_id, version, is_switch FROM platforms WHERE ip_addr = ?", (ip_addr,)).fetchone()
+            except sqlite3.Error:
+                return None
+        if not row:
+            return None
+        return {'ip_addr': ip_addr, 'device_id': row[0], 'os_type': row[1], 'platform_id': row[2], 'version': row[3],
+                'is_switch': None if row[4] is None else bool(row[4])}
+
+    def put(self, platform):
+        """
+        Saves platform of the device, is_switch already saved is kept if it is not known in platform.
+        If the file can't be written (i.e. read-only), error is printed once and next entries are not saved.
+
+        :param platform: dict with structure returned by get_device_info (is_switch is optional)
+        """
+        is_switch = platform.get('is_switch')
+        with self.lock:
+            if self.read_only:
+                return
+            try:
+                self.conn.execute("INSERT INTO platforms (ip_addr, device_id, os_type, platform_id, version, is_switch) VALUES (?, ?, ?, ?, ?, ?) "
+                                  "ON CONFLICT(ip_addr) DO UPDATE SET device_id = excluded.device_id, os_type = excluded.os_type, platform_id = excluded.platform_id, "
+                                  "version = excluded.version, is_switch = COALESCE(excluded.is_switch, is_switch)",
+                                  (platform['ip_addr'], platform.get('device_id', ''), platform['os_type'], platform.get('platform_id', ''), platform.get('version', ''),
+                                   None if is_switch is None else int(is_switch)))
+                self.conn.commit()
+            except sqlite3.Error as err:
+                self.read_only = True
+                print("Platforms are not saved into", self.filename, ":", err)
+
+    def close(self):
+        """
+        Closes the file
+        """
+        self.conn.close()
+
+
+def open_platform_cache(filename=DEFAULT_PLATFORM_CACHE, create=False):
+    """
+    Opens platform cache for tools which can work without it, the file is created only if create is True
+    (file specified by option). Devices are identified on first contact if None is returned.
+
+    :param filename: SQLite file
+    :param create: True if the file is created when it doesn't exist
+    :return platform_cache: PlatformCache or None if the file doesn't exist or it can't be opened
+    """
+    if not create and not os.path.isfile(filename):
+        return None
+    try:
+        return PlatformCache(filename)
+    except sqlite3.Error as err:
+        print("Platform cache", filename, "is not used:", err)
+        return None
+
+
+def get_netmiko_device_type(os_type):
+    ''' Returns Netmiko device_type for os_type (see get_device_info), cisco_ios if OS is not known
+
+    '''
+    return NETMIKO_DEVICE_TYPES.get(os_type, 'cisco_ios')
+
+def open_platform_session(ip_addr, username, pswd, platform_cache=None):
+    """
+    Opens SSH session with Netmiko device_type of the device. Platform of the device which is not in platform_cache
+    is read (see get_cli_device_info) and saved into it, so next sessions to the device know the platform without any command.
+
+    :param ip_addr: IP address of the device
+    :param username: for connection
+    :param pswd: password
+    :param platform_cache: PlatformCache or None
+    :return (net_connect, platform): Netmiko handler and platform (see PlatformCache.get), (None, None) if unable to connect,
+            platform is None if it is not known (OS not recognized)
+    """
+    platform = platform_cache.get(ip_addr) if platform_cache else None
+    try:
+        net_connect = ConnectHandler(device_type=get_netmiko_device_type(platform['os_type'] if platform else ''), ip=ip_addr, username=username, password=pswd)
+    except NetMikoTimeoutException:
+        print("- unable to connect to the device", ip_addr, ", timeout")
+        return (None, None)
+    except (EOFError, SSHException):
+        print("- unable to connect to the device", ip_addr, ", error")
+        return (None, None)
+    if platform is None:
+        platform = get_cli_device_info(net_connect, ip_addr)
+        if platform and platform_cache:
+            platform_cache.put(platform)
+    return (net_connect, platform)
+
 
 def get_intlist_vlan(handler, vlan):
     ''' Returns list of all (both access andf trunks) interfaces where VLAN 'vlan' is configured
@@ -58,6 +184,135 @@ def is_int_allowed_vlan_configured(handler, iface):
         return True
     return False
 
+VLAN_BITMAP_SIZE = 4096         # VLAN IDs 0-4095, one bit per VLAN
+VLAN_ALL = '1-4094'             # 'ALL' in trunk allowed list, 0 and 4095 are reserved
+
+
+class VlanSet(object):
+    """
+    Set of VLAN numbers stored as 4096-bit bitmap (bit n is VLAN n), trunk with all VLANs allowed takes
+    about 512 bytes instead of list of 4094 strings. Set operations are done on whole bitmap at once.
+    Iteration returns VLAN numbers as int in ascending order, str() returns ranges, i.e. '1,10,20-30'.
+    """
+    __slots__ = ('bits',)
+
+    def __init__(self, vlans=None):
+        ''' vlans is None, string from show command (i.e. '1,5-8', 'ALL', 'none') or iterable of VLAN numbers '''
+        self.bits = 0
+        if vlans is None:
+            return
+        if isinstance(vlans, str):
+            self.bits = VlanSet.parse(vlans)
+        else:
+            for vlan in vlans:
+                self.add(vlan)
+
+    @staticmethod
+    def parse(rawlist):
+        '''
+        Returns bitmap of VLANs in raw list from show command, i.e. 4,10,555-560,\n 704, ALL is 1-4094,
+        words (none, NONE) are ignored
+
+        :param rawlist: string with VLAN numbers and ranges separated by commas
+        :return bits: int bitmap
+        '''
+        bits = 0
+        rawlist = rawlist.replace('ALL', VLAN_ALL).replace('\n', '').replace(' ', '')
+        for item in rawlist.split(','):
+            (first, sep, last) = item.partition('-')
+            if not first.isdigit():
+                continue
+            first = int(first)
+            last = int(last) if sep and last.isdigit() else first
+            if first > last or last >= VLAN_BITMAP_SIZE:
+                continue
+            bits |= ((1 << (last - first + 1)) - 1) << first        # set bits first..last
+        return bits
+
+    @classmethod
+    def from_bits(cls, bits):
+        ''' Returns VlanSet with bitmap bits '''
+        vset = cls()
+        vset.bits = bits & ((1 << VLAN_BITMAP_SIZE) - 1)
+        return vset
+
+    def add(self, vlan):
+        ''' Adds VLAN (int or string) into set '''
+        vlan = int(vlan)
+        if 0 <= vlan < VLAN_BITMAP_SIZE:
+            self.bits |= 1 << vlan
+
+    def discard(self, vlan):
+        ''' Removes VLAN (int or string) from set if it is present '''
+        vlan = int(vlan)
+        if 0 <= vlan < VLAN_BITMAP_SIZE:
+            self.bits &= ~(1 << vlan)
+
+    def union(self, other):
+        ''' Returns VLANs in this or other set '''
+        return VlanSet.from_bits(self.bits | other.bits)
+
+    def intersection(self, other):
+        ''' Returns VLANs in both sets '''
+        return VlanSet.from_bits(self.bits & other.bits)
+
+    def difference(self, other):
+        ''' Returns VLANs in this set which are not in other set '''
+        return VlanSet.from_bits(self.bits & ~other.bits)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    def __contains__(self, vlan):
+        try:
+            vlan = int(vlan)
+        except (TypeError, ValueError):
+            return False
+        return 0 <= vlan < VLAN_BITMAP_SIZE and (self.bits >> vlan) & 1 == 1
+
+    def __iter__(self):
+        bits = self.bits
+        while bits:
+            low = bits & -bits          # lowest set bit
+            yield low.bit_length() - 1
+            bits ^= low
+
+    def __len__(self):
+        return bin(self.bits).count('1')
+
+    def __bool__(self):
+        return self.bits != 0
+
+    def __eq__(self, other):
+        return isinstance(other, VlanSet) and self.bits == other.bits
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def ranges(self):
+        '''
+        Returns list of (first, last) VLAN ranges in ascending order
+        '''
+        ranges = []
+        bits = self.bits
+        while bits:
+            first = (bits & -bits).bit_length() - 1
+            run = ~(bits >> first) & ((bits >> first) + 1)       # lowest zero bit above the run of ones
+            last = first + run.bit_length() - 2
+            ranges.append((first, last))
+            bits &= ~(((1 << (last - first + 1)) - 1) << first)
+        return ranges
+
+    def __str__(self):
+        return ','.join(str(first) if first == last else '%d-%d' % (first, last) for (first, last) in self.ranges())
+
+    def __repr__(self):
+        return "VlanSet('" + str(self) + "')"
+
+
 def normalize_vlan_list(vlset):
     ''' Returns list of VLAN numbers. In vlset changes VLAN ranges (i.e 2345-2348) into list of VLANs
     contained in range (2345,2346,2347,2348)
@@ -75,7 +330,7 @@ def normalize_vlan_list(vlset):
 
 
 def list_trunking_vlans_enabled(handler, iface):
-    ''' Returns list of trunking vlans enabled on specific interface
+    ''' Returns VlanSet of trunking vlans enabled on specific interface (empty VlanSet if line is not found)
 
     '''
     cli_param = "sh int " + iface + " switchport"
@@ -84,25 +339,28 @@ def list_trunking_vlans_enabled(handler, iface):
     if not intstr:
         intstr = re.search(r"Trunking VLANs Enabled:\s+(ALL)", cli_output)
     if intstr:
-        vlanlist = process_raw_vlan_list(intstr.group(1))
-        vlanlist = normalize_vlan_list(vlanlist)
-        # print("Normalized list: ", vlanlist)
-        return vlanlist
+        return VlanSet(intstr.group(1))
     else:
         print("Expected line with interface list for iface" + iface + "was not found !!!")
-        return ""
+        return VlanSet()
 
-def is_it_switch(handler):
+def is_it_switch(handler, platform=None, platform_cache=None):
     ''' Check if the equipment is switch
+        If platform (see PlatformCache.get) knows it, no command is sent. Otherwise result is saved into platform
+        and platform_cache, so the device is not checked again.
 
     '''
+    if platform and platform.get('is_switch') is not None:
+        return platform['is_switch']
     cli_param = "sh vlan"
     cli_output = handler.send_command(cli_param)
     intstr = re.search(r"1\s+default", cli_output)
-    if intstr:
-        return True
-    else:
-        return False
+    is_switch = bool(intstr)
+    if platform:
+        platform['is_switch'] = is_switch
+        if platform_cache:
+            platform_cache.put(platform)
+    return is_switch
 
 def is_ip_valid(testedip):
     ''' Test if string is valid IP address
@@ -160,7 +418,7 @@ def add_vlan_to_int_trunk_allowed(handler, interface, vlan):
 def is_vlan_in_allowed_list(handler, interface, vlan):
     ''' Is VLAN in allowed vlan on trunk interface ?
     '''
-    enabled_trunk_vlan_list = list_trunking_vlans_enabled(handler, interface) # list of Vlan configured as allowed on the interface
+    enabled_trunk_vlan_list = list_trunking_vlans_enabled(handler, interface) # VlanSet of Vlans configured as allowed on the interface
     if vlan in enabled_trunk_vlan_list:
         return True
     return False
@@ -206,6 +464,238 @@ def write_running_to_startup(handler):
 
     return True
 
+def mac_to_int(mac):
+    '''
+    Returns MAC address as 48-bit int, mac is string in any usual format (xxxx.xxxx.xxxx, xx:xx:xx:xx:xx:xx, xx-xx-...) or int
+    Raises ValueError if mac is not valid
+    '''
+    if isinstance(mac, int):
+        if not 0 <= mac < 1 << 48:
+            raise ValueError("invalid MAC address: " + str(mac))
+        return mac
+    hex_str = mac.replace('.', '').replace(':', '').replace('-', '')
+    if len(hex_str) != 12:
+        raise ValueError("invalid MAC address: " + mac)
+    return int(hex_str, 16)
+
+def int_to_mac(value):
+    '''
+    Returns MAC address in Cisco format (xxxx.xxxx.xxxx) from 48-bit int
+    '''
+    hex_str = '%012x' % value
+    return hex_str[0:4] + '.' + hex_str[4:8] + '.' + hex_str[8:12]
+
+
+class MacTable(object):
+    """
+    MAC address table stored in columns: MAC addresses as 48-bit ints, VLANs, entry types and interfaces as interned codes
+    (strings are stored once), one array per column. Indexes by VLAN and by interface (arrays of row numbers) and by MAC
+    are built in one pass when they are needed first (build_indexes), so parsing does not pay for them and lookups don't
+    scan the table.
+    Iteration and indexing return entries as dicts with keys vlan, mac, type, int (the same as list of get_cli_sh_mac_address_table
+    returned before).
+    """
+
+    def __init__(self):
+        self.macs = array.array('Q')        # MAC address as int
+        self.vlans = array.array('H')       # code of VLAN (index into vlan_names)
+        self.types = array.array('B')       # code of entry type (index into type_names)
+        self.ints = array.array('H')        # code of interface (index into int_names)
+        self.vlan_names = []
+        self.type_names = []
+        self.int_names = []
+        self.vlan_codes = {}        # VLAN: code
+        self.type_codes = {}        # entry type: code
+        self.int_codes = {}         # interface: code
+        self.indexed = 0            # number of rows in indexes, rows added later are indexed by build_indexes
+        self.by_vlan = {}           # VLAN code: array of rows
+        self.by_int = {}            # interface code: array of rows
+        self.by_mac = {}            # MAC int: first row
+        self.mac_next = array.array('i')    # next row with the same MAC (other VLAN), -1 is end
+        self.mac_last = {}          # MAC int: last row, only for MACs in more VLANs
+
+    @classmethod
+    def from_list(cls, mac_tab):
+        '''
+        Returns MacTable from list of dicts with keys vlan, mac, type, int (i.e. snmpfunc.get_snmp_mac_address_table)
+        '''
+        table = cls()
+        table.extend((item['vlan'], item['mac'], item['type'], item['int']) for item in mac_tab)
+        return table
+
+    @staticmethod
+    def intern(codes, names, column):
+        ''' Returns iterator of codes of names in column, new codes are assigned to names which are not known '''
+        for name in dict.fromkeys(column):     # distinct names in order of appearance
+            if name not in codes:
+                codes[name] = len(names)
+                names.append(name)
+        return map(codes.__getitem__, column)
+
+    def add(self, vlan, mac, mac_type, interface):
+        '''
+        Adds entry into table
+
+        :param vlan: VLAN number as string ('All' for some static entries)
+        :param mac: MAC address, string or 48-bit int, see mac_to_int
+        :param mac_type: dynamic, static, DYNAMIC, ...
+        :param interface: interface name as it is in the table
+        '''
+        self.extend_columns((vlan,), (mac_to_int(mac),), (mac_type,), (interface,))
+
+    def extend(self, entries):
+        '''
+        Adds entries (vlan, mac, mac_type, interface) into table, see add
+        Raises ValueError if MAC address is not valid, no entry is added then
+        '''
+        columns = list(zip(*entries))
+        if columns:
+            (vlans, macs, types, ints) = columns
+            self.extend_columns(vlans, [mac_to_int(mac) for mac in macs], types, ints)
+
+    def extend_columns(self, vlans, macs, types, ints):
+        '''
+        Adds entries given as columns (lists of the same length) into table, MAC addresses are 48-bit ints.
+        Names are interned column by column, no per-entry work is done besides copying into arrays.
+        '''
+        self.macs.extend(macs)
+        self.vlans.extend(self.intern(self.vlan_codes, self.vlan_names, vlans))
+        self.types.extend(self.intern(self.type_codes, self.type_names, types))
+        self.ints.extend(self.intern(self.int_codes, self.int_names, ints))
+
+    def build_indexes(self):
+        '''
+        Adds rows which are not indexed yet into indexes by VLAN, by interface and by MAC.
+        Methods which use indexes call it, it has to be called before by_vlan, by_int, by_mac are used directly.
+        '''
+        start = self.indexed
+        end = len(self.macs)
+        if start == end:
+            return
+        (by_vlan, by_int, by_mac, macs, mac_next, mac_last) = (self.by_vlan, self.by_int, self.by_mac, self.macs, self.mac_next, self.mac_last)
+        for code in range(len(by_vlan), len(self.vlan_names)):
+            by_vlan[code] = array.array('I')
+        for code in range(len(by_int), len(self.int_names)):
+            by_int[code] = array.array('I')
+        for (row, vlan_code, int_code) in zip(range(start, end), self.vlans[start:], self.ints[start:]):
+            by_vlan[vlan_code].append(row)
+            by_int[int_code].append(row)
+        mac_next.extend(array.array('i', [-1]) * (end - start))
+        rows = range(start, end)
+        if start == 0:
+            by_mac.update(zip(reversed(macs), range(end - 1, -1, -1)))     # first row wins
+            if len(by_mac) == end:
+                rows = ()               # every MAC is in one VLAN only, no chains
+        for row in rows:
+            mac = macs[row]
+            first = by_mac.setdefault(mac, row)
+            if first != row:        # MAC in next VLAN, append row to the chain
+                mac_next[mac_last.get(mac, first)] = row
+                mac_last[mac] = row
+        self.indexed = end
+
+    def entry(self, row):
+        ''' Returns row as dict with keys vlan, mac, type, int '''
+        return {'vlan': self.vlan_names[self.vlans[row]], 'mac': int_to_mac(self.macs[row]),
+                'type': self.type_names[self.types[row]], 'int': self.int_names[self.ints[row]]}
+
+    def __len__(self):
+        return len(self.macs)
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self.macs)
+        if not 0 <= row < len(self.macs):
+            raise IndexError("MacTable index out of range")
+        return self.entry(row)
+
+    def __iter__(self):
+        for row in range(len(self.macs)):
+            yield self.entry(row)
+
+    def get_vlans(self):
+        ''' Returns list of VLANs in the table '''
+        self.build_indexes()
+        return [self.vlan_names[code] for code in self.by_vlan]
+
+    def get_interfaces(self):
+        ''' Returns list of interfaces in the table '''
+        self.build_indexes()
+        return [self.int_names[code] for code in self.by_int]
+
+    def get_vlan_entries(self, vlan):
+        ''' Returns list of entries in VLAN '''
+        self.build_indexes()
+        code = self.vlan_codes.get(vlan)
+        return [self.entry(row) for row in self.by_vlan.get(code, ())]
+
+    def get_interface_entries(self, interface):
+        ''' Returns list of entries learned on interface '''
+        self.build_indexes()
+        code = self.int_codes.get(interface)
+        return [self.entry(row) for row in self.by_int.get(code, ())]
+
+    def get_interface_vlans(self, interface):
+        '''
+        Returns list of VLANs which are visible on interface (i.e. trunk), in order of first appearance in the table
+        '''
+        self.build_indexes()
+        code = self.int_codes.get(interface)
+        vlan_codes = {}
+        for row in self.by_int.get(code, ()):
+            vlan_codes.setdefault(self.vlans[row], None)
+        return [self.vlan_names[vlan_code] for vlan_code in vlan_codes]
+
+    def lookup(self, mac):
+        '''
+        Returns list of entries with MAC address (one per VLAN), mac is string in any usual format or int
+        '''
+        self.build_indexes()
+        try:
+            row = self.by_mac.get(mac_to_int(mac), -1)
+        except ValueError:
+            return []
+        entries = []
+        while row != -1:
+            entries.append(self.entry(row))
+            row = self.mac_next[row]
+        return entries
+
+
+RE_MAC_TABLE_LINE = re.compile(
+    # *  713  6480.9998.fc6a   dynamic  Yes        215   Te1/6/16
+    r"[*]?\s+([0-9]+)\s+([0-9a-f.]+)\s+(dynamic|static)\s+[A-Za-z]+\s+[0-9\-]+\s+([A-Za-z0-9/\-\.]+)"
+    # 172    0050.5682.003c    DYNAMIC     Gi2/1/4
+    # All    0180.c200.0004    STATIC      CPU
+    r"|\s?([0-9A-Za-z]+)\s+([0-9a-f.]+)\s+(DYNAMIC|STATIC)\s+([A-Za-z0-9/\-\.]+)"
+    # IOS-XE
+    # 503      001e.be4c.8180   dynamic ip,ipx,assigned,other TenGigabitEthernet1/1
+    r"|\s?([0-9]+)\s+([0-9a-f.]+)\s+(dynamic|static)\s+[A-Za-z,]+\s+([A-Za-z0-9/\-\.]+)")
+
+
+def parse_sh_mac_address_table(cli_output):
+    '''
+    Returns MacTable from output of show mac address-table, dynamic and static entries only, no multicast
+    Line formats are alternatives of one precompiled pattern tried in the same order as separate patterns before.
+    Fields are collected into columns and added into table at once (see MacTable.extend_columns).
+    '''
+    (vlans, macs, types, ints) = ([], [], [], [])
+    (vlans_append, macs_append, types_append, ints_append) = (vlans.append, macs.append, types.append, ints.append)
+    for line in cli_output.split('\n'):
+        intstr = RE_MAC_TABLE_LINE.match(line)
+        if intstr:
+            first = intstr.lastindex - 3        # 4 groups of matched alternative
+            (vlan, mac, mac_type, interface) = intstr.group(first, first + 1, first + 2, first + 3)
+            mac = mac.replace('.', '')
+            if len(mac) == 12:          # [0-9a-f.]+ may match something else than MAC address
+                vlans_append(vlan)
+                macs_append(int(mac, 16))
+                types_append(mac_type)
+                ints_append(interface)
+    table = MacTable()
+    table.extend_columns(vlans, macs, types, ints)
+    return table
+
 def get_cli_sh_mac_address_table_dyn_dict(handler):
     ''' Returns dynamic entries of mac address table
     Table is dict with Vlan number as key and value is list of (mac,int) items
@@ -243,48 +733,21 @@ def get_cli_sh_mac_address_table_dyn_dict(handler):
 
 def get_cli_sh_mac_address_table(handler):
     '''
-    Returns list of show mac-address-table entries
+    Returns MacTable of show mac-address-table entries
     dynamic a static entries only, no multicast
     Each entry is dict which contains vlan, mac, type, int
     '''
-    
-    mac_tab = []
     cli_param = "sh mac address-table"
     cli_output = handler.send_command(cli_param)
-    cli_out_split = cli_output.split('\n')
-    for line in cli_out_split:
-        match = False
-        # *  713  6480.9998.fc6a   dynamic  Yes        215   Te1/6/16
-        intstr = re.match(r"[*]?\s+([0-9]+)\s+([0-9a-f.]+)\s+(dynamic|static)\s+[A-Za-z]+\s+[0-9\-]+\s+([A-Za-z0-9/\-\.]+)", line)
-        if intstr:
-            match = True
-        else:
-            # 172    0050.5682.003c    DYNAMIC     Gi2/1/4
-            # All    0180.c200.0004    STATIC      CPU
-            intstr = re.match(r"\s?([0-9A-Za-z]+)\s+([0-9a-f.]+)\s+(DYNAMIC|STATIC)\s+([A-Za-z0-9/\-\.]+)", line)
-            if intstr:
-                match = True
-            else:
-                # IOS-XE
-                # 503      001e.be4c.8180   dynamic ip,ipx,assigned,other TenGigabitEthernet1/1
-                intstr = re.match(r"\s?([0-9]+)\s+([0-9a-f.]+)\s+(dynamic|static)\s+[A-Za-z,]+\s+([A-Za-z0-9/\-\.]+)", line)
-                if intstr:
-                    match = True
+    return parse_sh_mac_address_table(cli_output)
 
-        if match:
-            int_dict = {}
-            int_dict['vlan'] = intstr.group(1)
-            int_dict['mac'] = intstr.group(2)
-            int_dict['type'] = intstr.group(3)
-            int_dict['int'] = intstr.group(4)
-            mac_tab.append(int_dict)
-    return mac_tab
-            
 def get_vlan_list_trunk(macadrtab, trunk):
     '''
-    Returns list of VLANs which are visible on trunk based on mac address table list
+    Returns list of VLANs which are visible on trunk based on mac address table (MacTable or dict from get_cli_sh_mac_address_table_dyn_dict)
     variable trunks is interface name
     '''
+    if isinstance(macadrtab, MacTable):
+        return macadrtab.get_interface_vlans(trunk)       # index of interface, no scan of the table
     vlanlist = []
     for vlan in macadrtab.keys():
         for item in macadrtab[vlan]:
@@ -352,68 +815,67 @@ def print_vlan_cfg(handler, vlannrlist):
 
 
 
+# Field tables of sh interface switchport: (key of output dict, precompiled pattern, group(1) is the value)
+SWITCHPORT_FIELDS = (
+    ('switchport', re.compile(r"Switchport:\s([A-Za-z]+)\n")),
+    ('admin_mode', re.compile(r"Administrative Mode:\s([A-Za-z\s]+)[\n\(]")),
+    ('oper_mode', re.compile(r"Operational Mode:\s([A-Za-z\s]+)[\n\(]")),
+    ('admin_trunc_enc', re.compile(r"Administrative Trunking Encapsulation:\s([A-Za-z0-9\.]+)\n")),
+    ('trunk_negot', re.compile(r"Negotiation of Trunking:\s([A-Za-z0-9\.]+)\n")),
+    ('access_mode_vlan', re.compile(r"Access Mode VLAN:\s([0-9]+).+\n")),
+    ('trunk_native_mode_vlan', re.compile(r"Trunking Native Mode VLAN:\s([0-9]+).+\n")),
+    ('admin_native_vlan_tagging', re.compile(r"Administrative Native VLAN tagging:\s([A-Za-z0-9\.]+)\n")),
+    ('voice_vlan', re.compile(r"Voice VLAN:\s([A-Za-z0-9]+)\n")),
+    ('bundle_member', re.compile(r"member of bundle\s(Po[0-9]+)\)")),
+    ('trunk_vlans', re.compile(r"Trunking VLANs Enabled:\s([A-Za-z0-9,\-\s]+)\n")),
+)
+SWITCHPORT_FIELDS_NXOS = (
+    ('switchport', re.compile(r"Switchport:\s([A-Za-z]+)\n")),
+    ('oper_mode', re.compile(r"Operational Mode:\s([A-Za-z\s]+)[\n\(]")),
+    ('access_mode_vlan', re.compile(r"Access Mode VLAN:\s([0-9]+).+\n")),
+    ('trunk_native_mode_vlan', re.compile(r"Trunking Native Mode VLAN:\s([0-9]+).+\n")),
+    ('voice_vlan', re.compile(r"Voice VLAN:\s([A-Za-z0-9]+)\n")),
+    ('trunk_vlans', re.compile(r"Trunking VLANs Allowed:\s([A-Za-z0-9,\-\s]+)\n")),
+)
+RE_SWITCHPORT_NAME = re.compile(r"([A-Za-z0-9/.]+)\n")
+
+
+def parse_sh_int_switchport(cli_output, field_table):
+    '''
+    Returns list of switchport interfaces with parameters. One item of list is directory with key 'int' and keys of field_table.
+    Output is split into blocks of interfaces once, each field is searched in the block by its precompiled pattern.
+    Value of field is group(1) without trailing spaces ('' if it is not found), trunk_vlans is VlanSet.
+
+    '''
+    sp_list = []
+    for block in cli_output.split('Name: '):      # split output into blocks of interfaces
+        intstr = RE_SWITCHPORT_NAME.search(block)
+        if not intstr:
+            continue
+        int_dict = {}
+        int_dict['int'] = conv_int_to_interface_name(intstr.group(1)) # gi1/3/4 -> GigabitEthernet1/3/4
+        for (key, regexp) in field_table:
+            intstr = regexp.search(block)
+            int_dict[key] = intstr.group(1).rstrip() if intstr else ''        # get rid of spaces at the end of the string
+        int_dict['trunk_vlans'] = VlanSet(int_dict['trunk_vlans'])      # ranges (i.e.5-8, ALL) into bitmap
+        sp_list.append(int_dict)
+    return sp_list
+
 def get_cli_sh_int_switchport(handler):
     '''
     Returns list of switchport interfaces with parameters. One item of list is directory.
     '''
-    sp_list = []
     cli_param = "sh interface switchport"
     cli_output = handler.send_command(cli_param)
-    cli_out_split = cli_output.split('Name: ')      # split output into blocks of interfaces
-    for block in cli_out_split:
-        intstr = re.search(r"([A-Za-z0-9/.]+)\n", block)
-        if intstr:                                  # interface name was found, process the interface
-            name = intstr.group(1)
-            int_dict = {}
-            int_dict['int'] = conv_int_to_interface_name(name) # gi1/3/4 -> GigabitEthernet1/3/4
-            int_dict['switchport'] = find_regex_value_in_string(block, re.compile(r"Switchport:\s([A-Za-z]+)\n"))
-            int_dict['admin_mode'] = find_regex_value_in_string(block, re.compile(r"Administrative Mode:\s([A-Za-z\s]+)[\n\(]"))
-            int_dict['admin_mode'] = int_dict['admin_mode'].rstrip()      # get rid of spaces at the end of 
-            int_dict['oper_mode'] = find_regex_value_in_string(block, re.compile(r"Operational Mode:\s([A-Za-z\s]+)[\n\(]"))
-            int_dict['oper_mode'] = int_dict['oper_mode'].rstrip()      # get rid of spaces at the end of the string
-            int_dict['admin_trunc_enc'] = find_regex_value_in_string(block, re.compile(r"Administrative Trunking Encapsulation:\s([A-Za-z0-9\.]+)\n"))
-            int_dict['trunk_negot'] = find_regex_value_in_string(block, re.compile(r"Negotiation of Trunking:\s([A-Za-z0-9\.]+)\n"))
-            int_dict['access_mode_vlan'] = find_regex_value_in_string(block, re.compile(r"Access Mode VLAN:\s([0-9]+).+\n"))
-            int_dict['trunk_native_mode_vlan'] = find_regex_value_in_string(block, re.compile(r"Trunking Native Mode VLAN:\s([0-9]+).+\n"))
-            int_dict['admin_native_vlan_tagging'] = find_regex_value_in_string(block, re.compile(r"Administrative Native VLAN tagging:\s([A-Za-z0-9\.]+)\n"))
-            int_dict['voice_vlan'] = find_regex_value_in_string(block, re.compile(r"Voice VLAN:\s([A-Za-z0-9]+)\n"))
-            int_dict['bundle_member'] = find_regex_value_in_string(block, re.compile(r"member of bundle\s(Po[0-9]+)\)"))
-            tmps = find_regex_value_in_string(block, re.compile(r"Trunking VLANs Enabled:\s([A-Za-z0-9,\-\s]+)\n"))
-            vlanlist = process_raw_vlan_list(tmps)          # remove spaces, newlines
-            vlanlist = normalize_vlan_list(vlanlist)        # convert vlan ranges (i.e.5-8, ...) to list (5,6,7,8)
-            int_dict['trunk_vlans'] = vlanlist
-            sp_list.append(int_dict)
-
-    return sp_list
+    return parse_sh_int_switchport(cli_output, SWITCHPORT_FIELDS)
 
 def get_cli_sh_int_switchport_nxos(handler):
     '''
     Returns list of switchport interfaces with parameters. One item of list is directory.
     '''
-    sp_list = []
     cli_param = "sh interface switchport"
     cli_output = handler.send_command(cli_param)
-    cli_out_split = cli_output.split('Name: ')      # split output into blocks of interfaces
-    for block in cli_out_split:
-        intstr = re.search(r"([A-Za-z0-9/.]+)\n", block)
-        if intstr:                                  # interface name was found, process the interface
-            name = intstr.group(1)
-            int_dict = {}
-            int_dict['int'] = conv_int_to_interface_name(name) # gi1/3/4 -> GigabitEthernet1/3/4
-            int_dict['switchport'] = find_regex_value_in_string(block, re.compile(r"Switchport:\s([A-Za-z]+)\n"))
-        
-            int_dict['oper_mode'] = find_regex_value_in_string(block, re.compile(r"Operational Mode:\s([A-Za-z\s]+)[\n\(]"))
-            int_dict['oper_mode'] = int_dict['oper_mode'].rstrip()      # get rid of spaces at the end of the string
-            int_dict['access_mode_vlan'] = find_regex_value_in_string(block, re.compile(r"Access Mode VLAN:\s([0-9]+).+\n"))
-            int_dict['trunk_native_mode_vlan'] = find_regex_value_in_string(block, re.compile(r"Trunking Native Mode VLAN:\s([0-9]+).+\n"))
-            int_dict['voice_vlan'] = find_regex_value_in_string(block, re.compile(r"Voice VLAN:\s([A-Za-z0-9]+)\n"))
-            tmps = find_regex_value_in_string(block, re.compile(r"Trunking VLANs Allowed:\s([A-Za-z0-9,\-\s]+)\n"))
-            vlanlist = process_raw_vlan_list(tmps)          # remove spaces, newlines
-            vlanlist = normalize_vlan_list(vlanlist)        # convert vlan ranges (i.e.5-8, ...) to list (5,6,7,8)
-            int_dict['trunk_vlans'] = vlanlist
-            sp_list.append(int_dict)
-
-    return sp_list
+    return parse_sh_int_switchport(cli_output, SWITCHPORT_FIELDS_NXOS)
 
 def get_cli_sh_int_switchport_dict(handler):
     '''
@@ -464,86 +926,76 @@ def find_regex_value_in_string(sstring, regexp):
     return value
 
 
+# (full name, short name, other spellings) of interface types, i.e. GigabitEthernet1/1/1 / Gi1/1/1
+INTERFACE_TYPES = (
+    ('FastEthernet', 'Fa', ()),
+    ('GigabitEthernet', 'Gi', ('Gig',)),
+    ('TwoGigabitEthernet', 'Tw', ()),
+    ('FiveGigabitEthernet', 'Fi', ()),
+    ('TenGigabitEthernet', 'Te', ('Ten',)),
+    ('TwentyFiveGigE', 'Twe', ('TwentyFiveGigabitEthernet',)),
+    ('FortyGigabitEthernet', 'Fo', ('FortyGigE',)),
+    ('HundredGigE', 'Hu', ('HundredGigabitEthernet',)),
+    ('Ethernet', 'Eth', ('Et',)),
+    ('Port-channel', 'Po', ()),
+    ('Vlan', 'Vl', ()),
+    ('Loopback', 'Lo', ()),
+    ('Tunnel', 'Tu', ()),
+    ('mgmt', 'mgmt', ()),
+    ('nve', 'nve', ()),
+)
+INTERFACE_PREFIXES = {spelling.lower(): (full_type, short_type)         # lowercase spelling of type : (full name, short name)
+                      for (full_type, short_type, spellings) in INTERFACE_TYPES for spelling in (full_type, short_type) + spellings}
+RE_INTERFACE_NAME = re.compile(r"([A-Za-z][A-Za-z\-]*)\s*([0-9].*)$")
+
+
+@functools.lru_cache(maxsize=4096)
+def canonical_interface_name(intname, short=False):
+    '''
+    Returns canonical interface name, full (GigabitEthernet1/1/1) or short (Gi1/1/1) if short is True.
+    intname can be full, short or other known spelling of type in any case (gi1/1/1, port-channel10, Eth1/1),
+    types are in INTERFACE_TYPES. Results are cached.
+
+    :param intname: interface name
+    :param short: True for short name
+    :return name: None if type of interface is not known
+    '''
+    intstr = RE_INTERFACE_NAME.match(intname)
+    if not intstr:
+        return None
+    names = INTERFACE_PREFIXES.get(intstr.group(1).lower())
+    if not names:
+        return None
+    return names[1 if short else 0] + intstr.group(2)
+
 def conv_int_to_interface_name(intname):
     '''
-    Converts interface shortname to standartd name, i.e Gi1/1/1 to GigabitEthernet1/1/1
-    '''
-    res = re.match(r"Gi[0-9].*", intname)
-    if res:
-        intname = intname.replace('Gi', 'GigabitEthernet')
-        return intname
-    res = re.match(r"Te[0-9].*", intname)
-    if res:
-        intname = intname.replace('Te', 'TenGigabitEthernet')
-        return intname
-    res = re.match(r"Fa[0-9].*", intname)
-    if res:
-        intname = intname.replace('Fa', 'FastEthernet')
-        return intname
-    res = re.match(r"Po[0-9].*", intname)
-    if res:
-        intname = intname.replace('Po', 'Port-channel')
-        return intname
-    res = re.match(r"Eth[0-9].*", intname)
-    if res:
-        intname = intname.replace('Eth', 'Ethernet')
-        return intname
-    res = re.match(r"Vl[0-9].*", intname)
-    if res:
-        intname = intname.replace('Vl', 'Vlan')
-        return intname
-    res = re.match(r"Lo[0-9].*", intname)
-    if res:
-        intname = intname.replace('Lo', 'Loopback')
-        return intname
-    return "Error"
-    
+    Converts interface shortname to standartd name, i.e Gi1/1/1 to GigabitEthernet1/1/1, "Error" if type is not known
+    '''
+    return canonical_interface_name(intname) or "Error"
+
 def conv_interface_to_int_name(intname):
     '''
-    Converts interface standartd name to interface shortname, i.e  GigabitEthernet1/1/1 to Gi1/1/1
-    '''
-    res = re.match(r"GigabitEthernet[0-9].*", intname)
-    if res:
-        intname = intname.replace('GigabitEthernet', 'Gi')
-        return intname
-    res = re.match(r"TenGigabitEthernet[0-9].*", intname)
-    if res:
-        intname = intname.replace('TenGigabitEthernet', 'Te')
-        return intname
-    res = re.match(r"FastEthernet[0-9].*", intname)
-    if res:
-        intname = intname.replace('FastEthernet', 'Fa')
-        return intname
-    res = re.match(r"Port-channel[0-9].*", intname)
-    if res:
-        intname = intname.replace('Port-channel', 'Po')
-        return intname
-    res = re.match(r"Ethernet[0-9].*", intname)
-    if res:
-        intname = intname.replace('Ethernet', 'Eth')
-        return intname
-    res = re.match(r"Vlan[0-9].*", intname)
-    if res:
-        intname = intname.replace('Vlan', 'Vl')
-        return intname
-    res = re.match(r"Loopback[0-9].*", intname)
-    if res:
-        intname = intname.replace('Loopback', 'Lo')
-        return intname
-    return "Error"
-
-def get_cli_sh_cdp_neighbor(handler):
+    Converts interface standartd name to interface shortname, i.e  GigabitEthernet1/1/1 to Gi1/1/1, "Error" if type is not known
+    '''
+    return canonical_interface_name(intname, True) or "Error"
+
+def get_cli_sh_cdp_neighbor(handler, os_type=''):
     '''
     Returns CDP table.
+    If os_type is known (see get_device_info), proper command is sent directly, otherwise NX-OS command is tried when IOS one fails
     '''
-    its_nxos = False
+    its_nxos = (os_type == 'NX-OS')
     cdp_list = []
-    cli_param = "sh cdp entry *"
-    cli_output = handler.send_command(cli_param)
-    if 'Invalid command at' in cli_output:  # it's probably NX-OS
-        cli_param = "sh cdp entry all"
+    if its_nxos:
+        cli_output = handler.send_command("sh cdp entry all")
+    else:
+        cli_param = "sh cdp entry *"
         cli_output = handler.send_command(cli_param)
-        its_nxos = True
+        if 'Invalid command at' in cli_output:  # it's probably NX-OS
+            cli_param = "sh cdp entry all"
+            cli_output = handler.send_command(cli_param)
+            its_nxos = True
     cli_out_split = cli_output.split('----------------')      # split output into blocks (list) of devices
     for block in cli_out_split:
         if its_nxos:
@@ -797,7 +1249,7 @@ def is_cdp_device_endnode(device):
     return False
 
 
-def get_device_info(ip_addr, username, pswd):
+def get_device_info(ip_addr, username, pswd, platform_cache=None):
     """
     Get information about specific device. Returns dictionary with similar structure as get_cli_sh_cdp_neighbor,
     i.e. device name, IOS version, platform
@@ -805,14 +1257,13 @@ def get_device_info(ip_addr, username, pswd):
     :param ip_addr: IP address of the device
     :param username: for connection
     :param pswd: password
+    :param platform_cache: PlatformCache or None, device info is saved into it
     :return ret_value: dictionary with device information
     """
 
-
-    ret_value = {}
-
+    platform = platform_cache.get(ip_addr) if platform_cache else None
     try:
-        net_connect = ConnectHandler(device_type='cisco_ios', ip=ip_addr, username=username, password=pswd)     # connect to seed
+        net_connect = ConnectHandler(device_type=get_netmiko_device_type(platform['os_type'] if platform else ''), ip=ip_addr, username=username, password=pswd)     # connect to seed
     except NetMikoTimeoutException:
         print("- unable to connect to the device", ip_addr, ", timeout")
         return None
@@ -820,8 +1271,27 @@ def get_device_info(ip_addr, username, pswd):
         print("- unable to connect to the device", ip_addr, ", error")
         return None
 
+    ret_value = get_cli_device_info(net_connect, ip_addr)
+    net_connect.disconnect()
+    if ret_value and platform_cache:
+        platform_cache.put(ret_value)
+    return ret_value
+
+
+def get_cli_device_info(handler, ip_addr):
+    """
+    Get information about device connected by handler, see get_device_info.
+    Besides keys of get_cli_sh_cdp_neighbor entry (capability is empty), 'os_type' (IOS, IOS-XE, NX-OS) is returned.
+
+    :param handler: existing handler created using Netmiko CreateHandler function
+    :param ip_addr: IP address of the device
+    :return ret_value: dictionary with device information, None if OS is not recognized
+    """
+
+    ret_value = {}
+
     cli_param = "sh version"
-    cli_output = net_connect.send_command(cli_param)
+    cli_output = handler.send_command(cli_param)
     found = find_regex_value_in_string(cli_output, re.compile(r"(Cisco Internetwork Operating System)"))
     if found:
         os_type = 'IOS'
@@ -838,11 +1308,11 @@ def get_device_info(ip_addr, username, pswd):
                 if found:
                     os_type = 'IOS-XE'
                 else:
-                    net_connect.disconnect()
                     return None     # OS not recognized
     ret_value['ip_addr'] = ip_addr
-    sh_for_domainname = net_connect.send_command("show hosts")
-    net_connect.disconnect()
+    ret_value['os_type'] = os_type
+    ret_value['capability'] = []
+    sh_for_domainname = handler.send_command("show hosts")
     domain_name = find_regex_value_in_string(sh_for_domainname, re.compile(r"\sis\s([^\n]+)\n"))
     if os_type == 'IOS':
         name = find_regex_value_in_string(cli_output, re.compile(r"([^\s]+)\suptime is"))
@@ -872,132 +1342,173 @@ def get_device_info(ip_addr, username, pswd):
 
 
 
+def parse_sh_vlan(cli_output):
+    '''
+    Parses output of sh vlan (or sh vlan id) in one pass, IOS and NX-OS format.
+    Returns VLAN table (list of dictionaries) with number, name, status and acc_int (column Ports),
+    port list which wraps onto continuation lines (starting by space) is joined.
+    Only the first table of output (VLAN Name Status Ports) is processed.
+
+    '''
+    vlan_list = []
+    acc_int = None              # port list of the last VLAN, continuation lines are added to it
+    for line in cli_output.splitlines():
+        if not line:
+            if vlan_list:
+                break               # end of the first table (VLAN Type, Remote SPAN VLANs, ... follow)
+            continue
+        first = line[0]
+        if first == ' ':
+            #                                                Eth2/6, Eth2/7
+            if acc_int is not None:
+                ports = line.replace(' ', '').rstrip(',')
+                if ports:
+                    acc_int.extend(ports.split(','))
+        elif first.isdigit():
+            # 10   vlan10                           active    Eth2/3, Eth2/4, Eth2/5
+            # 1002 fddi-default                     act/unsup
+            fields = line.split(None, 3)
+            if len(fields) >= 3 and fields[0].isdigit() and fields[2].islower():     # status, lines of VLAN Type table don't match
+                ports = fields[3].replace(' ', '').rstrip(',') if len(fields) == 4 else ''
+                acc_int = ports.split(',') if ports else []
+                vlan_list.append({'number':fields[0], 'name':fields[1], 'status':fields[2], 'acc_int':acc_int})
+    return vlan_list
+
 def get_cli_sh_vlan(handler):
     '''
-    Returns VLAN table (list of dictionaries).
+    Returns VLAN table (list of dictionaries), see parse_sh_vlan.
     acc_int - ports where vlan is in access mode (column Ports in sh vlan)
  
     '''
-    vlan_list = []
-    cli_param = "sh vlan"
-    cli_output = handler.send_command(cli_param)
-    cli_out_split = cli_output.split('\n')      # split output into lines
-    for line in cli_out_split:
-        # 10   vlan10                           active    Eth2/3, Eth2/4, Eth2/5
-        intstr = re.match(r"([0-9]+)\s+([A-Za-z0-9_\-/\.]+)\s+([a-z]+)(\s+(.*))?$", line)
-        if intstr:
-            acc_vlan = intstr.group(5)
-            if acc_vlan:
-                acc_vlan = acc_vlan.replace(' ', '')         # delete spaces
-                intlist = acc_vlan.split(",")       # list VLANs
-            else:
-                intlist = []
-            vlan_entry = {'number':intstr.group(1), 'name':intstr.group(2), 'status':intstr.group(3), 'acc_int':intlist}
-            vlan_list.append(vlan_entry)
-    return vlan_list
+    return parse_sh_vlan(handler.send_command("sh vlan"))
 
 def get_cli_sh_vlan_nxos(handler):
     '''
-    Returns VLAN table (list of dictionaries).
+    Returns VLAN table (list of dictionaries), see parse_sh_vlan.
     acc_int - ports where vlan is in access mode (column Ports in sh vlan)
 
-    Just copy of get_cli_sh_vlan. I have to rewrite it
- 
     '''
-    vlan_list = []
-    new_vlan_found = False
-    cli_param = "sh vlan"
-    cli_output = handler.send_command(cli_param)
-    cli_out_split = cli_output.split('\n')      # split output into lines
-    for line in cli_out_split:
-        # 10   vlan10                           active    Eth2/3, Eth2/4, Eth2/5
-        intstr = re.match(r"([0-9]+)\s+([A-Za-z0-9_\-]+)\s+([a-z]+)(\s+(.*))?$", line)
-        if intstr:
-            new_vlan_found = True
-            acc_vlan = intstr.group(5)
-            if acc_vlan:
-                acc_vlan = acc_vlan.replace(' ', '')         # delete spaces
-                intlist = acc_vlan.split(",")       # list VLANs
-            else:
-                intlist = []
-            vlan_entry = {'number':intstr.group(1), 'name':intstr.group(2), 'status':intstr.group(3), 'acc_int':intlist}
-            vlan_list.append(vlan_entry)
-    return vlan_list
+    return parse_sh_vlan(handler.send_command("sh vlan"))
+
+TRUNK_SECTIONS = {
+    'vlans allowed on trunk': 'allowed',
+    'vlans allowed and active in management domain': 'active',
+    'vlans in spanning tree forwarding state and not pruned': 'forwarding',
+    'stp forwarding': 'forwarding',         # NX-OS
+}
+
+
+def parse_sh_int_trunk(cli_output):
+    '''
+    Parses output of sh interface trunk, IOS and NX-OS format.
+    Returns dict trunk port : dict with VlanSet for keys 'allowed', 'active' (not in NX-OS output), 'forwarding'
+    (VLANs in spanning tree forwarding state and not pruned, i.e. VLANs for which the port is listed in sh vlan id).
+    VLAN list which wraps onto continuation lines (starting by space) is joined.
+
+    '''
+    raw = {}                # port : {key : raw VLAN list}
+    key = None              # key of current section, None for sections which are not processed
+    port = None             # port of the last line, continuation lines are added to it
+    for line in cli_output.splitlines():
+        if not line.strip() or line.startswith('-'):
+            continue
+        if line.startswith('Port '):
+            # Port        Vlans in spanning tree forwarding state and not pruned
+            key = TRUNK_SECTIONS.get(' '.join(line.split()[1:]).lower())
+            port = None
+            continue
+        if key is None:
+            continue
+        if line[0] == ' ':
+            #               ,1002-1005
+            if port:
+                raw[port][key] += ',' + line.strip()
+            continue
+        fields = line.split(None, 1)
+        port = fields[0]
+        if port not in raw:
+            raw[port] = {'allowed': '', 'active': '', 'forwarding': ''}
+        raw[port][key] = fields[1] if len(fields) == 2 else ''
+    return {port: {key: VlanSet(value) for (key, value) in lists.items()} for (port, lists) in raw.items()}
 
 def get_cli_sh_vlan_plus(handler):
     '''
     Returns VLAN table (list of dictionaries).
-    ports - ports where vlan is active (column Ports in sh vlan id)
+    ports - ports where vlan is active (column Ports in sh vlan id), i.e. access ports followed by trunks
+            where vlan is forwarding and not pruned (sh interface trunk)
     acc_int - ports where vlan is in access mode (column Ports in sh vlan)
-    Quite long processing when lot of Vlans ...
+    Two commands are sent regardless of number of Vlans.
     '''
-    vlan_list = []
-    cli_param = "sh vlan"
-    cli_output = handler.send_command(cli_param)
-    cli_out_split = cli_output.split('\n')      # split output into lines
-    for line in cli_out_split:
-        # 10   vlan10                           active    Eth2/3, Eth2/4, Eth2/5
-        intstr = re.match(r"([0-9]+)\s+([A-Za-z0-9_\-]+)\s+([a-z]+)(\s+(.*))?$", line)
-        if intstr:
-            acc_vlan = intstr.group(5)
-            if acc_vlan:
-                acc_vlan = acc_vlan.replace(' ', '')         # delete spaces
-                intlist = acc_vlan.split(",")       # list VLANs
-            else:
-                intlist = []
-            intlist2 = get_cli_sh_vlan_id_int_list(handler, intstr.group(1))    # obtain list of interfaces where VLAN is active
-            vlan_entry = {'number':intstr.group(1), 'name':intstr.group(2), 'status':intstr.group(3), 'acc_int':intlist, 'ports':intlist2}
-            vlan_list.append(vlan_entry)
+    vlan_list = get_cli_sh_vlan(handler)
+    trunks = parse_sh_int_trunk(handler.send_command("sh interface trunk"))
+    vlan_ports = {}         # vlan number : trunk ports
+    for (port, trunk) in trunks.items():
+        for vlan in trunk['forwarding']:
+            vlan_ports.setdefault(str(vlan), []).append(port)
+    for vlan_entry in vlan_list:
+        ports = list(vlan_entry['acc_int'])
+        ports.extend(port for port in vlan_ports.get(vlan_entry['number'], []) if port not in vlan_entry['acc_int'])   # NX-OS lists trunks in sh vlan too
+        vlan_entry['ports'] = ports
     return vlan_list
 
 def get_cli_sh_vlan_id_int_list(handler, vlannr):
     '''
     Returns list of interfaces displayed in sh vlan id 'vlannr'.
+    One command per VLAN, get_cli_sh_vlan_plus uses sh interface trunk instead.
     '''
     cli_param = "sh vlan id " + vlannr
-    cli_output = handler.send_command(cli_param)
-    cli_out_split = cli_output.split('\n')      # split output into lines
-    for line in cli_out_split:
-        # 10   vlan10                           active    Eth2/3, Eth2/4, Eth2/5
-        intstr = re.match(r"([0-9]+)\s+([A-Za-z0-9_\-]+)\s+([a-z]+)(\s+(.*))?$", line)
-        if intstr:
-            intf = intstr.group(5)
-            if intf:
-                intf = intf.replace(' ', '')         # delete spaces
-                intlist = intf.split(",")       # interfaces list
-            else:
-                intlist = []
-            return intlist          # return after first match
+    vlan_list = parse_sh_vlan(handler.send_command(cli_param))
+    if vlan_list:
+        return vlan_list[0]['acc_int']          # return first match
+    return None
 
 
+# 10     Po10(SU)        LACP      Gi1/0/1(P)  Gi1/0/2(P)  Gi1/0/3(D)
+# 258    Po258(RU)        -        Gi3/1(P)    Gi3/2(P)
+# (Po258 is created automatically, i.e. for service module on Cat6k)
+RE_ETHERCHANNEL_GROUP = re.compile(r"([0-9]+)\s+Po([0-9A-Za-z]+)\([A-Za-z]*\)(.*)$")
+RE_ETHERCHANNEL_MEMBER = re.compile(r"([A-Za-z][A-Za-z0-9/\.\-]*)\([A-Za-z]+\)")
+
+
+def parse_sh_etherchannel_summary(cli_output):
+    '''
+    Parses output of sh etherchannel summary (IOS) in one pass.
+    Returns list of port-channel entries, see get_cli_sh_etherchannel_summary. Member list which wraps onto
+    continuation lines (starting by space) is joined. Members are in order of output, flags (P, D, s, ...) are removed.
+
+    '''
+    pc_list = []
+    int_list = None             # members of the last port-channel, continuation lines are added to it
+    for line in cli_output.splitlines():
+        if not line:
+            continue
+        if line[0] == ' ':
+            #                                  Gi1/0/4(P)
+            if int_list is not None:
+                int_list.extend(RE_ETHERCHANNEL_MEMBER.findall(line))
+            continue
+        intstr = RE_ETHERCHANNEL_GROUP.match(line)
+        if intstr:
+            int_list = RE_ETHERCHANNEL_MEMBER.findall(intstr.group(3))
+            pc_list.append({'pc_number': intstr.group(2), 'int_list': int_list})
+        else:
+            int_list = None
+    return pc_list
+
 def get_cli_sh_etherchannel_summary(handler):
     '''
     Returns list of port-channel entries.
     Each entry is directory with Po number and list of interfaces in this port-channel
-
-    Notice: it doesn't work with automaticaly created Po which are outside the portchanel range
-    for example Po for service module on Cat6k ...
-    In that case the interface list is empty
+    Membership is read from one command (sh etherchannel summary), including automaticaly created Po which are
+    outside the portchanel range (for example Po for service module on Cat6k).
     '''
-    pc_list = []
-    cli_param = "sh etherchannel"
+    cli_param = "sh etherchannel summary"
     cli_output = handler.send_command(cli_param)
-    cli_out_split = cli_output.split('----------')
-    for block in cli_out_split:
-        int_dict = {}
-        int_dict['pc_number'] = find_regex_value_in_string(block, re.compile(r"Group:\s+([0-9]+)\s+\n"))
-        if int_dict['pc_number']:       # port-channel number found
-            int_dict['int_list'] = []
-            cli_param = "sh etherchannel " + int_dict['pc_number'] + " detail"
-            cli_output = handler.send_command(cli_param)
-            cli_out_split2 = cli_output.split('------------')
-            for block2 in cli_out_split2:       # search for interfaces in specific port-channel
-                iface = find_regex_value_in_string(block2, re.compile(r"Port:\s+([A-Za-z0-9/\.]+)\n"))
-                if iface:       # interface found
-                    int_dict['int_list'].append(iface)
-            pc_list.append(int_dict)
+    return parse_sh_etherchannel_summary(cli_output)
+
+RE_PORT_CHANNEL_NXOS = re.compile(r"port-channel([0-9]+)\n")
+RE_PORT_CHANNEL_MEMBER_NXOS = re.compile(r"([\sA-Za-z:]+)?Ethernet([0-9/]+)\s+\[([a-z\s]+)\]\s+\[([a-z]+)\]")
 
-    return pc_list
 
 def get_cli_sh_etherchannel_summary_nxos(handler):
     '''
@@ -1013,13 +1524,13 @@ def get_cli_sh_etherchannel_summary_nxos(handler):
     cli_out_split = cli_output.split('\n\n')
     for block in cli_out_split:
         int_dict = {}
-        intstr = re.match(r"port-channel([0-9]+)\n", block)
+        intstr = RE_PORT_CHANNEL_NXOS.match(block)
         if intstr:
             int_dict['pc_number'] = intstr.group(1)
             int_dict['int_list'] = []
             cli_out_split2 = block.split('\n')
             for line in cli_out_split2:
-                intstr = re.match(r"([\sA-Za-z:]+)?Ethernet([0-9/]+)\s+\[([a-z\s]+)\]\s+\[([a-z]+)\]", line)
+                intstr = RE_PORT_CHANNEL_MEMBER_NXOS.match(line)
                 if intstr:
                     int_dict['int_list'].append("Ethernet"+intstr.group(2))
             pc_list.append(int_dict)
@@ -1048,30 +1559,46 @@ def get_cli_sh_vpc_nxos(handler):
             vpc_list.append(int_dict)
     return vpc_list
 
-def get_cli_sh_int_status(handler):
+INT_STATUS_FIELDS = ('status', 'vlan', 'duplex', 'speed', 'type')      # columns from Status to the end of line
+
+
+def parse_sh_int_status(cli_output):
     '''
+    Parses output of sh interface status, IOS and NX-OS format.
+    Offsets of columns Name and Status are read from the header line, so description (Name) may contain any characters.
+    The rest of the row is split by spaces, Duplex and Speed are right-aligned and don't start at header offset
+    (a-full a-1000), Type is the remainder of the row (Not Present) and is empty for port-channels on IOS.
+    Returns dict canonical port name (see canonical_interface_name, port of unknown type is kept as displayed) :
+    dict with port (as displayed), name, status, vlan, duplex, speed, type
+
     '''
-    int_stat = []
-    cli_param = "sh interface status"
-    cli_output = handler.send_command(cli_param)
-    cli_out_split = cli_output.split('\n')      # split output into lines
-    for line in cli_out_split:
-        # Eth1/2        c6506_hra_vss_2/3/ connected trunk     full    10G     10Gbase-SR
-        int_dict = {}
-        intstr = re.match(r"([A-Za-z0-9/]+)\s+(..................)\s+([A-Za-z]+)\s+([A-Za-z0-9]+)\s+([A-Za-z]+)\s+([A-Za-z0-9]+)\s+(.*)$", line)
-        if intstr:
-            if intstr.group(1) == 'Port':  # line with column names
-                continue
-            int_dict['port'] = intstr.group(1)
-            int_dict['name'] = intstr.group(2).rstrip() # remove trailing spaces, it's shortened (18 char only) version of Description field
-            int_dict['status'] = intstr.group(3)
-            int_dict['vlan'] = intstr.group(4)
-            int_dict['duplex'] = intstr.group(5)
-            int_dict['speed'] = intstr.group(6)
-            int_dict['type'] = intstr.group(7)
-            int_stat.append(int_dict)
+    int_stat = {}
+    name_start = None           # offsets of columns Name and Status, None until header line is found
+    status_start = None
+    for line in cli_output.splitlines():
+        # Port      Name               Status       Vlan       Duplex  Speed Type
+        if line.startswith('Port ') and 'Name' in line and 'Status' in line:
+            name_start = line.index('Name')
+            status_start = line.index('Status')
+            continue
+        if name_start is None or not line.strip() or line.startswith('-'):
+            continue
+        # Gi1/0/2   AP room 12, 1.fl   connected    10         a-full a-1000 10/100/1000BaseTX
+        port = line.split(None, 1)[0]
+        fields = line[status_start:].split(None, 4)
+        if len(line) <= status_start or line[status_start - 1] != ' ' or len(fields) < 2:
+            continue            # not a row of the table
+        int_dict = {'port': port, 'name': line[max(name_start, len(port) + 1):status_start].strip()}
+        int_dict.update(zip(INT_STATUS_FIELDS, fields + [''] * (len(INT_STATUS_FIELDS) - len(fields))))
+        int_stat[canonical_interface_name(port) or port] = int_dict
     return int_stat
 
+def get_cli_sh_int_status(handler):
+    '''
+    Returns dict canonical port name : status of the port, see parse_sh_int_status
+    '''
+    return parse_sh_int_status(handler.send_command("sh interface status"))
+
 def get_cli_sh_int_description_dict(handler):
     """
     Returns dictionary of interface_name : {descr: 'Description'}
@@ -4,10 +4,13 @@ import sys
 import getpass
 import getopt
 import os
+import sqlite3
 import yaml
 import ipaddress
 
 import cscofunc
+import discoverfunc
+import snmpfunc
 
 
 def load_cfg_file(config_file):
@@ -49,24 +52,20 @@ def print_devices_to_file(device_list, file):
     data_file.write("sep=;\n")
     data_file.write("Device;IP;Platform;Version;Host\n")
     for device in device_list:
-        if 'Phone' in device['capability']:
-            capab = 'Phone'
-        elif 'Router' in device['capability'] and 'Switch' in device['capability']:
-            capab = 'SwitchRouter'
-        elif 'Router' in device['capability']:
-            capab = 'Router'
-        elif 'Switch' in device['capability']:
-            capab = 'Switch'
-        elif 'Trans-Bridge' in device['capability']:
-            capab = 'Trans-Bridge'
-        elif 'Host' in device['capability']:
-            capab = 'Host'
-        else:
-            capab = ''
+        capab = discoverfunc.get_device_class(device)
         data_file.write(device['device_id']+';'+device['ip_addr']+';'+device['platform_id']+';'+device['version']+';'+capab)
         data_file.write("\n")
     
     data_file.close()
+def save_graph(registry, file):
+    """
+    Saves topology of registry into file
+    """
+    try:
+        registry.topology.save(file)
+    except IOError:
+        print("Unable to create the file", file)
+
 def main():
     ''' Main
     '''
@@ -75,25 +74,51 @@ def main():
     Usage: discoverdevices.py [OPTIONS]
     -h,     --help                      display help
     -c,     --cfgfile                   yaml config file                     
-    -o,     --outfile                   csv outputfile
+    -o,     --outfile                   outputfile, devices are written into it as soon as they are found
+    -f,     --format                    format of outputfile, csv (default) or ndjson
+    -w,     --workers                   number of concurrent SSH sessions, default 10
+    -k,     --checkpoint                checkpoint file (SQLite), state of discovery is saved into it
+    -r,     --resume                    continue discovery saved in checkpoint file
+    -d,     --cache                     cache file (SQLite) of results of contacted devices
+    -m,     --max-age                   max. age of used cache entries in seconds, default 86400
+    -g,     --graph                     topology file, links between analyzed devices and their neighbors are saved into it
+    -t,     --max-time                  discovery stops after specified number of seconds
+    -n,     --max-devices               discovery stops after specified number of analyzed devices
+    -l,     --listen                    after discovery, listen for syslog messages on UDP port and rediscover changed devices
+    -s,     --snmp                      devices are contacted by SNMP (communities from config file) instead of SSH
+    -p,     --platform-cache            platform cache file (SQLite) shared with other tools (i.e. ~/.nettools-platform.db), platforms of found devices are saved into it
     '''
     username = ''
     pswd = ''
-    found_devices = []
     passwords = {}
     config_file = ''
     output_file = ''
+    output_format = 'csv'
+    writer = None
     seeds = []
     ranges = []
+    workers = discoverfunc.DEFAULT_WORKERS
+    checkpoint_file = ''
+    resume = False
+    checkpoint = None
+    cache_file = ''
+    max_age = discoverfunc.DEFAULT_CACHE_MAX_AGE
+    cache = None
+    cred_sets = []
+    graph_file = ''
+    max_time = None
+    max_devices = None
+    listen_port = 0
+    use_snmp = False
+    probe_func = discoverfunc.probe_device
+    platform_file = ''
 
-    big_cdp_dict = {}
-    big_cdp_dict['nodes'] = []
-    big_cdp_dict['hosts'] = []
+    registry = discoverfunc.DeviceRegistry()
     
     argv = sys.argv[1:]
 
     try:
-        opts, args = getopt.getopt(argv, "hc:o:", ["help", "cfgfile=", "outfile="])
+        opts, args = getopt.getopt(argv, "hc:o:f:w:k:rd:m:g:t:n:l:sp:", ["help", "cfgfile=", "outfile=", "format=", "workers=", "checkpoint=", "resume", "cache=", "max-age=", "graph=", "max-time=", "max-devices=", "listen=", "snmp", "platform-cache="])
     except getopt.GetoptError:
         print(usage_str)
         sys.exit(2)
@@ -106,11 +131,71 @@ def main():
             config_file = arg
         elif opt in ("-o", "--outfile"):
             output_file = arg
+        elif opt in ("-f", "--format"):
+            output_format = arg
+            if output_format not in discoverfunc.OUTPUT_FORMATS:
+                print("Invalid output format:", arg)
+                sys.exit(2)
+        elif opt in ("-w", "--workers"):
+            try:
+                workers = int(arg)
+            except ValueError:
+                workers = 0
+            if workers < 1:
+                print("Invalid number of workers:", arg)
+                sys.exit(2)
+        elif opt in ("-k", "--checkpoint"):
+            checkpoint_file = arg
+        elif opt in ("-r", "--resume"):
+            resume = True
+        elif opt in ("-d", "--cache"):
+            cache_file = arg
+        elif opt in ("-m", "--max-age"):
+            try:
+                max_age = int(arg)
+            except ValueError:
+                print("Invalid max. age:", arg)
+                sys.exit(2)
+        elif opt in ("-g", "--graph"):
+            graph_file = arg
+        elif opt in ("-t", "--max-time"):
+            try:
+                max_time = int(arg)
+            except ValueError:
+                print("Invalid max. time:", arg)
+                sys.exit(2)
+        elif opt in ("-n", "--max-devices"):
+            try:
+                max_devices = int(arg)
+            except ValueError:
+                print("Invalid max. number of devices:", arg)
+                sys.exit(2)
+        elif opt in ("-l", "--listen"):
+            try:
+                listen_port = int(arg)
+            except ValueError:
+                listen_port = 0
+            if not 0 < listen_port < 65536:
+                print("Invalid UDP port:", arg)
+                sys.exit(2)
+        elif opt in ("-s", "--snmp"):
+            use_snmp = True
+        elif opt in ("-p", "--platform-cache"):
+            platform_file = arg
 
 
     if not config_file:
         print("Config file not specified")
         sys.exit(2)
+    if resume and not checkpoint_file:
+        print("Checkpoint file not specified")
+        sys.exit(2)
+    if resume and not os.path.isfile(checkpoint_file):
+        print("Checkpoint file", checkpoint_file, "doesn't exist")
+        sys.exit(2)
+    if use_snmp and not snmpfunc.is_snmp_available():
+        print("pysnmp is not installed, SNMP can't be used")
+        sys.exit(2)
 
     config_dict = load_cfg_file(config_file)
     # sanity checks
@@ -118,6 +203,20 @@ def main():
 
     
 
+    if use_snmp:
+        communities = config_dict.get('snmp', {}).get('communities') or [getpass.getpass("SNMP community:")]
+        cred_sets = [(community, '') for community in communities]        # usernames of seeds and ranges are not used
+        probe_func = snmpfunc.probe_device_snmp
+    elif 'credentials' in config_dict:
+        for cred in config_dict['credentials']:
+            if 'username' not in cred:
+                print('Username is not specified in credentials')
+                sys.exit(1)
+            if not cred['username'] in passwords:
+                passwords[cred['username']] = getpass.getpass("Password for "+cred['username']+":")
+            cred_sets.append((cred['username'], passwords[cred['username']]))
+    credentials = discoverfunc.CredentialStore(cred_sets, save_usernames=not use_snmp)       # SNMP community is not saved in checkpoint
+
     if 'seeds' in config_dict:
         for seed in config_dict['seeds']:
             if 'ip' not in seed:
@@ -130,12 +229,33 @@ def main():
                 level = seed['level']
             else:
                 seed['level'] = 5
-            if not seed['username'] in passwords:
-                passwords[seed['username']] = getpass.getpass("Password for "+seed['username']+":")
-            seed['password'] = passwords[seed['username']]
+            if use_snmp:
+                seed.pop('username', None)
+            elif 'username' in seed:
+                if not seed['username'] in passwords:
+                    passwords[seed['username']] = getpass.getpass("Password for "+seed['username']+":")
+                seed['password'] = passwords[seed['username']]
+            elif not cred_sets:
+                print('Username is not specified in config file')
+                sys.exit(1)
             seeds.append(seed)
 
-        big_cdp_dict = cscofunc.get_device_list_cdp_seed(seeds, big_cdp_dict)
+    if checkpoint_file:
+        checkpoint = discoverfunc.DiscoveryCheckpoint(checkpoint_file, resume)
+        checkpoint.load_registry(registry)
+    if cache_file:
+        cache = discoverfunc.DeviceCache(cache_file, max_age)
+    if output_file:
+        try:
+            writer = discoverfunc.DeviceWriter(output_file, output_format)
+        except IOError:
+            print("Unable to create the file", output_file)
+            sys.exit(1)
+        registry.set_writer(writer)
+
+    budget = discoverfunc.DiscoveryBudget(max_time, max_devices)
+    if seeds:
+        registry = discoverfunc.get_device_list_cdp_bfs(seeds, registry, workers, checkpoint, cache, credentials, budget, probe_func)
 
     if 'ranges' in config_dict:
         for ip_range in config_dict['ranges']:
@@ -147,19 +267,58 @@ def main():
             except ValueError:
                 print('Address/mask is invalid for IPv4:', ip_range['range'])
                 sys.exit(1)
-            if not ip_range['username'] in passwords:
-                passwords[ip_range['username']] = getpass.getpass("Password for "+ip_range['username']+":")
-            ip_range['password'] = passwords[ip_range['username']]
+            if ip_range.get('probe', discoverfunc.DEFAULT_PROBE) not in discoverfunc.PROBE_TYPES:
+                print('Invalid probe type:', ip_range['probe'])
+                sys.exit(1)
+            if ip_range.get('known', discoverfunc.DEFAULT_KNOWN) not in discoverfunc.KNOWN_POLICIES:
+                print('Invalid known value:', ip_range['known'])
+                sys.exit(1)
+            if use_snmp:
+                ip_range.pop('username', None)
+            elif 'username' in ip_range:
+                if not ip_range['username'] in passwords:
+                    passwords[ip_range['username']] = getpass.getpass("Password for "+ip_range['username']+":")
+                ip_range['password'] = passwords[ip_range['username']]
+            elif not cred_sets:
+                print('Username is not specified in config file')
+                sys.exit(1)
             ranges.append(ip_range)
-        big_cdp_dict = cscofunc.get_device_list_cdp_subnet(ranges, big_cdp_dict)
-    for item in big_cdp_dict['hosts']:
-        found_devices.append(item)
-    for item in big_cdp_dict['nodes']:
-        found_devices.append(item)
-    if not output_file:
-        print_devices(found_devices)            # print output to screen
-    else:
-        print_devices_to_file(found_devices, output_file)       # print output to file
+        registry = discoverfunc.get_device_list_cdp_range(ranges, registry, workers, checkpoint, cache, credentials, budget, probe_func)
+    if checkpoint:
+        checkpoint.close()
+        registry.checkpoint = None
+    if graph_file:
+        save_graph(registry, graph_file)
+    if platform_file:
+        try:
+            platform_cache = cscofunc.PlatformCache(platform_file)
+            discoverfunc.save_platforms(registry, platform_cache)
+            platform_cache.close()
+        except sqlite3.Error as err:
+            print("Unable to save platforms into", platform_file, ":", err)
+    if not writer:
+        print_devices(registry.host_list() + registry.node_list())            # print output to screen
+    if budget.unexplored or budget.unexplored_ranges:
+        print("Budget exhausted after", budget.devices, "devices, not explored:")
+        for (device_id, ip_addr) in budget.unexplored:
+            print("- device", device_id, ip_addr)
+        for ip_range in budget.unexplored_ranges:
+            print("- range", ip_range)
+
+    if listen_port:
+        def topology_changed(device_id, added, removed):
+            ''' Prints change and saves topology '''
+            print("Topology change on", device_id, "added:", ', '.join(sorted(added)), "removed:", ', '.join(sorted(removed)))
+            if graph_file:
+                save_graph(registry, graph_file)
+        print("Listening for syslog messages on UDP port", listen_port)
+        registry = discoverfunc.get_device_list_cdp_events(registry, listen_port, workers, credentials, cache, topology_changed, probe_func)
+
+    if cache:
+        cache.close()
+    if writer:
+        writer.close()          # devices were written during discovery
+        print("Found", len(registry), "nodes,", len(registry.hosts), "hosts, duplicate host records suppressed:", registry.duplicate_hosts)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,1198 @@
+''' Module implements discovery of network devices using CDP
+
+ '''
+
+# pylint: disable=C0301, C0103
+
+import asyncio
+import heapq
+import ipaddress
+import json
+import platform
+import re
+import sqlite3
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from netmiko import ConnectHandler
+from netmiko.ssh_exception import NetMikoTimeoutException, NetMikoAuthenticationException
+from paramiko.ssh_exception import SSHException
+
+import cscofunc
+from topology import Topology
+
+
+DEFAULT_WORKERS = 10        # number of concurrent SSH sessions used by discovery
+DEFAULT_PROBE = 'tcp'       # how range hosts are probed, 'tcp' (connection to port 22) or 'icmp' (ping)
+DEFAULT_PROBE_TIMEOUT = 1.0     # seconds
+DEFAULT_PROBE_CONCURRENCY = 500     # number of concurrent probes
+DEFAULT_KNOWN = 'defer'     # how range IPs of nodes known from CDP are processed, 'defer' (contacted for CDP table after the sweep) or 'skip'
+KNOWN_POLICIES = ('defer', 'skip')
+PROBE_TYPES = ('tcp', 'icmp')
+DEFAULT_CACHE_MAX_AGE = 86400       # seconds, cached results of devices older than this are not used
+OUTPUT_FORMATS = ('csv', 'ndjson')
+PRIORITY_PLATFORMS = ('N9K', 'N7K', 'N77', 'N5K', 'N6K', 'WS-C65', 'WS-C68', 'C68', 'WS-C45', 'C9400', 'C9500', 'C9600')     # core/distribution platforms, analyzed first
+DEFAULT_CRED_PREFIX = 24        # credential set which succeeded is tried first on other devices of the subnet with this prefix length
+DEFAULT_SYSLOG_PORT = 514
+DEFAULT_EVENT_HOLD = 5.0        # seconds, events from the same device received within this time are processed together
+TOPOLOGY_EVENT_PATTERN = re.compile(r"%(CDP-\d-\w+|LINK-\d-UPDOWN|LINEPROTO-\d-UPDOWN|ETHPORT-\d-IF_(UP|DOWN)\w*)")
+
+
+class HostRecord(object):
+    """
+    Compact record of end node (phone, ...) found in CDP table. Values are accessible as keys of dict (record['device_id']),
+    so the record can be used where CDP entry dict is expected. Repeating strings (platform, version) are interned
+    and capability tuples are shared.
+    """
+
+    __slots__ = ('device_id', 'ip_addr', 'platform_id', 'version', 'capability', 'intf_id', 'port_id')
+
+    _capabilities = {}      # capability tuple : the same tuple, shared by all records
+
+    def __init__(self, device):
+        """
+        :param device: CDP entry dict (see cscofunc.get_cli_sh_cdp_neighbor) or dict returned by as_dict
+        """
+        self.device_id = device['device_id']
+        self.ip_addr = device['ip_addr']
+        self.platform_id = sys.intern(device['platform_id'])
+        self.version = sys.intern(device['version'])
+        capability = tuple(device['capability'])
+        self.capability = self._capabilities.setdefault(capability, capability)
+        self.intf_id = sys.intern(device.get('intf_id', ''))
+        self.port_id = sys.intern(device.get('port_id', ''))
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def get(self, key, default=None):
+        """
+        Returns value of key, default if key doesn't exist
+        """
+        return getattr(self, key, default)
+
+    def key(self):
+        """
+        Returns key identifying the host, (device_id, port of switch the host is connected to)
+        """
+        return (self.device_id, self.intf_id)
+
+    def as_dict(self):
+        """
+        Returns record as dict
+        """
+        result = {key: getattr(self, key) for key in self.__slots__}
+        result['capability'] = list(self.capability)
+        return result
+
+
+class DeviceRegistry(object):
+    """
+    Registry of discovered devices, replacement of big_cdp_dict lists.
+    Nodes (routers, switches, ...) are indexed by device_id and by management IP address, hosts (phones, ...) are kept
+    as HostRecords indexed by device_id and switch port, the same host found again is counted in duplicate_hosts only.
+    Node is dictionary with structure defined in cscofunc.get_cli_sh_cdp_neighbor or cscofunc.get_device_info,
+    extended by state keys 'found_via_cdp' and 'was_cdp_analyzed'.
+    """
+
+    def __init__(self):
+        self.nodes = {}         # device_id : node
+        self.ip_index = {}      # management IP : device_id
+        self.hosts = {}         # (device_id, switch port) : HostRecord, record is None if writer is set
+        self.host_ips = set()   # IP addresses of hosts
+        self.duplicate_hosts = 0        # number of suppressed duplicate host records
+        self.checkpoint = None  # DiscoveryCheckpoint where changes are saved
+        self.writer = None      # DeviceWriter where new devices are written
+        self.topology = Topology()      # links from CDP tables of analyzed nodes
+
+    def __contains__(self, device_id):
+        return device_id in self.nodes
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def get(self, device_id):
+        """
+        Returns node with device_id, None if not found
+        """
+        return self.nodes.get(device_id)
+
+    def get_by_ip(self, ip_addr):
+        """
+        Returns node with management IP ip_addr, None if not found
+        """
+        device_id = self.ip_index.get(ip_addr)
+        if device_id is None:
+            return None
+        return self.nodes[device_id]
+
+    def add_node(self, device, found_via_cdp=True):
+        """
+        Adds node if it is not already in registry
+
+        :param device: CDP entry or device info dict
+        :param found_via_cdp: False if device was not found in CDP table of other device
+        :return Boolean: True if device was added
+        """
+        if device['device_id'] in self.nodes:
+            return False
+        device.setdefault('found_via_cdp', found_via_cdp)
+        device.setdefault('was_cdp_analyzed', False)
+        self.nodes[device['device_id']] = device
+        if device.get('ip_addr'):
+            self.ip_index.setdefault(device['ip_addr'], device['device_id'])
+        if self.checkpoint:
+            self.checkpoint.save_node(device)
+        if self.writer:
+            self.writer.write(device)
+        return True
+
+    def add_host(self, device):
+        """
+        Adds end node (phone, ...) if it is not already in registry
+
+        :param device: CDP entry dict or HostRecord
+        :return Boolean: True if device was added
+        """
+        record = device if isinstance(device, HostRecord) else HostRecord(device)
+        key = record.key()
+        if key in self.hosts:
+            self.duplicate_hosts += 1
+            return False
+        if record.ip_addr:
+            self.host_ips.add(record.ip_addr)
+        if self.writer:
+            self.writer.write(record)
+            self.hosts[key] = None
+        else:
+            self.hosts[key] = record
+        if self.checkpoint:
+            self.checkpoint.save_host(record)
+        return True
+
+    def is_analyzed(self, device_id):
+        """
+        Was node analyzed for CDP information ?
+        """
+        return device_id in self.nodes and self.nodes[device_id]['was_cdp_analyzed']
+
+    def mark_analyzed(self, device_id, cdp_list=None):
+        """
+        Sets info that node was analyzed for CDP information, links from its CDP table are added to topology
+        """
+        self.nodes[device_id]['was_cdp_analyzed'] = True
+        if cdp_list is not None:
+            self.topology.add_links(device_id, cdp_list)
+        if self.checkpoint:
+            self.checkpoint.save_node(self.nodes[device_id])
+            if cdp_list is not None:
+                self.checkpoint.save_links(device_id, cdp_list)
+
+    def node_list(self):
+        """
+        Returns list of all nodes
+        """
+        return list(self.nodes.values())
+
+    def host_list(self):
+        """
+        Returns list of all hosts (HostRecords), hosts written by writer are not included
+        """
+        return [record for record in self.hosts.values() if record is not None]
+
+    def set_writer(self, writer):
+        """
+        Writes devices already in registry and each device added later into writer.
+        Host records are not kept in registry any more, only their keys.
+        """
+        for device in self.host_list() + self.node_list():
+            writer.write(device)
+        self.hosts = dict.fromkeys(self.hosts)
+        self.writer = writer
+
+    def is_host_ip(self, ip_addr):
+        """
+        Is IP address address of host (phone, ...) ?
+        """
+        return ip_addr in self.host_ips
+
+
+def get_device_class(device):
+    """
+    Returns class of device derived from its CDP capabilities
+
+    :param device: CDP entry or device info dict
+    :return str: Phone, SwitchRouter, Router, Switch, Trans-Bridge, Host or empty string
+    """
+    capability = device['capability']
+    if 'Phone' in capability:
+        return 'Phone'
+    if 'Router' in capability and 'Switch' in capability:
+        return 'SwitchRouter'
+    for capab in ('Router', 'Switch', 'Trans-Bridge', 'Host'):
+        if capab in capability:
+            return capab
+    return ''
+
+
+class DeviceWriter(object):
+    """
+    Writes found devices into file as soon as they are found, each device is flushed immediately.
+    Format csv is the same as output of discoverdevices.py, ndjson contains one JSON object per line.
+    """
+
+    def __init__(self, filename, output_format='csv'):
+        """
+        :param filename: output file
+        :param output_format: csv or ndjson
+        """
+        self.output_format = output_format
+        self.file = open(filename, 'w')
+        if output_format == 'csv':
+            self.file.write("sep=;\n")
+            self.file.write("Device;IP;Platform;Version;Host\n")
+            self.file.flush()
+
+    def write(self, device):
+        """
+        Writes one device
+
+        :param device: CDP entry or device info dict
+        """
+        if self.output_format == 'csv':
+            self.file.write(';'.join((device['device_id'], device['ip_addr'], device['platform_id'], device['version'], get_device_class(device))) + "\n")
+        else:
+            item = {key: device[key] for key in ('device_id', 'ip_addr', 'platform_id', 'version', 'capability')}
+            item['class'] = get_device_class(device)
+            self.file.write(json.dumps(item) + "\n")
+        self.file.flush()
+
+    def close(self):
+        """
+        Closes the file
+        """
+        self.file.close()
+
+
+class DiscoveryCheckpoint(object):
+    """
+    State of discovery saved in SQLite file, so interrupted discovery can be resumed.
+    Contains found devices (nodes, hosts), jobs (devices scheduled for CDP analysis with their state and level, CDP table
+    of analyzed devices) and IP ranges which were already processed. Passwords are not saved, only usernames
+    (nothing when SNMP communities are used instead of credentials, see CredentialStore.save_usernames).
+    """
+
+    def __init__(self, filename, resume=False):
+        """
+        :param filename: SQLite file
+        :param resume: False if content of existing file is to be deleted
+        """
+        self.conn = sqlite3.connect(filename)
+        if not resume:
+            for table in ('nodes', 'hosts', 'jobs', 'ranges', 'links'):
+                self.conn.execute("DROP TABLE IF EXISTS " + table)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS nodes (device_id TEXT PRIMARY KEY, data TEXT)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS hosts (id INTEGER PRIMARY KEY, data TEXT)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS jobs (device_id TEXT PRIMARY KEY, ip_addr TEXT, os_type TEXT, username TEXT, level INTEGER, state TEXT, cdp TEXT)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS ranges (range TEXT PRIMARY KEY)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS links (device_id TEXT, intf_id TEXT, neighbor_id TEXT, port_id TEXT)")
+        self.conn.commit()
+
+    def load_registry(self, registry):
+        """
+        Loads saved nodes and hosts into registry, further changes of registry are saved into checkpoint
+        """
+        for (data,) in self.conn.execute("SELECT data FROM nodes"):
+            registry.add_node(json.loads(data))
+        for (data,) in self.conn.execute("SELECT data FROM hosts ORDER BY id"):
+            registry.add_host(json.loads(data))
+        for row in self.conn.execute("SELECT device_id, intf_id, neighbor_id, port_id FROM links"):
+            registry.topology.add_link(*row)
+        registry.checkpoint = self
+
+    def load_jobs(self):
+        """
+        Returns list of saved jobs, jobs with higher level (closer to seed) first
+
+        :return jobs: list of (device_id, ip_addr, os_type, username, level, state, cdp_list), state is queued, done or failed
+        """
+        jobs = []
+        for row in self.conn.execute("SELECT device_id, ip_addr, os_type, username, level, state, cdp FROM jobs ORDER BY level DESC"):
+            cdp_list = json.loads(row[6]) if row[6] else None
+            jobs.append(row[:6] + (cdp_list,))
+        return jobs
+
+    def save_node(self, device):
+        """
+        Saves (new or changed) node
+        """
+        self.conn.execute("INSERT OR REPLACE INTO nodes (device_id, data) VALUES (?, ?)", (device['device_id'], json.dumps(device)))
+
+    def save_host(self, device):
+        """
+        Saves end node
+
+        :param device: HostRecord
+        """
+        self.conn.execute("INSERT INTO hosts (data) VALUES (?)", (json.dumps(device.as_dict()),))
+
+    def save_links(self, device_id, cdp_list):
+        """
+        Saves links from CDP table of analyzed node
+        """
+        self.conn.executemany("INSERT INTO links (device_id, intf_id, neighbor_id, port_id) VALUES (?, ?, ?, ?)",
+                              [(device_id, item['intf_id'], item['device_id'], item['port_id'].strip()) for item in cdp_list])
+
+    def save_job(self, device_id, ip_addr, os_type, username, level):
+        """
+        Saves device scheduled for CDP analysis. Only level is updated if device is already saved.
+        """
+        self.conn.execute("INSERT INTO jobs (device_id, ip_addr, os_type, username, level, state) VALUES (?, ?, ?, ?, ?, 'queued') "
+                          "ON CONFLICT(device_id) DO UPDATE SET level = excluded.level", (device_id, ip_addr, os_type, username, level))
+
+    def job_done(self, device_id, cdp_list):
+        """
+        Saves CDP table of analyzed device
+        """
+        self.conn.execute("UPDATE jobs SET state = 'done', cdp = ? WHERE device_id = ?", (json.dumps(cdp_list), device_id))
+
+    def job_failed(self, device_id):
+        """
+        Saves info that device was not analyzed (unable to connect)
+        """
+        self.conn.execute("UPDATE jobs SET state = 'failed' WHERE device_id = ?", (device_id,))
+
+    def is_range_done(self, ip_range):
+        """
+        Was IP range (string, i.e. 10.1.0.0/24) already processed ?
+        """
+        return self.conn.execute("SELECT 1 FROM ranges WHERE range = ?", (ip_range,)).fetchone() is not None
+
+    def range_done(self, ip_range):
+        """
+        Saves info that IP range (string) was processed
+        """
+        self.conn.execute("INSERT OR IGNORE INTO ranges (range) VALUES (?)", (ip_range,))
+
+    def commit(self):
+        """
+        Writes saved changes into the file
+        """
+        self.conn.commit()
+
+    def close(self):
+        """
+        Writes saved changes and closes the file
+        """
+        self.conn.commit()
+        self.conn.close()
+
+
+class DiscoveryBudget(object):
+    """
+    Limits of discovery (time, number of analyzed devices). When the budget is exhausted, no new device is contacted,
+    sessions which are already open are finished. Devices and ranges which were not explored are saved in the budget.
+    """
+
+    def __init__(self, max_time=None, max_devices=None):
+        """
+        :param max_time: seconds from creation of the budget, None means unlimited
+        :param max_devices: max. number of analyzed devices, None means unlimited
+        """
+        self.max_time = max_time
+        self.max_devices = max_devices
+        self.started = time.time()
+        self.devices = 0            # number of analyzed (contacted or taken from cache) devices
+        self.unexplored = []        # (device_id, ip) of devices which were scheduled but not analyzed
+        self.unexplored_ranges = []     # ranges which were not processed completely
+
+    def is_exhausted(self):
+        """
+        Is time or device budget exhausted ?
+        """
+        if self.max_devices is not None and self.devices >= self.max_devices:
+            return True
+        return self.max_time is not None and time.time() - self.started >= self.max_time
+
+    def device_analyzed(self):
+        """
+        Counts analyzed device
+        """
+        self.devices += 1
+
+
+class DeviceCache(object):
+    """
+    Results of probe_device (device info and CDP table) saved in SQLite file, key is IP address of the device.
+    Results which are not older than max_age seconds are used instead of contacting the device.
+    """
+
+    def __init__(self, filename, max_age=DEFAULT_CACHE_MAX_AGE):
+        """
+        :param filename: SQLite file, it is created if it doesn't exist
+        :param max_age: max. age of used entries in seconds
+        """
+        self.max_age = max_age
+        self.conn = sqlite3.connect(filename)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS devices (ip_addr TEXT PRIMARY KEY, info TEXT, cdp TEXT, timestamp REAL)")
+        self.conn.commit()
+
+    def get(self, ip_addr, identity=True):
+        """
+        Returns cached result of probe_device
+
+        :param ip_addr: IP address of the device
+        :param identity: True if device info is needed (entry without device info is not used)
+        :return (device_info, cdp_list): None if entry doesn't exist or is too old
+        """
+        row = self.conn.execute("SELECT info, cdp, timestamp FROM devices WHERE ip_addr = ?", (ip_addr,)).fetchone()
+        if not row or time.time() - row[2] > self.max_age:
+            return None
+        if identity and not row[0]:
+            return None
+        device_info = json.loads(row[0]) if row[0] else None
+        return (device_info, json.loads(row[1]))
+
+    def put(self, ip_addr, device_info, cdp_list):
+        """
+        Saves result of probe_device. Device info already saved is kept if device_info is None.
+        """
+        info = json.dumps(device_info) if device_info else None
+        self.conn.execute("INSERT INTO devices (ip_addr, info, cdp, timestamp) VALUES (?, ?, ?, ?) "
+                          "ON CONFLICT(ip_addr) DO UPDATE SET info = COALESCE(excluded.info, info), cdp = excluded.cdp, timestamp = excluded.timestamp",
+                          (ip_addr, info, json.dumps(cdp_list), time.time()))
+        self.conn.commit()
+
+    def close(self):
+        """
+        Closes the file
+        """
+        self.conn.close()
+
+
+class CredentialStore(object):
+    """
+    Ordered credential sets (username, password) used for discovery. Set which succeeded is remembered per device and
+    per subnet and it is tried first on the same device and on other devices of the subnet.
+    Store is changed only by the thread which merges results, workers get list of candidates.
+    """
+
+    def __init__(self, cred_sets=None, prefix=DEFAULT_CRED_PREFIX, save_usernames=True):
+        """
+        :param cred_sets: list of (username, password) in order in which they are tried
+        :param prefix: prefix length of subnets
+        :param save_usernames: False if the first item of set is secret (SNMP community), it is not saved in checkpoint then
+        """
+        self.cred_sets = list(cred_sets or [])
+        self.prefix = prefix
+        self.save_usernames = save_usernames
+        self.by_device = {}     # device_id or IP address : (username, password)
+        self.by_subnet = {}     # subnet : (username, password)
+
+    def get_subnet(self, ip_addr):
+        """
+        Returns subnet of IP address, None if IP address is invalid
+        """
+        try:
+            return ipaddress.ip_network(ip_addr + '/' + str(self.prefix), strict=False)
+        except ValueError:
+            return None
+
+    def candidates(self, ip_addr, device_id=None, preferred=None):
+        """
+        Returns list of credential sets in order in which they should be tried on the device: set which succeeded
+        on the device, set which succeeded in its subnet, preferred set, remaining sets
+
+        :param ip_addr: IP address of the device
+        :param device_id: device_id if known
+        :param preferred: (username, password) e.g. set of seed or range, None if not specified
+        :return cred_list:
+        """
+        result = []
+        for creds in [self.by_device.get(device_id), self.by_device.get(ip_addr), self.by_subnet.get(self.get_subnet(ip_addr)), preferred] + self.cred_sets:
+            if creds and creds not in result:
+                result.append(creds)
+        return result
+
+    def get_saved_username(self, creds):
+        """
+        Returns username of credential set which may be saved in checkpoint, None if creds is None or usernames are secret
+        """
+        return get_username(creds) if self.save_usernames else None
+
+    def learned(self, ip_addr, creds, device_id=None):
+        """
+        Remembers credential set which succeeded on the device
+        """
+        self.by_device[ip_addr] = creds
+        if device_id:
+            self.by_device[device_id] = creds
+        subnet = self.get_subnet(ip_addr)
+        if subnet:
+            self.by_subnet[subnet] = creds
+
+
+def open_session(ip_addr, username, pswd):
+    """
+    Opens SSH session to the device
+
+    :param ip_addr: IP address of the device
+    :param username: for connection
+    :param pswd: password
+    :return net_connect: Netmiko handler, None if unable to connect
+    """
+    (net_connect, _) = open_session_creds(ip_addr, [(username, pswd)])
+    return net_connect
+
+
+def open_session_creds(ip_addr, cred_list, os_type=''):
+    """
+    Opens SSH session to the device, credential sets are tried in order until authentication succeeds.
+    Other sets are not tried if the device doesn't respond.
+
+    :param ip_addr: IP address of the device
+    :param cred_list: list of (username, password)
+    :param os_type: OS of the device if known, Netmiko device_type is chosen by it (see cscofunc.get_netmiko_device_type)
+    :return (net_connect, creds): Netmiko handler and credential set which succeeded, (None, None) if unable to connect
+    """
+    for (username, pswd) in cred_list:
+        try:
+            net_connect = ConnectHandler(device_type=cscofunc.get_netmiko_device_type(os_type), ip=ip_addr, username=username, password=pswd)
+        except NetMikoAuthenticationException:
+            print("- authentication failed on the device", ip_addr, ", username", username)
+            continue
+        except NetMikoTimeoutException:
+            print("- unable to connect to the device", ip_addr, ", timeout")
+            break
+        except (EOFError, SSHException):
+            print("- unable to connect to the device", ip_addr, ", error")
+            break
+        return (net_connect, (username, pswd))
+    return (None, None)
+
+
+def probe_device(ip_addr, cred_list, identity=True, os_type=''):
+    """
+    Collects information about the device (see cscofunc.get_device_info) and its CDP table in one SSH session.
+    Device info (sh version) tells the OS, so the proper CDP command is sent directly.
+
+    :param ip_addr: IP address of the device
+    :param cred_list: list of (username, password) tried in order, see CredentialStore.candidates
+    :param identity: False if device info is not needed (device is known from CDP), only CDP table is collected
+    :param os_type: OS of the device if known without device info ('NX-OS', ...), see get_cdp_os_type
+    :return (device_info, cdp_list, creds): (None, None, None) if unable to connect or OS of device is not recognized,
+            creds is credential set which succeeded
+    """
+    (net_connect, creds) = open_session_creds(ip_addr, cred_list, os_type)
+    if not net_connect:
+        return (None, None, None)
+    device_info = None
+    if identity:
+        device_info = cscofunc.get_cli_device_info(net_connect, ip_addr)
+        if not device_info:
+            net_connect.disconnect()
+            return (None, None, None)
+        os_type = device_info['os_type']
+    cdp_list = cscofunc.get_cli_sh_cdp_neighbor(net_connect, os_type)
+    net_connect.disconnect()
+    return (device_info, cdp_list, creds)
+
+
+def save_platforms(registry, platform_cache):
+    """
+    Saves platform of nodes whose OS is known (from device info or CDP entry) into platform cache, so other tools
+    don't need to probe the devices. Switch capability is taken from CDP entry.
+
+    :param registry: DeviceRegistry of found devices
+    :param platform_cache: cscofunc.PlatformCache
+    :return count: number of saved nodes
+    """
+    count = 0
+    for node in registry.node_list():
+        os_type = node.get('os_type') or get_cdp_os_type(node)
+        if not os_type or not cscofunc.is_ip_valid(node.get('ip_addr', '')):
+            continue
+        entry = {'ip_addr': node['ip_addr'], 'device_id': node['device_id'], 'os_type': os_type,
+                 'platform_id': node.get('platform_id', ''), 'version': node.get('version', '')}
+        if node.get('capability'):
+            entry['is_switch'] = 'Switch' in node['capability']
+        platform_cache.put(entry)
+        count += 1
+    return count
+
+
+def get_seed_creds(seed):
+    """
+    Returns credential set (username, password) of seed or range, None if username is not specified
+    """
+    if not seed.get('username'):
+        return None
+    return (seed['username'], seed['password'])
+
+
+def get_username(creds):
+    """
+    Returns username of credential set, None if creds is None
+    """
+    return creds[0] if creds else None
+
+
+def get_cdp_priority(device):
+    """
+    Returns priority class of device found by CDP, lower is analyzed first:
+    0 core/distribution platforms (see PRIORITY_PLATFORMS), 1 routers and L3 switches, 2 other devices
+
+    :param device: one cdp entry dict
+    :return int:
+    """
+    if device.get('platform_id', '').startswith(PRIORITY_PLATFORMS):
+        return 0
+    if 'Router' in device.get('capability', ()):
+        return 1
+    return 2
+
+
+def get_cdp_os_type(device):
+    """
+    Returns OS of CDP neighbor if it is recognizable from its CDP entry ('NX-OS'), otherwise ''
+
+    :param device: one cdp entry dict
+    :return os_type:
+    """
+    if device.get('software') == 'NX-OS':
+        return 'NX-OS'
+    return ''
+
+
+def is_cdp_device_to_be_contacted(device):
+    """
+    Is CDP neighbor router or switch with valid IP address, i.e. is it possible to continue discovery on it ?
+
+    :param device: one cdp entry dict
+    :return Boolean:
+    """
+    if 'Router' not in device['capability'] and 'Switch' not in device['capability']:
+        return False
+    if not cscofunc.is_ip_valid(device['ip_addr']):
+        print("Invalid IP address:", device['ip_addr'], "device:", device['device_id'])
+        return False
+    return True
+
+
+def get_device_list_cdp_bfs(seeds, registry, workers=DEFAULT_WORKERS, checkpoint=None, cache=None, credentials=None, budget=None, probe_func=probe_device):
+    """
+    Discovers network devices using CDP protocol. Breadth-first replacement of cscofunc.get_device_list_cdp_seed and
+    cscofunc.get_device_list_cdp_recur. Up to 'workers' devices are contacted concurrently, the results are merged
+    into registry by the calling thread only.
+    'level' has the same meaning as in get_device_list_cdp_recur, i.e. devices up to 'level' hops from the seed are analyzed for
+    CDP information and their neighbors are added to registry. Seed which was already analyzed is not processed, regardless of level.
+    If device is reached again by shorter path, its (already collected) CDP table is processed again with the higher level,
+    the device is not contacted again.
+    If checkpoint is specified, discovery continues from the state saved in it and the state is saved after each contacted device.
+    Registry must be loaded from the same checkpoint (DiscoveryCheckpoint.load_registry).
+    If cache is specified, fresh results saved in it are used instead of contacting the devices and new results are saved into it.
+    Device is contacted with credential set which succeeded on its parent (or seed set) unless credentials
+    know better set for the device or its subnet, the other sets from credentials are tried if authentication fails.
+    Devices waiting for free worker are ordered by priority class (see get_cdp_priority) and then by hop distance from seed.
+    When budget is exhausted, discovery stops and devices which were not analyzed are saved in budget.unexplored
+    (they stay queued in checkpoint).
+    Devices are contacted by probe_func, probe_device (SSH) by default, snmpfunc.probe_device_snmp can be used instead.
+
+    :param seeds: list of seeds (each item contains ip, level and optional username, password)
+    :param registry: DeviceRegistry of already found devices
+    :param workers: max. number of concurrent SSH sessions
+    :param checkpoint: DiscoveryCheckpoint or None
+    :param cache: DeviceCache or None
+    :param credentials: CredentialStore or None
+    :param budget: DiscoveryBudget or None
+    :param probe_func: function with the same parameters and return value as probe_device
+    :return registry: DeviceRegistry of found devices
+    """
+
+    depth = {}              # device_id : remaining level of recursion assigned to the device
+    cdp_of = {}             # device_id : CDP table of device analyzed during this run
+    creds_of = {}           # device_id : (username, password) tried first on the device, None if not known
+    frontier = []           # heap of devices waiting for free worker, items are (priority, -level, order, device_id, ip, os_type)
+    scheduled = set()       # device_ids which were put into frontier (devices which failed are not contacted again)
+    in_flight = {}          # future : (device_id, ip), device_id is None for seeds
+    passwords = {}          # username : password, passwords are not saved in checkpoint
+
+    if credentials is None:
+        credentials = CredentialStore()
+    if budget is None:
+        budget = DiscoveryBudget()
+
+    def schedule(nid, ip_addr, os_type, level):
+        ''' Puts device into frontier '''
+        priority = get_cdp_priority(registry.get(nid) or {})
+        heapq.heappush(frontier, (priority, -level, len(scheduled), nid, ip_addr, os_type))
+        scheduled.add(nid)
+
+    for (username, pswd) in credentials.cred_sets:
+        passwords[username] = pswd
+    for seed in seeds:
+        if seed.get('username'):
+            passwords[seed['username']] = seed['password']
+    if checkpoint:
+        for (nid, ip_addr, os_type, username, level, state, cdp_list) in checkpoint.load_jobs():
+            depth[nid] = level
+            creds_of[nid] = (username, passwords.get(username, '')) if username else None
+            if state == 'done':
+                cdp_of[nid] = cdp_list
+            elif state == 'queued':
+                schedule(nid, ip_addr, os_type, level)
+            scheduled.add(nid)
+
+    def expand(cdp_list, level, creds):
+        ''' Adds neighbors from cdp_list to registry and schedules those which are to be analyzed '''
+        stack = [(cdp_list, level, creds)]
+        while stack:
+            cdp_list, level, creds = stack.pop()
+            for item in cdp_list:
+                if cscofunc.is_cdp_device_endnode(item):
+                    continue
+                nid = item['device_id']
+                registry.add_node(item)
+                if level <= 0:
+                    continue
+                if nid not in cdp_of and registry.is_analyzed(nid):
+                    continue        # analyzed before this run
+                if depth.get(nid, -1) >= level - 1:
+                    continue        # already reached by path which is not longer
+                if not is_cdp_device_to_be_contacted(item):
+                    continue
+                depth[nid] = level - 1
+                if nid not in cdp_of and nid not in scheduled:
+                    creds_of[nid] = creds
+                    schedule(nid, item['ip_addr'], get_cdp_os_type(item), level - 1)
+                if checkpoint:
+                    checkpoint.save_job(nid, item['ip_addr'], get_cdp_os_type(item), credentials.get_saved_username(creds_of[nid]), level - 1)
+                if nid in cdp_of:       # already analyzed, just process its neighbors with higher level
+                    stack.append((cdp_of[nid], level - 1, creds_of[nid]))
+
+    def analyzed(nid, cdp_list):
+        ''' Processes CDP table of the device 'nid' obtained by worker '''
+        if nid in cdp_of:
+            return
+        cdp_of[nid] = cdp_list
+        if checkpoint:
+            checkpoint.job_done(nid, cdp_list)
+        registry.mark_analyzed(nid, cdp_list)
+        for item in cdp_list:
+            if cscofunc.is_cdp_device_endnode(item):
+                registry.add_host(item)
+        expand(cdp_list, depth[nid], creds_of[nid])
+
+    def seed_reached(nid, seed, cdp_list):
+        ''' Processes seed device 'nid', cdp_list is None if the seed was not contacted '''
+        if nid not in cdp_of and (cdp_list is None or registry.is_analyzed(nid)):
+            return          # seed was already analyzed, it is not processed regardless of level
+        if depth.get(nid, -1) >= seed['level']:
+            return
+        depth[nid] = seed['level']
+        creds_of[nid] = credentials.by_device.get(nid) or get_seed_creds(seed)
+        if checkpoint:
+            checkpoint.save_job(nid, seed['ip'], registry.get(nid).get('os_type', ''), credentials.get_saved_username(creds_of[nid]), seed['level'])
+        if nid in cdp_of:
+            expand(cdp_of[nid], seed['level'], creds_of[nid])
+        else:
+            analyzed(nid, cdp_list)
+
+    def seed_probed(seed, seed_item, cdp_list):
+        ''' Processes result of probe_device of the seed '''
+        if seed_item:
+            registry.add_node(seed_item)
+            seed_reached(seed_item['device_id'], seed, cdp_list)
+
+    def device_probed(nid, cdp_list):
+        ''' Processes result of probe_device of the device 'nid' '''
+        if credentials.by_device.get(nid):
+            creds_of[nid] = credentials.by_device[nid]      # neighbors try the set which succeeded first
+        if cdp_list is not None:
+            analyzed(nid, cdp_list)
+        elif checkpoint:
+            checkpoint.job_failed(nid)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for seed in seeds:
+            if seed['level'] < 0:
+                continue
+            node = registry.get_by_ip(seed['ip'])
+            if node and registry.is_analyzed(node['device_id']):    # no need to contact the seed
+                seed_reached(node['device_id'], seed, None)
+                continue
+            cached = cache.get(seed['ip']) if cache else None
+            if cached:
+                seed_probed(seed, *cached)
+                continue
+            cred_list = credentials.candidates(seed['ip'], preferred=get_seed_creds(seed))
+            future = executor.submit(probe_func, seed['ip'], cred_list)
+            in_flight[future] = (None, seed)
+            budget.device_analyzed()
+
+        while in_flight or (frontier and not budget.is_exhausted()):
+            while frontier and len(in_flight) < workers and not budget.is_exhausted():
+                (_, _, _, nid, ip_addr, os_type) = heapq.heappop(frontier)
+                budget.device_analyzed()
+                cached = cache.get(ip_addr, False) if cache else None
+                if cached:
+                    device_probed(nid, cached[1])
+                    continue
+                print("Going to analyze:", nid, ip_addr)
+                cred_list = credentials.candidates(ip_addr, nid, creds_of[nid])
+                in_flight[executor.submit(probe_func, ip_addr, cred_list, False, os_type)] = (nid, ip_addr)
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                (nid, job) = in_flight.pop(future)
+                ip_addr = job['ip'] if nid is None else job
+                try:
+                    (device_info, cdp_list, creds) = future.result()
+                except Exception as err:        # pylint: disable=W0703
+                    print("- error on the device", ip_addr, ":", err)
+                    (device_info, cdp_list, creds) = (None, None, None)     # job is marked failed in checkpoint
+
+                if creds:
+                    credentials.learned(ip_addr, creds, device_info['device_id'] if device_info else nid)
+                if cache and cdp_list is not None:
+                    cache.put(ip_addr, device_info, cdp_list)
+                if nid is None:         # seed
+                    seed_probed(job, device_info, cdp_list)
+                else:
+                    device_probed(nid, cdp_list)
+            if checkpoint:
+                checkpoint.commit()
+
+    for (_, _, _, nid, ip_addr, _) in sorted(frontier):
+        budget.unexplored.append((nid, ip_addr))
+    return registry
+
+
+async def probe_tcp(host, timeout, port=22):
+    """
+    Returns True if TCP connection to host:port is established within timeout
+
+    :param host: IP address
+    :param timeout: seconds
+    :param port: TCP port, SSH by default
+    :return Boolean:
+    """
+    try:
+        (_, writer) = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (asyncio.TimeoutError, OSError):
+        return False
+    writer.close()
+    try:
+        await writer.wait_closed()      # transport is released before next probe, large sweeps don't leave it half-closed
+    except OSError:
+        pass                            # reset by peer, the port was open anyway
+    return True
+
+
+async def probe_icmp(host, timeout):
+    """
+    Returns True if host responds to a ping request within timeout. Non-blocking version of cscofunc.ping
+
+    :param host: IP address
+    :param timeout: seconds
+    :return Boolean:
+    """
+    if platform.system().lower() == "windows":
+        args = ['ping', '-n', '1', '-w', str(int(timeout * 1000)), host]
+    else:
+        args = ['ping', '-c', '1', '-W', str(max(1, int(round(timeout)))), host]
+    try:
+        proc = await asyncio.create_subprocess_exec(*args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError:
+        return False
+    try:
+        retcode = await asyncio.wait_for(proc.wait(), timeout + 1)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return False
+    return retcode == 0
+
+
+async def sweep_range(ip_range, executor, process_device, skip_ip=None, cache=None, credentials=None, workers=DEFAULT_WORKERS, known_node=None, budget=None, probe_func=probe_device):
+    """
+    Probes all hosts in ip_range concurrently. Responding host is passed to executor (probe_device)
+    as soon as the host responds. Result of each host is passed to process_device (in the thread of event loop)
+    as soon as the host is completed, while the rest of the range is still probed, so skip_ip sees devices
+    learned from earlier results.
+    IPs of nodes already known from CDP (see known_node) are not probed. Unless range key 'known' is 'skip', they are
+    contacted for CDP table only (device info is known) after the other hosts were processed.
+
+    :param ip_range: dict with range and optional username, password, probe, timeout, concurrency, known
+    :param executor: pool of workers used for SSH sessions
+    :param process_device: function called with (ip, device info, CDP table), device info is None if device was not recognized,
+                           CDP table is None if known node was not contacted successfully
+    :param skip_ip: function, SSH session is not opened to the IP if skip_ip(ip) returns True
+    :param cache: DeviceCache or None, fresh results are used instead of contacting the device
+    :param credentials: CredentialStore or None, set which succeeded is remembered in it
+    :param workers: number of workers of executor, credential sets for the device are chosen when worker is free
+    :param known_node: function, returns node (dict) which is known with the IP, None if IP is not known
+    :param budget: DiscoveryBudget or None, no new host is probed or contacted when it is exhausted
+    :param probe_func: function with the same parameters and return value as probe_device
+    """
+    if credentials is None:
+        credentials = CredentialStore()
+    if budget is None:
+        budget = DiscoveryBudget()
+    loop = asyncio.get_running_loop()
+    probe = ip_range.get('probe', DEFAULT_PROBE)
+    timeout = ip_range.get('timeout', DEFAULT_PROBE_TIMEOUT)
+    hosts = ipaddress.ip_network(ip_range['range']).hosts()     # generator shared by all probing tasks
+    pending = []
+    deferred = []           # (IP, node) of known nodes
+    free_workers = asyncio.Semaphore(workers)
+
+    async def probe_job(ip_addr, node=None):
+        ''' Contacts the device by worker of executor, only CDP table is collected if node is known '''
+        async with free_workers:
+            if node:
+                cred_list = credentials.candidates(ip_addr, node['device_id'], get_seed_creds(ip_range))
+                (_, cdp_list, creds) = await loop.run_in_executor(executor, probe_func, ip_addr, cred_list, False, get_cdp_os_type(node))
+                device_info = node
+            else:
+                cred_list = credentials.candidates(ip_addr, preferred=get_seed_creds(ip_range))
+                (device_info, cdp_list, creds) = await loop.run_in_executor(executor, probe_func, ip_addr, cred_list)
+        if creds:
+            credentials.learned(ip_addr, creds, device_info['device_id'] if device_info else None)
+        if cache and cdp_list is not None:
+            cache.put(ip_addr, None if node else device_info, cdp_list)
+        process_device(ip_addr, device_info, cdp_list)
+
+    async def prober():
+        ''' Probes hosts until the range is exhausted '''
+        for host in hosts:
+            if budget.is_exhausted():
+                break
+            if skip_ip and skip_ip(host.exploded):
+                continue
+            node = known_node(host.exploded) if known_node else None
+            cached = cache.get(host.exploded, node is None) if cache else None
+            if cached:
+                budget.device_analyzed()
+                process_device(host.exploded, node or cached[0], cached[1])
+                continue
+            if node:
+                deferred.append((host.exploded, node))
+                continue
+            if probe == 'icmp':
+                alive = await probe_icmp(host.exploded, timeout)
+            else:
+                alive = await probe_tcp(host.exploded, timeout)
+            if alive and not budget.is_exhausted():
+                budget.device_analyzed()
+                pending.append(asyncio.ensure_future(probe_job(host.exploded)))
+
+    await asyncio.gather(*[prober() for _ in range(ip_range.get('concurrency', DEFAULT_PROBE_CONCURRENCY))])
+    await asyncio.gather(*pending)          # jobs started by probers, results were processed by finished ones
+    if ip_range.get('known', DEFAULT_KNOWN) == 'skip':
+        return
+    pending = []
+    for (ip_addr, node) in deferred:
+        if skip_ip and skip_ip(ip_addr):
+            continue
+        if budget.is_exhausted():
+            budget.unexplored.append((node['device_id'], ip_addr))
+            continue
+        budget.device_analyzed()
+        pending.append(asyncio.ensure_future(probe_job(ip_addr, node)))
+    await asyncio.gather(*pending)
+
+
+def get_device_list_cdp_range(ip_ranges, registry, workers=DEFAULT_WORKERS, checkpoint=None, cache=None, credentials=None, budget=None, probe_func=probe_device):
+    """
+    Discovers devices specified by IP ranges of management interface. Concurrent replacement of cscofunc.get_device_list_cdp_subnet.
+    Hosts are probed asynchronously (TCP/22 or ICMP), responding hosts are passed to pool of 'workers' SSH sessions.
+    Device which is not in registry is added (found_via_cdp is False). CDP information of device which was not analyzed
+    so far is analyzed (its neighbors are added, they are not contacted). Device info and CDP table are collected in one SSH session.
+    IP addresses of devices which were already analyzed and of hosts (phones, ...) are not contacted. IP addresses of nodes
+    known from CDP are not probed and only their CDP table is collected after the other IPs of the range were processed,
+    or they are skipped if range key 'known' is 'skip'.
+    If checkpoint is specified, ranges which were already processed are skipped and the state is saved after each contacted device.
+    If cache is specified, fresh results saved in it are used instead of probing and contacting the devices.
+    Credential sets from credentials are tried after the set of the range, set which succeeded in subnet is tried first.
+    When budget is exhausted, ranges which were not processed completely are saved in budget.unexplored_ranges
+    (they are not marked as done in checkpoint).
+
+    :param ip_ranges: list of ranges, each entry contains dict with range, optional username, password, probe, timeout, concurrency, known
+    :param registry: DeviceRegistry of already found devices
+    :param workers: max. number of concurrent SSH sessions
+    :param checkpoint: DiscoveryCheckpoint or None
+    :param cache: DeviceCache or None
+    :param credentials: CredentialStore or None
+    :param budget: DiscoveryBudget or None
+    :param probe_func: function with the same parameters and return value as probe_device
+    :return registry: DeviceRegistry of found devices
+    """
+
+    def is_analyzed_ip(ip_addr):
+        ''' Is IP address management IP of already analyzed device or IP of host ? '''
+        node = registry.get_by_ip(ip_addr)
+        return (node is not None and node['was_cdp_analyzed']) or registry.is_host_ip(ip_addr)
+
+    def process_device(ip_addr, one_item, cdp_list):
+        ''' Adds device found in range and its neighbors to registry '''
+        if not one_item or cdp_list is None:
+            return
+        nid = one_item['device_id']
+        registry.add_node(one_item, found_via_cdp=False)
+        if not registry.is_analyzed(nid):
+            registry.mark_analyzed(nid, cdp_list)
+            for item in cdp_list:
+                if cscofunc.is_cdp_device_endnode(item):
+                    registry.add_host(item)
+                else:
+                    registry.add_node(item)
+        if checkpoint:
+            checkpoint.commit()
+
+    if credentials is None:
+        credentials = CredentialStore()
+    if budget is None:
+        budget = DiscoveryBudget()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for ip_range in ip_ranges:
+            if checkpoint and checkpoint.is_range_done(ip_range['range']):
+                continue
+            if budget.is_exhausted():
+                budget.unexplored_ranges.append(ip_range['range'])
+                continue
+            asyncio.run(sweep_range(ip_range, executor, process_device, is_analyzed_ip, cache, credentials, workers, registry.get_by_ip, budget, probe_func))
+            if budget.is_exhausted():
+                budget.unexplored_ranges.append(ip_range['range'])        # range may not be processed completely
+                continue
+            if checkpoint:
+                checkpoint.range_done(ip_range['range'])
+                checkpoint.commit()
+
+    return registry
+
+
+def is_topology_event(message):
+    """
+    Is syslog message CDP neighbor or link change message ?
+
+    :param message: text of syslog message
+    :return Boolean:
+    """
+    return TOPOLOGY_EVENT_PATTERN.search(message) is not None
+
+
+class SyslogProtocol(asyncio.DatagramProtocol):
+    """
+    Receives syslog messages, topology events are passed to on_event with source IP address of the message
+    """
+
+    def __init__(self, on_event):
+        self.on_event = on_event
+
+    def datagram_received(self, data, addr):
+        message = data.decode('utf-8', 'replace')
+        if is_topology_event(message):
+            self.on_event(addr[0], message)
+
+
+async def listen_syslog(registry, executor, port=DEFAULT_SYSLOG_PORT, credentials=None, cache=None, on_change=None, hold=DEFAULT_EVENT_HOLD, probe_func=probe_device):
+    """
+    Listens for syslog messages on UDP port forever. When CDP neighbor or link change message is received from known node,
+    the node is contacted again (CDP table only) after 'hold' seconds, its links in registry.topology are replaced
+    and new neighbors are added to registry. New neighbors which are routers or switches are contacted as well.
+
+    :param registry: DeviceRegistry of found devices, nodes are searched by source IP of syslog message
+    :param executor: pool of workers used for SSH sessions
+    :param port: UDP port
+    :param credentials: CredentialStore used by discovery (it knows credential sets which succeeded on the nodes)
+    :param cache: DeviceCache or None, new results are saved into it
+    :param on_change: function called with (device_id, added neighbors, removed neighbors) after each change of topology
+    :param hold: seconds
+    :param probe_func: function with the same parameters and return value as probe_device
+    """
+    if credentials is None:
+        credentials = CredentialStore()
+    loop = asyncio.get_running_loop()
+    held = set()            # device_ids waiting for hold time
+
+    async def reprobe(node, expand, preferred=None):
+        ''' Contacts the node and updates registry, new neighbors are contacted if expand is True '''
+        nid = node['device_id']
+        print("Going to analyze:", nid, node['ip_addr'])
+        cred_list = credentials.candidates(node['ip_addr'], nid, preferred)
+        try:
+            (_, cdp_list, creds) = await loop.run_in_executor(executor, probe_func, node['ip_addr'], cred_list, False, node.get('os_type') or get_cdp_os_type(node))
+        except Exception as err:        # pylint: disable=W0703
+            print("- error on the device", node['ip_addr'], ":", err)
+            return
+        if cdp_list is None:
+            return
+        credentials.learned(node['ip_addr'], creds, nid)
+        if cache:
+            cache.put(node['ip_addr'], None, cdp_list)
+        registry.mark_analyzed(nid)
+        (added, removed) = registry.topology.replace_links(nid, cdp_list)
+        new_nodes = []
+        for item in cdp_list:
+            if cscofunc.is_cdp_device_endnode(item):
+                registry.add_host(item)
+            elif registry.add_node(item) and is_cdp_device_to_be_contacted(item):
+                new_nodes.append(item)
+        if (added or removed) and on_change:
+            on_change(nid, added, removed)
+        if expand:
+            await asyncio.gather(*[reprobe(item, False, creds) for item in new_nodes])
+
+    async def event_held(nid):
+        ''' Waits for hold time and contacts the node '''
+        await asyncio.sleep(hold)
+        held.discard(nid)
+        try:
+            await reprobe(registry.get(nid), True)
+        except Exception as err:        # pylint: disable=W0703
+            print("- error on processing event of the device", nid, ":", err)      # task is not awaited, error would be lost
+
+    def on_event(ip_addr, message):
+        ''' Processes topology event '''
+        node = registry.get_by_ip(ip_addr)
+        if node is None:
+            print("Event from unknown device", ip_addr, ":", message.strip())
+            return
+        if node['device_id'] not in held:
+            held.add(node['device_id'])
+            asyncio.ensure_future(event_held(node['device_id']))
+
+    (transport, _) = await loop.create_datagram_endpoint(lambda: SyslogProtocol(on_event), local_addr=('0.0.0.0', port))
+    try:
+        await asyncio.Event().wait()        # runs until it is cancelled
+    finally:
+        transport.close()
+
+
+def get_device_list_cdp_events(registry, port=DEFAULT_SYSLOG_PORT, workers=DEFAULT_WORKERS, credentials=None, cache=None, on_change=None, probe_func=probe_device):
+    """
+    Incremental rediscovery driven by syslog messages, see listen_syslog. Runs until it is interrupted (Ctrl-C).
+
+    :param registry: DeviceRegistry of found devices
+    :param port: UDP port
+    :param workers: max. number of concurrent SSH sessions
+    :param credentials: CredentialStore or None
+    :param cache: DeviceCache or None
+    :param on_change: function called with (device_id, added neighbors, removed neighbors) after each change of topology
+    :param probe_func: function with the same parameters and return value as probe_device
+    :return registry: DeviceRegistry of found devices
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            asyncio.run(listen_syslog(registry, executor, port, credentials, cache, on_change, DEFAULT_EVENT_HOLD, probe_func))
+        except KeyboardInterrupt:
+            print("Listening stopped")
+    return registry
@@ -0,0 +1,135 @@
+# pylint: disable=C0301, C0103, E0401, C0413
+
+import sys
+import getpass
+import getopt
+import os
+import time
+import yaml
+
+import cscofunc
+import discoverfunc
+import maclocfunc
+
+
+def load_cfg_file(config_file):
+    """
+    Returns content of yaml config file
+    """
+    if not os.path.isfile(config_file):
+        print("Cannot find the file", config_file)
+        sys.exit(1)
+    try:
+        with open(config_file) as data_file:
+            config_dict = yaml.safe_load(data_file.read())
+    except IOError:
+        print("Unable to read the file", config_file)
+        sys.exit(1)
+    return config_dict or {}
+
+def print_entries(mac, entries):
+    """
+    Prints locations of MAC address found in index
+    """
+    if not entries:
+        print(mac + ";not found")
+        return
+    for item in entries:
+        print(item['mac']+';'+item['device_id']+';'+item['ip_addr']+';'+item['vlan']+';'+item['int']+';'+time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(item['timestamp'])))
+
+def main():
+    ''' Main
+    '''
+    usage_str = '''
+    Locates MAC addresses on edge ports of switches
+    Usage: maclocator.py [OPTIONS] [MAC ...]
+    -h,     --help                      display help
+    -c,     --cfgfile                   yaml config file, MAC tables of switches in it are collected into index
+    -i,     --index                     index file (SQLite), default ~/.nettools-macindex.db
+    -w,     --workers                   number of concurrent SSH sessions, default 10
+    -m,     --max-age                   switches collected within max. age in seconds are not contacted, default 3600, 0 refreshes all
+    -p,     --platform-cache            platform cache file (SQLite) shared with other tools, created if it doesn't exist,
+                                        default ~/.nettools-platform.db if it exists
+    MAC addresses given as arguments are looked up in the index (after collection if config file is specified)
+    '''
+    config_file = ''
+    index_file = maclocfunc.DEFAULT_MAC_INDEX
+    workers = discoverfunc.DEFAULT_WORKERS
+    max_age = maclocfunc.DEFAULT_MAX_AGE
+    platform_file = ''
+    passwords = {}
+    cred_sets = []
+    ip_list = []
+
+    argv = sys.argv[1:]
+
+    try:
+        opts, args = getopt.getopt(argv, "hc:i:w:m:p:", ["help", "cfgfile=", "index=", "workers=", "max-age=", "platform-cache="])
+    except getopt.GetoptError:
+        print(usage_str)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            print(usage_str)
+            sys.exit()
+        elif opt in ("-c", "--cfgfile"):
+            config_file = arg
+        elif opt in ("-i", "--index"):
+            index_file = arg
+        elif opt in ("-w", "--workers"):
+            try:
+                workers = int(arg)
+            except ValueError:
+                workers = 0
+            if workers < 1:
+                print("Invalid number of workers:", arg)
+                sys.exit(2)
+        elif opt in ("-m", "--max-age"):
+            try:
+                max_age = int(arg)
+            except ValueError:
+                print("Invalid max. age:", arg)
+                sys.exit(2)
+        elif opt in ("-p", "--platform-cache"):
+            platform_file = arg
+
+    if not config_file and not args:
+        print("Neither config file nor MAC address is specified")
+        print(usage_str)
+        sys.exit(2)
+
+    mac_index = maclocfunc.MacIndex(index_file)
+    if config_file:
+        config_dict = load_cfg_file(config_file)
+        for cred in config_dict.get('credentials', []):
+            if 'username' not in cred:
+                print('Username is not specified in credentials')
+                sys.exit(1)
+            if not cred['username'] in passwords:
+                passwords[cred['username']] = getpass.getpass("Password for "+cred['username']+":")
+            cred_sets.append((cred['username'], passwords[cred['username']]))
+        if not cred_sets:
+            print('Credentials are not specified in config file')
+            sys.exit(1)
+        for switch in config_dict.get('switches', []):
+            if 'ip' not in switch or not cscofunc.is_ip_valid(switch['ip']):
+                print('Invalid IP address of switch in config file:', switch.get('ip', ''))
+                sys.exit(1)
+            ip_list.append(switch['ip'])
+        platform_cache = cscofunc.open_platform_cache(platform_file or cscofunc.DEFAULT_PLATFORM_CACHE, bool(platform_file))
+        (collected, skipped, failed) = maclocfunc.collect_mac_index(ip_list, cred_sets, mac_index, workers, max_age, platform_cache)
+        if platform_cache:
+            platform_cache.close()
+        print("Collected", len(collected), "switches, not changed (fresh)", len(skipped), ", failed", len(failed), ", MAC addresses in index:", len(mac_index))
+        for ip_addr in failed:
+            print("- failed:", ip_addr)
+
+    if args:
+        print("sep=;")
+        print("MAC;Switch;IP;VLAN;Interface;Collected")
+    for mac in args:
+        print_entries(mac, mac_index.lookup(mac))
+    mac_index.close()
+
+if __name__ == "__main__":
+    main()
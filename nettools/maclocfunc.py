@@ -0,0 +1,214 @@
+''' Module implements fleet-wide MAC address locator. Dynamic MAC address tables of switches are collected in parallel
+    into persistent index MAC -> (switch, vlan, interface), trunk and uplink ports are excluded using CDP adjacency.
+
+ '''
+
+# pylint: disable=C0301, C0103
+
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import cscofunc
+import discoverfunc
+
+DEFAULT_MAC_INDEX = os.path.join(os.path.expanduser('~'), '.nettools-macindex.db')
+DEFAULT_MAX_AGE = 3600          # seconds, switches collected within this time are not contacted again by refresh
+UPLINK_CAPABILITIES = ('Switch', 'Router')      # CDP neighbors with these capabilities are infrastructure devices
+
+
+class MacIndex(object):
+    """
+    Persistent index MAC address -> (switch, vlan, interface) saved in SQLite file, MAC address is saved as 48-bit int.
+    Entries of a switch are replaced at once when the switch is collected again, so the index is refreshed
+    incrementally switch by switch. Lookup is a primary key search, the tables are not scanned.
+    """
+
+    def __init__(self, filename=DEFAULT_MAC_INDEX):
+        """
+        :param filename: SQLite file, it is created if it doesn't exist
+        """
+        self.conn = sqlite3.connect(filename)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS macs (mac INTEGER, ip_addr TEXT, vlan TEXT, intf TEXT, PRIMARY KEY (mac, ip_addr, vlan))")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS macs_ip ON macs(ip_addr)")        # entries of switch are deleted on refresh
+        self.conn.execute("CREATE TABLE IF NOT EXISTS switches (ip_addr TEXT PRIMARY KEY, device_id TEXT, nr_macs INTEGER, timestamp REAL)")
+        self.conn.commit()
+
+    def get_switch(self, ip_addr):
+        """
+        Returns information about collected switch
+
+        :param ip_addr: IP address of the switch
+        :return switch: dict with ip_addr, device_id, nr_macs, timestamp, None if switch was not collected
+        """
+        row = self.conn.execute("SELECT device_id, nr_macs, timestamp FROM switches WHERE ip_addr = ?", (ip_addr,)).fetchone()
+        if not row:
+            return None
+        return {'ip_addr': ip_addr, 'device_id': row[0], 'nr_macs': row[1], 'timestamp': row[2]}
+
+    def is_fresh(self, ip_addr, max_age):
+        """
+        Returns True if the switch was collected within max_age seconds
+        """
+        switch = self.get_switch(ip_addr)
+        return bool(switch) and time.time() - switch['timestamp'] <= max_age
+
+    def put_switch(self, ip_addr, device_id, entries):
+        """
+        Replaces entries of the switch
+
+        :param ip_addr: IP address of the switch
+        :param device_id: name of the switch
+        :param entries: list of (mac, vlan, interface), mac is 48-bit int
+        """
+        with self.conn:         # one transaction, lookup never sees the switch half-updated
+            self.conn.execute("DELETE FROM macs WHERE ip_addr = ?", (ip_addr,))
+            self.conn.executemany("INSERT OR REPLACE INTO macs (mac, ip_addr, vlan, intf) VALUES (?, ?, ?, ?)",
+                                  ((mac, ip_addr, vlan, interface) for (mac, vlan, interface) in entries))
+            self.conn.execute("INSERT OR REPLACE INTO switches (ip_addr, device_id, nr_macs, timestamp) VALUES (?, ?, ?, ?)",
+                              (ip_addr, device_id, len(entries), time.time()))
+
+    def lookup(self, mac):
+        """
+        Returns edge ports where the MAC address was seen
+
+        :param mac: MAC address in any usual format (see cscofunc.mac_to_int)
+        :return entries: list of dicts with mac, device_id, ip_addr, vlan, int, timestamp (time of collection of the switch),
+                         empty if MAC address is not known or not valid
+        """
+        try:
+            mac = cscofunc.mac_to_int(mac)
+        except ValueError:
+            return []
+        rows = self.conn.execute("SELECT s.device_id, m.ip_addr, m.vlan, m.intf, s.timestamp FROM macs m JOIN switches s ON s.ip_addr = m.ip_addr "
+                                 "WHERE m.mac = ? ORDER BY s.timestamp DESC", (mac,)).fetchall()
+        return [{'mac': cscofunc.int_to_mac(mac), 'device_id': row[0], 'ip_addr': row[1], 'vlan': row[2], 'int': row[3], 'timestamp': row[4]}
+                for row in rows]
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM macs").fetchone()[0]
+
+    def close(self):
+        """
+        Closes the file
+        """
+        self.conn.close()
+
+
+def full_int_name(intname):
+    """
+    Returns full interface name (Gi1/0/1 -> GigabitEthernet1/0/1), name of unknown type is returned unchanged
+    """
+    return cscofunc.canonical_interface_name(intname) or intname
+
+
+def get_uplink_interfaces(cdp_list, pc_list):
+    """
+    Returns set of interfaces (full names) which connect infrastructure neighbors (switch, router), port-channel with
+    such member is uplink too. Ports of end nodes (phones, access points) are edge ports.
+
+    :param cdp_list: CDP table, see cscofunc.get_cli_sh_cdp_neighbor
+    :param pc_list: port-channels, see cscofunc.get_cli_sh_etherchannel_summary
+    :return uplinks: set of interface names
+    """
+    uplinks = set()
+    for item in cdp_list:
+        if cscofunc.is_cdp_device_endnode(item):
+            continue
+        if any(capability in item['capability'] for capability in UPLINK_CAPABILITIES):
+            uplinks.add(full_int_name(item['intf_id']))
+    for pc in pc_list:
+        if any(full_int_name(iface) in uplinks for iface in pc['int_list']):
+            uplinks.add('Port-channel' + pc['pc_number'])
+    return uplinks
+
+
+def get_edge_mac_entries(mac_table, uplinks):
+    """
+    Returns dynamic entries of MAC address table which are not learned on uplinks
+
+    :param mac_table: cscofunc.MacTable
+    :param uplinks: set of interface names (full), see get_uplink_interfaces
+    :return entries: list of (mac, vlan, interface), mac is 48-bit int, interface is full name
+    """
+    entries = []
+    mac_table.build_indexes()
+    dynamic = {code for (code, name) in enumerate(mac_table.type_names) if name.lower() == 'dynamic'}
+    for (int_code, rows) in mac_table.by_int.items():
+        interface = full_int_name(mac_table.int_names[int_code])
+        if interface in uplinks:
+            continue
+        for row in rows:
+            if mac_table.types[row] in dynamic:
+                entries.append((mac_table.macs[row], mac_table.vlan_names[mac_table.vlans[row]], interface))
+    return entries
+
+
+def collect_switch(ip_addr, cred_list, platform_cache=None):
+    """
+    Reads MAC address table, CDP neighbors and port-channels of the switch, runs in worker thread
+
+    :param ip_addr: IP address of the switch
+    :param cred_list: list of (username, password), tried in order
+    :param platform_cache: cscofunc.PlatformCache or None, OS of the switch is taken from it
+    :return (device_id, entries): see get_edge_mac_entries, None if unable to connect
+    """
+    platform = platform_cache.get(ip_addr) if platform_cache else None
+    (net_connect, _) = discoverfunc.open_session_creds(ip_addr, cred_list, platform['os_type'] if platform else '')
+    if not net_connect:
+        return None
+    try:
+        if platform is None:
+            platform = cscofunc.get_cli_device_info(net_connect, ip_addr)
+            if platform and platform_cache:
+                platform_cache.put(platform)
+        os_type = platform['os_type'] if platform else ''
+        mac_table = cscofunc.get_cli_sh_mac_address_table(net_connect)
+        cdp_list = cscofunc.get_cli_sh_cdp_neighbor(net_connect, os_type)
+        if os_type == 'NX-OS':
+            pc_list = cscofunc.get_cli_sh_etherchannel_summary_nxos(net_connect)
+        else:
+            pc_list = cscofunc.get_cli_sh_etherchannel_summary(net_connect)
+    finally:
+        net_connect.disconnect()
+    device_id = platform['device_id'] if platform else ip_addr
+    return (device_id, get_edge_mac_entries(mac_table, get_uplink_interfaces(cdp_list, pc_list)))
+
+
+def collect_mac_index(ip_list, cred_list, mac_index, workers=discoverfunc.DEFAULT_WORKERS, max_age=DEFAULT_MAX_AGE, platform_cache=None, collect_func=collect_switch):
+    """
+    Collects MAC address tables of switches in parallel and saves their edge entries into index. Switches collected
+    within max_age seconds are not contacted (incremental refresh), max_age 0 refreshes all switches.
+    Up to 'workers' switches are contacted concurrently, index is written by the calling thread only.
+
+    :param ip_list: list of IP addresses of switches
+    :param cred_list: list of (username, password)
+    :param mac_index: MacIndex
+    :param workers: max. number of concurrent SSH sessions
+    :param max_age: seconds
+    :param platform_cache: cscofunc.PlatformCache or None
+    :param collect_func: function with the same parameters and return value as collect_switch
+    :return (collected, skipped, failed): lists of IP addresses
+    """
+    collected = []
+    failed = []
+    skipped = [ip_addr for ip_addr in ip_list if max_age > 0 and mac_index.is_fresh(ip_addr, max_age)]
+    pending = [ip_addr for ip_addr in ip_list if ip_addr not in skipped]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(collect_func, ip_addr, cred_list, platform_cache): ip_addr for ip_addr in pending}
+        for future in as_completed(futures):
+            ip_addr = futures[future]
+            try:
+                result = future.result()
+            except Exception as err:        # pylint: disable=W0703
+                print("- error on the device", ip_addr, ":", err)
+                result = None
+            if result is None:
+                failed.append(ip_addr)
+                continue
+            (device_id, entries) = result
+            mac_index.put_switch(ip_addr, device_id, entries)
+            collected.append(ip_addr)
+            print("-", device_id, ip_addr, ":", len(entries), "MAC addresses on edge ports")
+    return (collected, skipped, failed)
@@ -25,6 +25,10 @@ import cscofunc
 
 switch_ip = []
 nxos_switch = []
+platform_cache = None       # cscofunc.PlatformCache, Netmiko device_type of known devices is taken from it
+# order in which interface types are tried for port number (0/1 is Gi0/1 on a switch with both Fa0/1 and Gi0/1), other known types follow
+PORT_TYPES = ('GigabitEthernet', 'TenGigabitEthernet', 'Port-channel', 'Ethernet', 'Vlan', 'Loopback')
+PORT_TYPES += tuple(int_type for (int_type, _, _) in cscofunc.INTERFACE_TYPES if int_type not in PORT_TYPES)
 
 def func_convert_list(source_list):
     '''
@@ -56,9 +60,7 @@ def int_number_to_name2(switch_port_dict, number):
     Transforms interface number to valid name, i.e 1/3/4 to Te1/3/4 by finding the proper key in switch_port_dict
     """
 
-    int_types_list = ['GigabitEthernet', 'TenGigabitEthernet', 'Port-channel', 'Ethernet', 'Vlan', 'Loopback']
-
-    for int_type in int_types_list:
+    for int_type in PORT_TYPES:
         if int_type+number in switch_port_dict:
             return int_type+number
     return "Error"
@@ -67,9 +69,11 @@ def cli_open_session(ip, username, pswd):
     '''
     Open SSH session to IP address
     If session is not established, nothing is returned. Function which called this function must check it !!
+    Device type of the session is taken from platform cache if the device is known
     '''
+    platform = platform_cache.get(ip) if platform_cache else None
     try:
-        net_connect = ConnectHandler(device_type='cisco_ios', ip=ip, username=username, password=pswd)
+        net_connect = ConnectHandler(device_type=cscofunc.get_netmiko_device_type(platform['os_type'] if platform else ''), ip=ip, username=username, password=pswd)
     except NetMikoTimeoutException:
         print("- unable to connect to the device, timeout")
         return
@@ -135,9 +139,8 @@ def func_add_items_to_port_list(portlist, username, pswd):
             item['noerror'] = False
             continue        # process next item
         if item['sw_mode'] == 'access' or item['sw_mode'] == 'static access': # port is access, add access vlan into vlan list
-            item['vlan_list'] = []
-            item['vlan_list'].append(switch_port_dict[ip_of_switch][iface]['access_mode_vlan'])
-        else:       # port is trunk, add trunk vlan list
+            item['vlan_list'] = cscofunc.VlanSet(switch_port_dict[ip_of_switch][iface]['access_mode_vlan'])
+        else:       # port is trunk, add trunk vlan list (VlanSet)
             item['vlan_list'] = switch_port_dict[ip_of_switch][iface]['trunk_vlans']
         item['native_vlan'] = switch_port_dict[ip_of_switch][iface]['trunk_native_mode_vlan']
         if 'vpc_id' in item:    # test if it is NX-OS
@@ -533,35 +536,40 @@ def func_list_to_file(source_list, output_file):
     
 
 
-def func_change_mapped_vlans(list_from_file):
+def func_change_mapped_vlans(list_from_file, mapping_list=None):
     '''
     This function changes vlans in the the keys 'vlans' and 'native_vlan' in the globalvariable list_from_file if they are in the list of dictionaries that contains all vlan_mappings
     If a change is done there will be an entry in vlans_trans and in warning 
     :param list_from_file: 
+    :param mapping_list: list of dictionaries {'old_vlan': 400, 'new_vlan': 500}, no vlan is changed if it is None or empty
     :return list_from_file:
-    Version: 1.2
+    Version: 1.3
     '''
-    mapping_list = [{'old_vlan': 400, 'new_vlan': 500}, {'old_vlan': 405, 'new_vlan': 505}]
+    if not mapping_list:
+        return list_from_file
 
     for element in list_from_file:
         if element['noerror']:
-            index = 0
-            for vlan in element['vlan_list']:
-                for item in mapping_list:
-                    if vlan == item['old_vlan']:
-                        element['vlan_list'][index] = item['new_vlan']
-                        if element['warning'] == None:
-                            element['warning'] = ['Changed VLAN '+str(vlan)+' to Vlan '+str(item['new_vlan'])]
-                        else:
-                            element['warning'].append('Changed VLAN '+str(vlan)+' to Vlan '+str(item['new_vlan']))
-                        if 'vlans_trans' in element.keys():
-                            element['vlans_trans'].append(item)
-                        else:
-                            element['vlans_trans'] = [item]
-                index += 1
+            old_vlans = cscofunc.VlanSet()      # vlans which are replaced
+            new_vlans = cscofunc.VlanSet()      # their replacements
+            for item in mapping_list:
+                vlan = item['old_vlan']
+                if vlan in element['vlan_list']:
+                    old_vlans.add(vlan)
+                    new_vlans.add(item['new_vlan'])
+                    if element['warning'] == None:
+                        element['warning'] = ['Changed VLAN '+str(vlan)+' to Vlan '+str(item['new_vlan'])]
+                    else:
+                        element['warning'].append('Changed VLAN '+str(vlan)+' to Vlan '+str(item['new_vlan']))
+                    if 'vlans_trans' in element.keys():
+                        element['vlans_trans'].append(item)
+                    else:
+                        element['vlans_trans'] = [item]
+            if old_vlans:
+                element['vlan_list'] = (element['vlan_list'] - old_vlans) | new_vlans   # new VlanSet, trunk_vlans in switch_port_dict are not changed
             if element['sw_mode'] == 'trunk':
                 for item in mapping_list:
-                    if element['native_vlan'] == item['old_vlan']:
+                    if str(element['native_vlan']) == str(item['old_vlan']):     # native_vlan is string from show command
                         if element['warning'] == None:
                             element['warning'] = ['Native VLAN '+str(element['native_vlan'])+' changed to VLAN '+str(item['new_vlan'])]
                         else:
@@ -572,13 +580,13 @@ def func_change_mapped_vlans(list_from_file):
 
 def get_vlan_list_of_switch(device_ip, username, password):
     '''
-    Returns list of VLans configured on switch 'device_ip'
+    Returns VlanSet of VLans configured on switch 'device_ip'
     '''
-    vlan_list = []
+    vlan_list = cscofunc.VlanSet()
     net_connect = cli_open_session(device_ip, username, password)   # connect to device
     vlan_dict = cscofunc.get_cli_sh_vlan(net_connect)
     for item in vlan_dict:          # go through all vlan entries
-        vlan_list.append(item['number'])    # add vlan number to target list
+        vlan_list.add(item['number'])    # add vlan number to target set
     net_connect.disconnect()
     return vlan_list
 
@@ -596,13 +604,12 @@ def func_vlans_in_fabricpath(list_from_file, username, pswd):
     for element in list_from_file:
         if element['noerror']:
             vlan_list = get_vlan_list_of_switch(element['ip_new_sw'], username, pswd)
-            for vlan in element['vlan_list']:
-                if vlan not in vlan_list:
-                    element['noerror'] = False
-                    if element['error'] == None:
-                        element['error'] = [str(vlan)+' is not on the new switch']
-                    else:
-                        element['error'].append(str(vlan)+' is not on the new switch')
+            for vlan in element['vlan_list'] - vlan_list:      # vlans missing on the new switch
+                element['noerror'] = False
+                if element['error'] == None:
+                    element['error'] = [str(vlan)+' is not on the new switch']
+                else:
+                    element['error'].append(str(vlan)+' is not on the new switch')
             if element['sw_mode'] == 'trunk':
                 if element['native_vlan'] not in vlan_list:
                     if 'warning' not in element.keys() or element['warning'] == None:
@@ -831,15 +838,15 @@ def func_check_port_status(ip_addr, port, username, password):
         print("Unable to connect to device " + ip_addr)
         return 3   
     port_stat = cscofunc.get_cli_sh_int_status(net_connect)
-    for item in port_stat:
-        if port in item['port']:            # is port substring of item['port'], i.e. 3/11 is substr of Eth3/11
-            if item['status'] == 'connected':
-                return 1            # port is used
-            # if item['status'] == 'notconnec' or item['status'] == 'disabled' or item['status'] == 'sfpAbsent' or item['status'] == 'xcvrInval':
-            if item['status'] in ('notconnec','disabled','sfpAbsent','xcvrInval') :
-                return 0            # port is not used
-            return 3                # status value is unexpected ... error
-    return 2            # port not found, port is not valid
+    # port is number only (3/11), type is found by lookup of full names (Ethernet3/11), no substring match (1/1 vs Gi1/1/1)
+    item = port_stat.get(cscofunc.canonical_interface_name(port) or int_number_to_name2(port_stat, port))
+    if not item:
+        return 2            # port not found, port is not valid
+    if item['status'] == 'connected':
+        return 1            # port is used
+    if item['status'] in ('notconnec','notconnect','disabled','sfpAbsent','xcvrInval') :
+        return 0            # port is not used
+    return 3                # status value is unexpected ... error
 
 def func_read_cfg_file(config_file):
     '''
@@ -895,6 +902,7 @@ def main():
     pswd = ''
     global switch_ip
     global nxos_switch
+    global platform_cache
 
     usage_str = '''
     Usage: portmigr.py [OPTIONS]
@@ -939,6 +947,7 @@ def main():
         sys.exit(2) 
 
 
+    platform_cache = cscofunc.open_platform_cache()     # only read, devices are identified on first contact if the file doesn't exist
     file_name = cfgfiles_dict['portsf']
     file_name_sip = cfgfiles_dict['switch_ipf']
     file_name_nxos = cfgfiles_dict['nxosf']
@@ -974,6 +983,8 @@ def main():
 
     list_from_file = func_assign_new_pc(list_of_po_ports,list_of_pcs_in_use,list_from_file)
     func_list_to_file(list_from_file, output_file)
+    if platform_cache:
+        platform_cache.close()
 
    
 
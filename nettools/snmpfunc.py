@@ -0,0 +1,271 @@
+''' Module implements SNMP collection of CDP and MAC address tables (CISCO-CDP-MIB, BRIDGE-MIB)
+    Returned structures are the same as structures returned by cscofunc.get_cli_sh_cdp_neighbor,
+    cscofunc.get_device_info and cscofunc.get_cli_sh_mac_address_table.
+    pysnmp (4.x hlapi) is optional, it is needed only if SNMP is used.
+
+ '''
+
+# pylint: disable=C0301, C0103
+
+import re
+
+try:
+    from pysnmp.hlapi import SnmpEngine, CommunityData, UdpTransportTarget, ContextData, ObjectType, ObjectIdentity, getCmd, bulkCmd
+except ImportError:
+    SnmpEngine = None
+
+import cscofunc
+
+
+DEFAULT_SNMP_PORT = 161
+DEFAULT_SNMP_TIMEOUT = 2        # seconds
+DEFAULT_SNMP_RETRIES = 1
+SNMP_BULK_SIZE = 25
+
+OID_SYS_DESCR = '1.3.6.1.2.1.1.1.0'
+OID_SYS_NAME = '1.3.6.1.2.1.1.5.0'
+OID_IF_DESCR = '1.3.6.1.2.1.2.2.1.2'
+OID_IF_NAME = '1.3.6.1.2.1.31.1.1.1.1'
+OID_ENT_MODEL_NAME = '1.3.6.1.2.1.47.1.1.1.1.13'
+OID_CDP_CACHE = '1.3.6.1.4.1.9.9.23.1.2.1.1'
+OID_VTP_VLAN_STATE = '1.3.6.1.4.1.9.9.46.1.3.1.1.2.1'
+OID_DOT1D_BASE_PORT_IFINDEX = '1.3.6.1.2.1.17.1.4.1.2'
+OID_DOT1D_TP_FDB = '1.3.6.1.2.1.17.4.3.1'
+
+CDP_CACHE_ADDRESS_TYPE = '3'
+CDP_CACHE_ADDRESS = '4'
+CDP_CACHE_VERSION = '5'
+CDP_CACHE_DEVICE_ID = '6'
+CDP_CACHE_DEVICE_PORT = '7'
+CDP_CACHE_PLATFORM = '8'
+CDP_CACHE_CAPABILITIES = '9'
+
+# bits of cdpCacheCapabilities, names are the same as in 'sh cdp entry' output (split into words)
+CDP_CAPABILITIES = ((0x01, ['Router']), (0x02, ['Trans-Bridge']), (0x04, ['Source-Route-Bridge']), (0x08, ['Switch']),
+                    (0x10, ['Host']), (0x20, ['IGMP']), (0x40, ['Repeater']), (0x80, ['Phone']), (0x100, ['Remote']),
+                    (0x200, ['CVTA']), (0x400, ['Two-port', 'Mac', 'Relay']))
+
+FDB_TYPES = {3: 'dynamic', 5: 'static'}     # dot1dTpFdbStatus learned, mgmt
+
+
+def is_snmp_available():
+    """
+    Is pysnmp installed ?
+    """
+    return SnmpEngine is not None
+
+
+def snmp_get(ip_addr, community, oids, port=DEFAULT_SNMP_PORT, timeout=DEFAULT_SNMP_TIMEOUT, retries=DEFAULT_SNMP_RETRIES):
+    """
+    Returns values of oids
+
+    :param ip_addr: IP address of the device
+    :param community: SNMPv2c community
+    :param oids: list of OIDs
+    :return values: dict OID : value (pysnmp object), None if device doesn't respond
+    """
+    error_indication, error_status, _, var_binds = next(getCmd(SnmpEngine(), CommunityData(community), UdpTransportTarget((ip_addr, port), timeout=timeout, retries=retries),
+                                                                ContextData(), *[ObjectType(ObjectIdentity(oid)) for oid in oids]))
+    if error_indication or error_status:
+        return None
+    return {str(name): value for (name, value) in var_binds}
+
+
+def snmp_walk(ip_addr, community, oid, port=DEFAULT_SNMP_PORT, timeout=DEFAULT_SNMP_TIMEOUT, retries=DEFAULT_SNMP_RETRIES):
+    """
+    Walks subtree oid using GETBULK
+
+    :param ip_addr: IP address of the device
+    :param community: SNMPv2c community
+    :param oid: root of subtree
+    :return rows: list of (OID suffix, value), suffix is part of OID behind root, None if device doesn't respond
+    """
+    rows = []
+    for (error_indication, error_status, _, var_binds) in bulkCmd(SnmpEngine(), CommunityData(community), UdpTransportTarget((ip_addr, port), timeout=timeout, retries=retries),
+                                                                  ContextData(), 0, SNMP_BULK_SIZE, ObjectType(ObjectIdentity(oid)), lexicographicMode=False):
+        if error_indication or error_status:
+            return None
+        for (name, value) in var_binds:
+            rows.append((str(name)[len(oid)+1:], value))
+    return rows
+
+
+def get_table(rows):
+    """
+    Converts walked table into dict
+
+    :param rows: list of (OID suffix, value), suffix is column.index
+    :return table: dict index : dict column : value
+    """
+    table = {}
+    for (suffix, value) in rows:
+        (column, _, index) = suffix.partition('.')
+        table.setdefault(index, {})[column] = value
+    return table
+
+
+def octets_to_ip(value):
+    """
+    Returns dotted IPv4 address from 4 octets
+    """
+    octets = bytes(value)
+    if len(octets) != 4:
+        return ''
+    return '.'.join(str(octet) for octet in octets)
+
+
+def octets_to_mac(value):
+    """
+    Returns MAC address in Cisco format (xxxx.xxxx.xxxx) from 6 octets
+    """
+    hex_str = bytes(value).hex()
+    return hex_str[0:4] + '.' + hex_str[4:8] + '.' + hex_str[8:12]
+
+
+def get_cdp_capability(value):
+    """
+    Returns list of capabilities from cdpCacheCapabilities bitmask (4 octets)
+    """
+    bits = int.from_bytes(bytes(value), 'big')
+    capability = []
+    for (bit, names) in CDP_CAPABILITIES:
+        if bits & bit:
+            capability.extend(names)
+    return capability
+
+
+def get_cdp_entry(cdp_row, if_descr):
+    """
+    Returns one CDP entry with the same structure as cscofunc.get_cli_sh_cdp_neighbor
+
+    :param cdp_row: dict column : value of cdpCacheTable row
+    :param if_descr: local interface name (ifDescr)
+    :return int_dict:
+    """
+    int_dict = {}
+    int_dict['device_id'] = cscofunc.find_regex_value_in_string(str(cdp_row.get(CDP_CACHE_DEVICE_ID, '')), re.compile(r"([A-Za-z0-9/\._\-]+)"))
+    int_dict['ip_addr'] = ''
+    if str(cdp_row.get(CDP_CACHE_ADDRESS_TYPE, '')) == '1':      # ip
+        int_dict['ip_addr'] = octets_to_ip(cdp_row[CDP_CACHE_ADDRESS])
+    int_dict['platform_id'] = cscofunc.find_regex_value_in_string(str(cdp_row.get(CDP_CACHE_PLATFORM, '')), re.compile(r"^[a-z]{0,20}\s?(.+)$"))
+    int_dict['capability'] = get_cdp_capability(cdp_row.get(CDP_CACHE_CAPABILITIES, b''))
+    int_dict['intf_id'] = if_descr
+    int_dict['port_id'] = str(cdp_row.get(CDP_CACHE_DEVICE_PORT, ''))
+    version = str(cdp_row.get(CDP_CACHE_VERSION, ''))
+    int_dict['software'] = cscofunc.find_regex_value_in_string(version, re.compile(r"\(([A-Za-z0-9\-_]+)\),\s+Version"))
+    if int_dict['software'] == '':
+        int_dict['software'] = cscofunc.find_regex_value_in_string(version, re.compile(r"\(([A-Za-z0-9\-_]+)\)\s+Software"))       # NX-OS
+    if 'Phone' in int_dict['capability']:
+        int_dict['version'] = version.strip()
+    else:
+        int_dict['version'] = cscofunc.find_regex_value_in_string(version, re.compile(r"Version\s+([A-Za-z0-9\.\s\(\)]+),"))
+        if int_dict['version'] == '':
+            int_dict['version'] = cscofunc.find_regex_value_in_string(version, re.compile(r"Version\s+([A-Za-z0-9\.\(\)]+)"))
+    return int_dict
+
+
+def get_snmp_cdp_neighbor(ip_addr, community, port=DEFAULT_SNMP_PORT):
+    """
+    Returns CDP table (CISCO-CDP-MIB cdpCacheTable), see cscofunc.get_cli_sh_cdp_neighbor
+
+    :param ip_addr: IP address of the device
+    :param community: SNMPv2c community
+    :param port: UDP port
+    :return cdp_list: None if device doesn't respond
+    """
+    cdp_rows = snmp_walk(ip_addr, community, OID_CDP_CACHE, port)
+    if cdp_rows is None:
+        return None
+    if_rows = snmp_walk(ip_addr, community, OID_IF_DESCR, port) or []
+    if_descr = {index: str(value) for (index, value) in if_rows}
+    cdp_list = []
+    for (index, cdp_row) in sorted(get_table(cdp_rows).items()):
+        cdp_list.append(get_cdp_entry(cdp_row, if_descr.get(index.split('.')[0], '')))
+    return cdp_list
+
+
+def get_snmp_device_info(ip_addr, community, port=DEFAULT_SNMP_PORT):
+    """
+    Returns info about the device (sysDescr, sysName, ENTITY-MIB model), see cscofunc.get_device_info
+
+    :param ip_addr: IP address of the device
+    :param community: SNMPv2c community
+    :param port: UDP port
+    :return ret_value: None if device doesn't respond or OS is not recognized
+    """
+    values = snmp_get(ip_addr, community, [OID_SYS_DESCR, OID_SYS_NAME], port)
+    if values is None:
+        return None
+    sys_descr = str(values[OID_SYS_DESCR])
+    ret_value = {'ip_addr': ip_addr, 'capability': []}
+    if 'Cisco Internetwork Operating System' in sys_descr or 'Cisco IOS' in sys_descr:      # the same order as in cscofunc.get_cli_device_info
+        ret_value['os_type'] = 'IOS'
+    elif 'NX-OS' in sys_descr:
+        ret_value['os_type'] = 'NX-OS'
+    elif 'IOS-XE' in sys_descr:
+        ret_value['os_type'] = 'IOS-XE'
+    else:
+        return None
+    ret_value['version'] = cscofunc.find_regex_value_in_string(sys_descr, re.compile(r"Version\s+([A-Za-z0-9\.\(\)]+)"))
+    ret_value['platform_id'] = ''
+    for (_, value) in snmp_walk(ip_addr, community, OID_ENT_MODEL_NAME, port) or []:
+        if str(value):          # first physical entity with model name (chassis)
+            ret_value['platform_id'] = str(value)
+            break
+    ret_value['device_id'] = str(values[OID_SYS_NAME])
+    return ret_value
+
+
+def get_snmp_mac_address_table(ip_addr, community, port=DEFAULT_SNMP_PORT):
+    """
+    Returns MAC address table (BRIDGE-MIB dot1dTpFdbTable of each VLAN, community@vlan indexing), see cscofunc.get_cli_sh_mac_address_table
+    Result is cscofunc.MacTable, entry contains vlan, mac, type, int (short interface name, ifName)
+
+    :param ip_addr: IP address of the device
+    :param community: SNMPv2c community
+    :param port: UDP port
+    :return mac_tab: None if device doesn't respond
+    """
+    vlan_rows = snmp_walk(ip_addr, community, OID_VTP_VLAN_STATE, port)
+    if vlan_rows is None:
+        return None
+    if_name = {index: str(value) for (index, value) in snmp_walk(ip_addr, community, OID_IF_NAME, port) or []}
+    mac_tab = cscofunc.MacTable()
+    for (vlan, _) in vlan_rows:
+        if 1002 <= int(vlan) <= 1005:         # fddi/token ring default VLANs
+            continue
+        vlan_community = community + '@' + vlan
+        port_ifindex = {index: str(value) for (index, value) in snmp_walk(ip_addr, vlan_community, OID_DOT1D_BASE_PORT_IFINDEX, port) or []}
+        for fdb_row in get_table(snmp_walk(ip_addr, vlan_community, OID_DOT1D_TP_FDB, port) or []).values():
+            fdb_type = FDB_TYPES.get(int(fdb_row.get('3', 0)))
+            if fdb_type is None or '1' not in fdb_row:
+                continue
+            mac_tab.add(vlan, octets_to_mac(fdb_row['1']), fdb_type, if_name.get(port_ifindex.get(str(fdb_row.get('2', ''))), ''))
+    return mac_tab
+
+
+def probe_device_snmp(ip_addr, cred_list, identity=True, os_type=''):
+    """
+    SNMP replacement of discoverfunc.probe_device, communities are tried in order until the device responds
+
+    :param ip_addr: IP address of the device
+    :param cred_list: list of (community, anything)
+    :param identity: False if device info is not needed
+    :param os_type: not used, CDP table doesn't depend on OS
+    :return (device_info, cdp_list, creds): (None, None, None) if device doesn't respond or OS of device is not recognized
+    """
+    if not is_snmp_available():
+        print("- pysnmp is not installed, unable to contact", ip_addr)
+        return (None, None, None)
+    for creds in cred_list:
+        cdp_list = get_snmp_cdp_neighbor(ip_addr, creds[0])
+        if cdp_list is None:
+            continue
+        device_info = None
+        if identity:
+            device_info = get_snmp_device_info(ip_addr, creds[0])
+            if not device_info:
+                return (None, None, None)
+        return (device_info, cdp_list, creds)
+    print("- unable to contact the device", ip_addr, "using SNMP")
+    return (None, None, None)
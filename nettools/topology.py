@@ -0,0 +1,164 @@
+''' Module implements topology (link table) of devices found by CDP discovery
+
+ '''
+
+# pylint: disable=C0301, C0103
+
+import gzip
+import json
+from collections import deque
+
+
+class Topology(object):
+    """
+    Link table built from CDP tables of analyzed devices. Each link is tuple (device, local interface, neighbor, remote port),
+    device and neighbor are device_ids. Links are indexed by device, graph is undirected for queries, i.e. link seen from
+    both sides connects the same devices.
+    """
+
+    def __init__(self):
+        self.links = {}         # (device, local interface, neighbor) : remote port
+        self.adjacency = {}     # device_id : set of neighbor device_ids
+        self.link_index = {}    # device_id : set of keys of links seen from both sides
+
+    def __len__(self):
+        return len(self.links)
+
+    def add_link(self, device_id, intf_id, neighbor_id, port_id):
+        """
+        Adds one link, link which already exists is not added again
+        """
+        key = (device_id, intf_id, neighbor_id)
+        self.links[key] = port_id
+        self.link_index.setdefault(device_id, set()).add(key)
+        self.link_index.setdefault(neighbor_id, set()).add(key)
+        self.adjacency.setdefault(device_id, set()).add(neighbor_id)
+        self.adjacency.setdefault(neighbor_id, set()).add(device_id)
+
+    def add_links(self, device_id, cdp_list):
+        """
+        Adds links of device from its CDP table
+
+        :param device_id: device which the CDP table belongs to
+        :param cdp_list: list of dicts, structure is defined in cscofunc.get_cli_sh_cdp_neighbor
+        """
+        for item in cdp_list:
+            self.add_link(device_id, item['intf_id'], item['device_id'], item['port_id'].strip())
+
+    def remove_link(self, key):
+        """
+        Removes one link, key is (device, local interface, neighbor)
+        """
+        del self.links[key]
+        for end in (key[0], key[2]):
+            self.link_index[end].discard(key)
+            self.adjacency[end] = set(k[2] if k[0] == end else k[0] for k in self.link_index[end])
+
+    def replace_links(self, device_id, cdp_list):
+        """
+        Replaces links of device by links from its current CDP table. Links seen from neighbors which are not
+        in the CDP table any more are removed too.
+
+        :param device_id: device which the CDP table belongs to
+        :param cdp_list: list of dicts, structure is defined in cscofunc.get_cli_sh_cdp_neighbor
+        :return (added, removed): sets of neighbors which were added and removed
+        """
+        old_neighbors = set(self.adjacency.get(device_id, ()))
+        new_neighbors = set(item['device_id'] for item in cdp_list)
+        for key in list(self.link_index.get(device_id, ())):
+            if key[0] == device_id or key[0] not in new_neighbors:
+                self.remove_link(key)
+        self.add_links(device_id, cdp_list)
+        return (new_neighbors - old_neighbors, old_neighbors - new_neighbors)
+
+    def link_list(self, device_id=None):
+        """
+        Returns list of links (device, local interface, neighbor, remote port)
+
+        :param device_id: if specified, only links of device_id are returned (device_id is first item of each link)
+        :return links:
+        """
+        if device_id is None:
+            return [key + (port,) for key, port in self.links.items()]
+        result = []
+        for key in self.link_index.get(device_id, ()):
+            (dev, intf, nbr) = key
+            if device_id == dev:
+                result.append((dev, intf, nbr, self.links[key]))
+            else:
+                result.append((nbr, self.links[key], dev, intf))
+        return sorted(set(result))
+
+    def neighbors(self, device_id):
+        """
+        Returns list of neighbors of device
+        """
+        return sorted(self.adjacency.get(device_id, ()))
+
+    def path(self, src, dst):
+        """
+        Returns shortest path (list of device_ids) from src to dst, empty list if there is no path
+        """
+        if src not in self.adjacency or dst not in self.adjacency:
+            return []
+        previous = {src: None}
+        queue = deque([src])
+        while queue:
+            node = queue.popleft()
+            if node == dst:
+                result = []
+                while node is not None:
+                    result.append(node)
+                    node = previous[node]
+                return result[::-1]
+            for nbr in self.adjacency[node]:
+                if nbr not in previous:
+                    previous[nbr] = node
+                    queue.append(nbr)
+        return []
+
+    def reachable(self, root, failed=None):
+        """
+        Returns set of devices reachable from root if the device 'failed' is down
+        """
+        if root not in self.adjacency or root == failed:
+            return set()
+        seen = {root}
+        queue = deque([root])
+        while queue:
+            node = queue.popleft()
+            for nbr in self.adjacency[node]:
+                if nbr not in seen and nbr != failed:
+                    seen.add(nbr)
+                    queue.append(nbr)
+        return seen
+
+    def blast_radius(self, device_id, root):
+        """
+        Returns list of devices which lose connectivity to root if device_id is down (device_id itself is not included)
+        """
+        before = self.reachable(root)
+        after = self.reachable(root, device_id)
+        before.discard(device_id)
+        return sorted(before - after)
+
+    def save(self, filename):
+        """
+        Saves topology into gzipped JSON file, device names are stored only once and links refer to them by index
+        """
+        names = {}
+        links = []
+        for (dev, intf, nbr), port in self.links.items():
+            links.append([names.setdefault(dev, len(names)), intf, names.setdefault(nbr, len(names)), port])
+        with gzip.open(filename, 'wt') as data_file:
+            json.dump({'devices': list(names), 'links': links}, data_file, separators=(',', ':'))
+
+    def load(self, filename):
+        """
+        Loads links saved by save, links are added to existing ones
+        """
+        with gzip.open(filename, 'rt') as data_file:
+            data = json.load(data_file)
+        names = data['devices']
+        for (dev, intf, nbr, port) in data['links']:
+            self.add_link(names[dev], intf, names[nbr], port)
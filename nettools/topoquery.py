@@ -0,0 +1,103 @@
+# pylint: disable=C0301, C0103, E0401, C0413
+
+import sys
+import getopt
+import os
+
+from topology import Topology
+
+
+def print_links(links):
+    """
+    Prints links
+
+    :param links: list of (device, local interface, neighbor, remote port)
+    """
+
+    print("sep=;")
+    print("Device;Interface;Neighbor;Port")
+    for link in links:
+        print(';'.join(link))
+
+def main():
+    ''' Main
+
+    Queries topology saved by discoverdevices.py (--graph option), no device is contacted.
+
+    '''
+    usage_str = '''
+    Usage: topoquery.py [OPTIONS]
+    -h,     --help                      display help
+    -g,     --graph                     topology file saved by discoverdevices.py
+    -n,     --neighbors                 prints links of the device
+    -p,     --path                      prints shortest path between two devices, format device1,device2
+    -b,     --blast                     prints devices which lose connectivity to root device if the device is down
+    -r,     --root                      root device for --blast (e.g. core switch)
+    -l,     --links                     prints all links
+    '''
+    graph_file = ''
+    neighbors_of = ''
+    path_of = ''
+    blast_of = ''
+    root = ''
+    all_links = False
+
+    argv = sys.argv[1:]
+
+    try:
+        opts, args = getopt.getopt(argv, "hg:n:p:b:r:l", ["help", "graph=", "neighbors=", "path=", "blast=", "root=", "links"])
+    except getopt.GetoptError:
+        print(usage_str)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            print(usage_str)
+            sys.exit()
+
+        elif opt in ("-g", "--graph"):
+            graph_file = arg
+        elif opt in ("-n", "--neighbors"):
+            neighbors_of = arg
+        elif opt in ("-p", "--path"):
+            path_of = arg
+        elif opt in ("-b", "--blast"):
+            blast_of = arg
+        elif opt in ("-r", "--root"):
+            root = arg
+        elif opt in ("-l", "--links"):
+            all_links = True
+
+    # sanity checks
+    if not graph_file:
+        print("Topology file not specified")
+        sys.exit(2)
+    if not os.path.isfile(graph_file):
+        print("Topology file", graph_file, "doesn't exist")
+        sys.exit(2)
+    if blast_of and not root:
+        print("Root device not specified")
+        sys.exit(2)
+    if path_of and len(path_of.split(',')) != 2:
+        print("Invalid path format:", path_of)
+        sys.exit(2)
+
+    topo = Topology()
+    topo.load(graph_file)
+
+    if all_links:
+        print_links(topo.link_list())
+    if neighbors_of:
+        print_links(topo.link_list(neighbors_of))
+    if path_of:
+        (src, dst) = path_of.split(',')
+        path = topo.path(src, dst)
+        if not path:
+            print("No path between", src, "and", dst)
+        else:
+            print(' -> '.join(path))
+    if blast_of:
+        for device in topo.blast_radius(blast_of, root):
+            print(device)
+
+if __name__ == "__main__":
+    main()